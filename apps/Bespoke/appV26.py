@@ -5,79 +5,79 @@
 # 3. Single EAC column used across all contract lengths.
 # 4. TAC columns added (Total Annual Cost) for 12/24/36 months and displayed in grid.
 
+import os
+import sys
 import streamlit as st
-import pandas as pd
 from io import BytesIO
-from dateutil.relativedelta import relativedelta
+
+# Add 'shared' directory to Python's module path
+SHARED_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "shared"))
+if SHARED_DIR not in sys.path:
+    sys.path.append(SHARED_DIR)
+
+from xlsx_export import write_xlsx_streaming
 from utils.versioning import get_current_version
+from logic.tender_pipeline import (
+    file_hash, read_tender_sheets, build_mpxn_table, generate_broker_output,
+    iter_tender_chunks, build_mpxn_table_chunked, xlsx_sheet_names, PRICING_SHEETS
+)
+
+# Workbooks above this size are streamed row by row instead of loaded whole
+LARGE_TENDER_BYTES = 20 * 1024 * 1024
 
 st.set_page_config(layout="wide")
 st.markdown(f"**App Version:** `{get_current_version()}`")
 
 # --- Helper Functions ---
-def load_supplier_data(uploaded_file, sheet_name):
-    return pd.read_excel(uploaded_file, sheet_name=sheet_name)
+@st.cache_data(show_spinner="Reading tender...")
+def load_tender_sheets(upload_hash, _file_bytes):
+    # Standard and Green are read together and cached by upload hash; the raw bytes are excluded from hashing
+    return read_tender_sheets(_file_bytes)
 
-def calculate_annual_cost(sc, unit_rate, eac):
-    # Convert pence to pounds (assuming pence input)
-    return round(((sc * 365) + (unit_rate * eac)) / 100, 2)
+@st.cache_data(show_spinner="Processing tender...")
+def load_tender_table(upload_hash, sheet_name, _file_bytes):
+    return build_mpxn_table(load_tender_sheets(upload_hash, _file_bytes)[sheet_name])
+
+@st.cache_data(show_spinner="Streaming tender...")
+def load_tender_table_chunked(upload_hash, file_name, sheet_name, _file_bytes):
+    # CSV/Parquet tenders and large workbooks are reduced chunk by chunk to the same MPXN table
+    return build_mpxn_table_chunked(iter_tender_chunks(BytesIO(_file_bytes), file_name, sheet_name))
 
 @st.cache_data
 def convert_df(df):
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=False)
+    # Stream rows straight into the workbook so large tenders export in bounded memory
+    output = write_xlsx_streaming(df, BytesIO())
     output.seek(0)
     return output
 
-def calculate_months(start, end):
-    return (end.year - start.year) * 12 + (end.month - start.month)
-
 # --- Streamlit UI ---
 st.title('Bespoke Power Pricing Tool – Broker Output Format')
 
-uploaded_file = st.file_uploader("Upload Supplier Tender File (Excel)", type=["xlsx"])
+uploaded_file = st.file_uploader("Upload Supplier Tender File (Excel, CSV or Parquet)", type=["xlsx", "csv", "parquet"])
 
 if uploaded_file:
-    sheet_option = st.selectbox("Select Pricing Type:", ('Standard', 'Green'))
-    df_all = load_supplier_data(uploaded_file, sheet_name=sheet_option)
-
-    # Date conversions and contract length calculation
-    df_all['CSD'] = pd.to_datetime(df_all['CSD'], dayfirst=True)
-    df_all['CED'] = pd.to_datetime(df_all['CED'], dayfirst=True)
-    df_all['Contract Length'] = df_all.apply(lambda row: calculate_months(row['CSD'], row['CED']), axis=1)
-    df_all = df_all[df_all['Contract Length'].isin([12, 24, 36])]
-    df_all['Contract Length'] = df_all['Contract Length'].astype(str)
-
-    if 'EAC' not in df_all.columns:
-        st.error("Missing 'EAC' column in input file.")
+    file_bytes = uploaded_file.getvalue()
+    upload_hash = file_hash(file_bytes)
+    is_xlsx = uploaded_file.name.lower().endswith(".xlsx")
+    try:
+        if is_xlsx and len(file_bytes) <= LARGE_TENDER_BYTES:
+            sheet_option = st.selectbox("Select Pricing Type:", list(load_tender_sheets(upload_hash, file_bytes)))
+            total_rows, full_df = load_tender_table(upload_hash, sheet_option, file_bytes)
+        else:
+            sheet_option = None
+            if is_xlsx:
+                sheets = [name for name in PRICING_SHEETS if name in xlsx_sheet_names(BytesIO(file_bytes))]
+                if not sheets:
+                    raise ValueError(f"No pricing sheets found; expected one of: {', '.join(PRICING_SHEETS)}.")
+                sheet_option = st.selectbox("Select Pricing Type:", sheets)
+            total_rows, full_df = load_tender_table_chunked(upload_hash, uploaded_file.name, sheet_option, file_bytes)
+    except ValueError as e:
+        st.error(str(e))
         st.stop()
 
     # Count total rows read
-    total_rows = len(df_all)
-    st.info(f"Total rows read from Excel: {total_rows}")
-
-    # Use first EAC per MPXN
-    eac_map = df_all.groupby('MPXN')['EAC'].first().reset_index()
-
-    # Pivot Standing Charge & Unit Rate
-    cost_fields = ['Standing Charge (p/day)', 'Standard Rate (p/kWh)']
-    df_grouped = df_all.groupby(['MPXN', 'Contract Length'])[cost_fields].first().reset_index()
-    df_pivot = df_grouped.pivot(index='MPXN', columns='Contract Length', values=cost_fields)
-    df_pivot.columns = [f"{col[0]} {col[1]}m" for col in df_pivot.columns]
-    df_pivot.reset_index(inplace=True)
-
-    displayed_rows = len(df_pivot)
-    st.info(f"Rows displayed in grid (unique MPXN): {displayed_rows}")
-
-    # Merge EAC and pivoted values
-    full_df = pd.merge(eac_map, df_pivot, on='MPXN', how='left')
-
-    # Add Uplift and TAC columns
-    for term in ['12', '24', '36']:
-        full_df[f'S/C Uplift {term}m'] = 0.000
-        full_df[f'Unit Rate Uplift {term}m'] = 0.000
-        full_df[f'TAC {term}m (£)'] = 0.00
+    st.info(f"Total rows read from tender: {total_rows}")
+    st.info(f"Rows displayed in grid (unique MPXN): {len(full_df)}")
 
     # Data Editor
     st.subheader("Enter Uplifts Per MPXN & Contract Length")
@@ -101,36 +101,8 @@ if uploaded_file:
     )
 
     if st.button("Generate Broker Output"):
-        output_rows = []
-
-        for _, row in input_editor.iterrows():
-            base = {
-                'MPXN': row['MPXN'],
-                'EAC': row['EAC']
-            }
-
-            for term in ['12', '24', '36']:
-                sc_col = f'Standing Charge (p/day) {term}m'
-                ur_col = f'Standard Rate (p/kWh) {term}m'
-
-                sc_uplift = row.get(f'S/C Uplift {term}m', 0)
-                ur_uplift = row.get(f'Unit Rate Uplift {term}m', 0)
-
-                sc = row.get(sc_col, 0) + sc_uplift
-                ur = row.get(ur_col, 0) + ur_uplift
-                eac = row['EAC']
-
-                total_cost = calculate_annual_cost(sc, ur, eac)
-
-                base.update({
-                    f'Standing Charge {term}m (p/day)': round(sc, 3),
-                    f'Unit Rate {term}m (p/kWh)': round(ur, 3),
-                    f'TAC {term}m (£)': total_cost
-                })
-
-            output_rows.append(base)
-
-        final_output = pd.DataFrame(output_rows)
+        # Price every MPXN and term as array operations
+        final_output = generate_broker_output(input_editor)
         st.success("Broker Output Generated")
         st.dataframe(final_output, use_container_width=True)
 
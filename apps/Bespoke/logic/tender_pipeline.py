@@ -0,0 +1,378 @@
+# -----------------------------------------
+# File: tender_pipeline.py
+# Purpose: Vectorised tender processing for the Bespoke pricing tools
+# Notes:
+#   - Contract length is whole calendar months between CSD and CED,
+#     computed on the date columns rather than row by row
+#   - One row per MPXN: first EAC plus 12/24/36m standing charge and
+#     unit rate pivoted into columns
+#   - HH meters are those with day, night, DUoS and standing charge all
+#     present; each meter type gets its own wide table and TAC profile
+#   - Tender workbooks are opened once and every pricing sheet is parsed
+#     in the same pass, so switching Standard/Green needs no re-read
+#   - Large tenders (CSV, Parquet or XLSX) can be streamed in chunks and
+#     reduced to the same MPXN table without holding every row in memory
+#   - Functions here are pure; the apps wrap them in st.cache_data keyed
+#     by the upload hash and sheet
+# -----------------------------------------
+
+import hashlib
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from openpyxl import load_workbook
+
+TERMS = ["12", "24", "36"]
+COST_FIELDS = ["Standing Charge (p/day)", "Standard Rate (p/kWh)"]
+PRICING_SHEETS = ["Standard", "Green"]
+DATE_FIELDS = ["CSD", "CED"]
+TENDER_CHUNK_ROWS = 50_000
+
+
+def file_hash(file_bytes: bytes) -> str:
+    """Content hash used as the cache key for an uploaded tender."""
+    return hashlib.sha1(file_bytes).hexdigest()
+
+
+def _type_tender_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Parse dates and coerce EAC and price columns to floats once at load."""
+    df = df.copy()
+    for col in DATE_FIELDS:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], dayfirst=True, errors="coerce")
+    for col in df.columns:
+        if col == "EAC" or "(p/" in str(col):
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype(float)
+    return df
+
+
+# -----------------------------------------
+# Function: read_tender_sheets
+# Purpose: Read every pricing sheet of a tender workbook in one pass.
+# Inputs:
+#   - file_bytes (bytes): Uploaded workbook
+#   - sheets (list[str], optional): Sheet names to read; absent ones are skipped
+# Returns:
+#   - dict: Sheet name -> typed pd.DataFrame (CSD/CED as dates, EAC and
+#     p/day, p/kWh, p/KVA columns as floats)
+# Notes:
+#   - Raises ValueError if none of the sheets are in the workbook
+# -----------------------------------------
+def read_tender_sheets(file_bytes: bytes, sheets: list = PRICING_SHEETS) -> dict:
+    """Open the workbook once and return every pricing sheet as a typed frame."""
+
+    with pd.ExcelFile(BytesIO(file_bytes)) as workbook:
+        found = [name for name in sheets if name in workbook.sheet_names]
+        if not found:
+            raise ValueError(f"No pricing sheets found; expected one of: {', '.join(sheets)}.")
+        frames = workbook.parse(sheet_name=found)
+
+    return {name: _type_tender_columns(frames[name]) for name in found}
+
+
+# -----------------------------------------
+# Function: contract_months
+# Purpose: Whole calendar months between two date columns.
+# Notes:
+#   - Same rule as calculate_months: day of month is ignored
+#   - Missing dates give <NA>
+# -----------------------------------------
+def contract_months(csd: pd.Series, ced: pd.Series) -> pd.Series:
+    """Vectorised (end.year - start.year) * 12 + (end.month - start.month)."""
+    months = (ced.dt.year - csd.dt.year) * 12 + (ced.dt.month - csd.dt.month)
+    return months.astype("Int64")
+
+
+def _priced_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """Tender rows on a 12/24/36m contract, with Contract Length as a string term."""
+    df = df.copy()
+    df["CSD"] = pd.to_datetime(df["CSD"], dayfirst=True)
+    df["CED"] = pd.to_datetime(df["CED"], dayfirst=True)
+    df["Contract Length"] = contract_months(df["CSD"], df["CED"])
+    df = df[df["Contract Length"].isin([12, 24, 36])]
+    df["Contract Length"] = df["Contract Length"].astype(int).astype(str)
+
+    if "EAC" not in df.columns:
+        raise ValueError("Missing 'EAC' column in input file.")
+    return df
+
+
+def _mpxn_table(eac_map: pd.Series, firsts: pd.DataFrame) -> pd.DataFrame:
+    """Pivot first prices per MPXN/term and add the uplift and TAC columns."""
+
+    # Pivot Standing Charge & Unit Rate
+    df_pivot = firsts.reset_index().pivot(index="MPXN", columns="Contract Length", values=COST_FIELDS)
+    df_pivot.columns = [f"{col[0]} {col[1]}m" for col in df_pivot.columns]
+    df_pivot.reset_index(inplace=True)
+
+    full_df = pd.merge(eac_map.reset_index(), df_pivot, on="MPXN", how="left")
+
+    # Terms missing from the tender still get (empty) price columns
+    for term in TERMS:
+        for field in COST_FIELDS:
+            if f"{field} {term}m" not in full_df.columns:
+                full_df[f"{field} {term}m"] = float("nan")
+        full_df[f"S/C Uplift {term}m"] = 0.000
+        full_df[f"Unit Rate Uplift {term}m"] = 0.000
+        full_df[f"TAC {term}m (£)"] = 0.00
+
+    return full_df
+
+
+# -----------------------------------------
+# Function: build_mpxn_table
+# Purpose: Group a tender sheet by MPXN and pivot the 12/24/36m prices.
+# Inputs:
+#   - df_all (pd.DataFrame): Raw tender sheet with MPXN, CSD, CED, EAC and COST_FIELDS
+# Returns:
+#   - tuple: (rows kept after the 12/24/36m filter [int], MPXN table [pd.DataFrame])
+# Notes:
+#   - Raises ValueError if the sheet has no EAC column
+#   - Uplift columns start at 0 and TAC columns at 0.00, ready for the editor
+# -----------------------------------------
+def build_mpxn_table(df_all: pd.DataFrame) -> tuple[int, pd.DataFrame]:
+    """Return the row count and the one-row-per-MPXN table with uplift and TAC columns."""
+
+    df_all = _priced_rows(df_all)
+
+    # Use first EAC per MPXN
+    eac_map = df_all.groupby("MPXN")["EAC"].first()
+    firsts = df_all.groupby(["MPXN", "Contract Length"])[COST_FIELDS].first()
+
+    return len(df_all), _mpxn_table(eac_map, firsts)
+
+
+# -----------------------------------------
+# Function: iter_tender_chunks
+# Purpose: Stream a tender file as DataFrame chunks of at most chunksize rows.
+# Inputs:
+#   - source (str | file-like): Tender file
+#   - file_name (str): Used for the file type (.csv, .parquet or .xlsx)
+#   - sheet_name (str, optional): XLSX sheet; defaults to the first sheet
+#   - chunksize (int): Rows per chunk
+# Notes:
+#   - CSV uses read_csv(chunksize), Parquet reads one record batch at a
+#     time and XLSX is read through openpyxl in read-only mode
+#   - Every chunk is typed like read_tender_sheets output (dates, floats),
+#     whatever the file format
+#   - Raises ValueError for any other file type
+# -----------------------------------------
+def iter_tender_chunks(source, file_name: str, sheet_name: str = None, chunksize: int = TENDER_CHUNK_ROWS):
+    """Yield the tender rows chunk by chunk without loading the whole file."""
+    for chunk in _raw_tender_chunks(source, file_name, sheet_name, chunksize):
+        yield _type_tender_columns(chunk)
+
+
+def _raw_tender_chunks(source, file_name: str, sheet_name: str, chunksize: int):
+    suffix = Path(file_name).suffix.lower()
+    if suffix == ".csv":
+        yield from pd.read_csv(source, chunksize=chunksize)
+
+    elif suffix == ".parquet":
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+
+    elif suffix == ".xlsx":
+        workbook = load_workbook(source, read_only=True, data_only=True)
+        try:
+            rows = workbook[sheet_name or workbook.sheetnames[0]].iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            block = []
+            for row in rows:
+                if all(value is None for value in row):
+                    continue
+                block.append(row)
+                if len(block) >= chunksize:
+                    yield pd.DataFrame(block, columns=header)
+                    block = []
+            if block:
+                yield pd.DataFrame(block, columns=header)
+        finally:
+            workbook.close()
+
+    else:
+        raise ValueError(f"Unsupported tender file type: {suffix or file_name}")
+
+
+def xlsx_sheet_names(source) -> list:
+    """Sheet names of a workbook, read without loading any cells."""
+    workbook = load_workbook(source, read_only=True)
+    try:
+        return list(workbook.sheetnames)
+    finally:
+        workbook.close()
+
+
+# -----------------------------------------
+# Function: build_mpxn_table_chunked
+# Purpose: Same result as build_mpxn_table, aggregated chunk by chunk.
+# Inputs:
+#   - chunks (iterable[pd.DataFrame]): e.g. from iter_tender_chunks
+# Returns:
+#   - tuple: (rows kept after the 12/24/36m filter [int], MPXN table [pd.DataFrame])
+# Notes:
+#   - Only the running first EAC per MPXN and first prices per MPXN/term
+#     are kept between chunks, so memory follows the number of meters,
+#     not the number of tender rows
+#   - Raises ValueError if the tender has no EAC column or no 12/24/36m rows
+# -----------------------------------------
+def build_mpxn_table_chunked(chunks) -> tuple[int, pd.DataFrame]:
+    """Return the row count and the MPXN table for a tender read in chunks."""
+
+    total_rows = 0
+    eac_map = None
+    firsts = None
+    for chunk in chunks:
+        chunk = _priced_rows(chunk)
+        total_rows += len(chunk)
+        if chunk.empty:
+            continue
+
+        # Earlier chunks win; later chunks only fill values still missing
+        chunk_eac = chunk.groupby("MPXN")["EAC"].first()
+        chunk_firsts = chunk.groupby(["MPXN", "Contract Length"])[COST_FIELDS].first()
+        eac_map = chunk_eac if eac_map is None else eac_map.combine_first(chunk_eac)
+        firsts = chunk_firsts if firsts is None else firsts.combine_first(chunk_firsts)
+
+    if eac_map is None:
+        raise ValueError("No 12, 24 or 36 month rows found in input file.")
+
+    return total_rows, _mpxn_table(eac_map, firsts)
+
+
+# -----------------------------------------
+# Function: generate_broker_output
+# Purpose: Apply per-MPXN uplifts and price every term in one pass.
+# Inputs:
+#   - editor_df (pd.DataFrame): Edited grid with MPXN, EAC, base prices and uplifts
+# Returns:
+#   - pd.DataFrame: MPXN, EAC and uplifted SC, unit rate and TAC per term
+# Notes:
+#   - TAC follows calculate_annual_cost: ((SC * 365) + (rate * EAC)) / 100,
+#     rounded to 2dp, on the unrounded uplifted prices
+#   - Missing price or uplift columns count as 0, as row.get(..., 0) did
+# -----------------------------------------
+def generate_broker_output(editor_df: pd.DataFrame) -> pd.DataFrame:
+    """Return the broker output table for all MPXNs and terms at once."""
+
+    output = pd.DataFrame({"MPXN": editor_df["MPXN"].to_numpy(), "EAC": editor_df["EAC"].to_numpy()})
+    eac = editor_df["EAC"].to_numpy(dtype=float)
+
+    for term in TERMS:
+        sc = (editor_df.get(f"Standing Charge (p/day) {term}m", 0) + editor_df.get(f"S/C Uplift {term}m", 0))
+        ur = (editor_df.get(f"Standard Rate (p/kWh) {term}m", 0) + editor_df.get(f"Unit Rate Uplift {term}m", 0))
+        sc = pd.Series(sc, index=editor_df.index, dtype=float).to_numpy()
+        ur = pd.Series(ur, index=editor_df.index, dtype=float).to_numpy()
+
+        output[f"Standing Charge {term}m (p/day)"] = sc.round(3)
+        output[f"Unit Rate {term}m (p/kWh)"] = ur.round(3)
+        output[f"TAC {term}m (£)"] = (((sc * 365) + (ur * eac)) / 100).round(2)
+
+    return output
+
+
+# Price columns per meter type, mapped to the short name used for uplifts
+METER_FIELDS = {
+    "NHH": {
+        "Standing Charge (p/day)": "SC",
+        "Day Rate (p/kWh)": "Day",
+        "Night Rate (p/kWh)": "Night",
+        "E/W Rate (p/kWh)": "E/W",
+    },
+    "HH": {
+        "Standing Charge (p/day)": "SC",
+        "All Year - Day Rate (p/kWh)": "Day",
+        "All Year - Night Rate (p/kWh)": "Night",
+        "DUoS (p/KVA/Day)": "DUoS",
+    },
+}
+
+# Per-day charges; every other price is a unit rate weighted by profile
+DAILY_FIELDS = ["Standing Charge (p/day)", "DUoS (p/KVA/Day)"]
+
+# Share of EAC on each unit rate when estimating TAC
+DEFAULT_PROFILE_WEIGHTS = {
+    "NHH": {"Day": 0.50, "Night": 0.30, "E/W": 0.20},
+    "HH": {"Day": 0.70, "Night": 0.30},
+}
+
+
+def profile_weights_valid(weights: dict) -> bool:
+    """True if the profile weights (fractions) add up to 100%."""
+    return bool(np.isclose(sum(weights.values()), 1.0))
+
+
+def hh_mask(df: pd.DataFrame) -> np.ndarray:
+    """True where a row has every HH price (day, night, DUoS and standing charge)."""
+    fields = list(METER_FIELDS["HH"])
+    if not set(fields).issubset(df.columns):
+        return np.zeros(len(df), dtype=bool)
+    return df[fields].notna().all(axis=1).to_numpy()
+
+
+# -----------------------------------------
+# Function: build_meter_table
+# Purpose: One-row-per-MPXN uplift editor for one meter type.
+# Inputs:
+#   - df (pd.DataFrame): Tender rows for one meter type with MPXN, EAC,
+#     Contract Length (months) and the METER_FIELDS prices
+#   - meter_type (str): "NHH" or "HH"
+#   - weights (dict, optional): Profile weight per rate, e.g. {"Day": 0.5, ...};
+#     defaults to DEFAULT_PROFILE_WEIGHTS
+# Returns:
+#   - pd.DataFrame: MPXN, EAC, then per term the prices, zero uplifts and TAC_<term>m
+# Notes:
+#   - All terms come from one pivot of the first tender row per MPXN/term,
+#     so a term's prices never mix values from different quotes
+#   - Raises ValueError if the weights do not sum to 100%
+#   - MPXNs keep tender order; a missing EAC counts as 0
+#   - TAC = (daily charges * 365 + EAC * weighted (rate + uplift)) / 100
+# -----------------------------------------
+def build_meter_table(df: pd.DataFrame, meter_type: str, weights: dict = None) -> pd.DataFrame:
+    """Return the uplift editor table for NHH or HH meters."""
+
+    fields = METER_FIELDS[meter_type]
+    weights = DEFAULT_PROFILE_WEIGHTS[meter_type] if weights is None else weights
+    if not profile_weights_valid(weights):
+        raise ValueError(f"{meter_type} profile weights must sum to 100%.")
+
+    df = df.assign(EAC=df["EAC"].fillna(0))
+    base = df.groupby("MPXN", sort=False, dropna=False)["EAC"].first()
+    n = len(base)
+
+    priced = df[df["Contract Length"].isin([int(term) for term in TERMS])]
+    values = [field for field in fields if field in priced.columns]
+    if priced.empty or not values:
+        wide = pd.DataFrame(index=base.index)
+    else:
+        # First whole row per MPXN/term, so every price in a term comes from the same quote
+        priced = priced.drop_duplicates(subset=["MPXN", "Contract Length"])
+        priced = priced.assign(**{"Contract Length": priced["Contract Length"].astype(int).astype(str)})
+        wide = priced.pivot(index="MPXN", columns="Contract Length", values=values)
+        wide.columns = [f"{field} {term}m" for field, term in wide.columns]
+        wide = wide.reindex(base.index)
+
+    eac = base.to_numpy(dtype=float)
+    columns = {"MPXN": base.index.to_numpy(), "EAC": base.to_numpy()}
+    for term in TERMS:
+        for field in fields:
+            name = f"{field} {term}m"
+            columns[name] = wide[name].to_numpy(dtype=float) if name in wide.columns else np.full(n, np.nan)
+        for short in fields.values():
+            columns[f"{short} Uplift {term}m"] = np.zeros(n)
+
+        tac = np.zeros(n)
+        for field, short in fields.items():
+            price = columns[f"{field} {term}m"]
+            if field in DAILY_FIELDS:
+                tac = tac + price * 365
+            else:
+                tac = tac + eac * (price + columns[f"{short} Uplift {term}m"]) * weights.get(short, 0.0)
+        columns[f"TAC_{term}m"] = (tac / 100).round(2)
+
+    return pd.DataFrame(columns)
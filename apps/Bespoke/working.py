@@ -2,99 +2,65 @@
 # Builds on V7 with Contract Length derivation, full TAC calculation, and correct pivoted table structure
 
 import streamlit as st
-import pandas as pd
 from io import BytesIO
+from logic.tender_pipeline import (
+    file_hash, read_tender_sheets, contract_months, hh_mask, build_meter_table,
+    profile_weights_valid, DEFAULT_PROFILE_WEIGHTS,
+)
 
 # --- Streamlit Setup ---
 st.set_page_config(layout="wide")
 st.title("🔌 Bespoke Power Pricing Tool – V8 (TAC + Duration Logic)")
 
+# --- TAC Profile Weights ---
+st.sidebar.header("TAC Profile Weights (%)")
+profile_weights = {}
+for meter_type, defaults in DEFAULT_PROFILE_WEIGHTS.items():
+    profile_weights[meter_type] = {
+        rate: st.sidebar.number_input(f"{meter_type} {rate}", min_value=0.0, max_value=100.0,
+                                      value=weight * 100, step=5.0, key=f"weight_{meter_type}_{rate}") / 100
+        for rate, weight in defaults.items()
+    }
+    if not profile_weights_valid(profile_weights[meter_type]):
+        st.sidebar.error(f"{meter_type} weights add up to {sum(profile_weights[meter_type].values()) * 100:.0f}%, not 100%.")
+
+# --- Load Tender (all pricing sheets in one pass, cached by upload hash) ---
+@st.cache_data(show_spinner="Reading tender...")
+def load_tender_sheets(upload_hash, _file_bytes):
+    return read_tender_sheets(_file_bytes)
+
 # --- Upload Supplier Quote File ---
 file = st.file_uploader("Upload Supplier Tender File (Excel)", type=["xlsx"])
 
 if file:
-    sheet = st.selectbox("Select Sheet", options=["Standard", "Green"])
-    df_raw = pd.read_excel(file, sheet_name=sheet)
-
-    # --- Derive Contract Length ---
-    df_raw["CSD"] = pd.to_datetime(df_raw["CSD"], dayfirst=True, errors="coerce")
-    df_raw["CED"] = pd.to_datetime(df_raw["CED"], dayfirst=True, errors="coerce")
-    df_raw["Contract Length"] = ((df_raw["CED"] - df_raw["CSD"]) / pd.Timedelta(days=365)).round().astype(int)
-
-    # --- Detect HH ---
-    def is_hh(row):
-        return pd.notna(row.get("All Year - Day Rate (p/kWh)")) and \
-               pd.notna(row.get("All Year - Night Rate (p/kWh)")) and \
-               pd.notna(row.get("DUoS (p/KVA/Day)")) and \
-               pd.notna(row.get("Standing Charge (p/day)"))
-
-    df_raw["Is_HH"] = df_raw.apply(is_hh, axis=1)
+    file_bytes = file.getvalue()
+    try:
+        sheets = load_tender_sheets(file_hash(file_bytes), file_bytes)
+    except ValueError as e:
+        st.error(str(e))
+        st.stop()
+    sheet = st.selectbox("Select Sheet", options=list(sheets))
+    df_raw = sheets[sheet]
+
+    # --- Derive Contract Length (months) ---
+    df_raw["Contract Length"] = contract_months(df_raw["CSD"], df_raw["CED"])
 
     # --- Split HH and NHH ---
-    df_nhh = df_raw[df_raw["Is_HH"] == False].copy()
-    df_hh = df_raw[df_raw["Is_HH"] == True].copy()
+    is_hh = hh_mask(df_raw)
+    df_nhh = df_raw[~is_hh]
+    df_hh = df_raw[is_hh]
 
     st.success(f"Loaded {len(df_nhh)} NHH rows and {len(df_hh)} HH rows.")
 
-    # --- Function to Build Uplift Table with TAC ---
-    def build_uplift_editor(df, meter_type):
-        terms = [12, 24, 36]
-        df['EAC'] = df['EAC'].fillna(0)
-        df['Contract Length'] = df['Contract Length'].astype(str)
-
-        # Get one row per MPXN with EAC only once
-        base_df = df.drop_duplicates(subset=["MPXN"])[["MPXN", "EAC"]].copy()
-
-        for term in terms:
-            term_str = f"{term}"
-            sub_df = df[df['Contract Length'] == term_str].drop_duplicates(subset=["MPXN"])
-
-            if meter_type == "NHH":
-                for col in [
-                    "Standing Charge (p/day)",
-                    "Day Rate (p/kWh)",
-                    "Night Rate (p/kWh)",
-                    "E/W Rate (p/kWh)"
-                ]:
-                    mapping = sub_df.set_index("MPXN")[col]
-                    base_df[f"{col} {term}m"] = base_df["MPXN"].map(mapping)
-                for col in ["SC", "Day", "Night", "E/W"]:
-                    base_df[f"{col} Uplift {term}m"] = 0.000
-
-                tac = (
-                    base_df[f"Standing Charge (p/day) {term}m"] * 365 +
-                    base_df["EAC"] * (base_df[f"Day Rate (p/kWh) {term}m"] + base_df[f"Day Uplift {term}m"]) * 0.50 +
-                    base_df["EAC"] * (base_df[f"Night Rate (p/kWh) {term}m"] + base_df[f"Night Uplift {term}m"]) * 0.30 +
-                    base_df["EAC"] * (base_df[f"E/W Rate (p/kWh) {term}m"] + base_df[f"E/W Uplift {term}m"]) * 0.20
-                ) / 100
-                base_df[f"TAC_{term}m"] = tac.round(2)
-
-            else:
-                for col in [
-                    "Standing Charge (p/day)",
-                    "All Year - Day Rate (p/kWh)",
-                    "All Year - Night Rate (p/kWh)",
-                    "DUoS (p/KVA/Day)"
-                ]:
-                    mapping = sub_df.set_index("MPXN")[col]
-                    base_df[f"{col} {term}m"] = base_df["MPXN"].map(mapping)
-                for col in ["SC", "Day", "Night", "DUoS"]:
-                    base_df[f"{col} Uplift {term}m"] = 0.000
-
-                tac = (
-                    base_df[f"Standing Charge (p/day) {term}m"] * 365 +
-                    base_df[f"DUoS (p/KVA/Day) {term}m"] * 365 +
-                    base_df["EAC"] * (base_df[f"All Year - Day Rate (p/kWh) {term}m"] + base_df[f"Day Uplift {term}m"]) * 0.70 +
-                    base_df["EAC"] * (base_df[f"All Year - Night Rate (p/kWh) {term}m"] + base_df[f"Night Uplift {term}m"]) * 0.30
-                ) / 100
-                base_df[f"TAC_{term}m"] = tac.round(2)
-
-        return base_df
+    # TAC is only meaningful once every profile adds up to 100%
+    if not all(profile_weights_valid(weights) for weights in profile_weights.values()):
+        st.error("Fix the TAC profile weights in the sidebar so each meter type adds up to 100%.")
+        st.stop()
 
     # --- Display NHH Table ---
     if not df_nhh.empty:
         st.subheader("📘 NHH Quotes – Uplift Entry")
-        nhh_editor = build_uplift_editor(df_nhh, "NHH")
+        nhh_editor = build_meter_table(df_nhh, "NHH", profile_weights["NHH"])
         nhh_editor.columns = [str(col).replace(" (£)", "").replace("(", "").replace(")", "").replace(" ", "_") for col in nhh_editor.columns]
         nhh_editor = nhh_editor.fillna(0)
         try:
@@ -105,7 +71,7 @@ if file:
     # --- Display HH Table ---
     if not df_hh.empty:
         st.subheader("📗 HH Quotes – Uplift Entry")
-        hh_editor = build_uplift_editor(df_hh, "HH")
+        hh_editor = build_meter_table(df_hh, "HH", profile_weights["HH"])
         hh_editor.columns = [str(col).replace(" (£)", "").replace("(", "").replace(")", "").replace(" ", "_") for col in hh_editor.columns]
         hh_editor = hh_editor.fillna(0)
         try:
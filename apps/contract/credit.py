@@ -5,7 +5,10 @@ import streamlit as st
 import pandas as pd
 from io import BytesIO
 from datetime import datetime
-from fpdf import FPDF
+from logic.credit_engine import decide_applications, load_credit_rules, read_applications, reason_list, APPLICATION_COLUMNS
+from logic.config_manager import watched_config
+from logic.decision_reports import export_to_pdf, render_reports_zip, report_file_name
+from logic.sic_index import load_or_build_sic_index, resolve_sic, resolve_sic_codes
 
 st.set_page_config(page_title="Dyce Contract Decision Engine V2", layout="wide")
 
@@ -41,43 +44,18 @@ st.title(f"⚡ Dyce Contract Decision Engine (v{VERSION})")
 # ======================================================================================
 # 🔴 SECTION: LOAD CONFIGURATION + APPROVAL MATRIX
 # ======================================================================================
-@st.cache_data
-def load_config():
-    config_df = pd.read_excel(CONFIG_URL, sheet_name='CreditCriteria')
-    approval_df = pd.read_excel(CONFIG_URL, sheet_name='ApprovalMatrix')
-
-    config = {
-        row['Parameter']: {
-            'min': float(row['Min Value']),
-            'max': float(row['Max Value'])
-        }
-        for _, row in config_df.iterrows()
-    }
-
-    numeric_columns = [
-        'Min sites', 'Max Sites',
-        'Min Annual Spend', 'Max Annual Spend',  # Fixed typo here
-        'Min Annual Volume (kWh)', 'Max Annual Volume (kWh)'
-    ]
-
-    for col in numeric_columns:
-        approval_df[col] = (
-            approval_df[col]
-            .astype(str)
-            .str.replace('[^\\d.]', '', regex=True)
-            .astype(float)
-        )
+# Shared by every session; workbooks are re-parsed only when their content changes
+credit_rules = watched_config(CONFIG_URL, load_credit_rules)
+sic_rules = watched_config(SIC_CODES_URL, load_or_build_sic_index)
 
-    return config, approval_df
+rules = credit_rules.get()
+config, approval_matrix_df, approval_matrix = rules['config'], rules['approval_df'], rules['matrix']
+sic_index = sic_rules.get()
 
-@st.cache_data
-def load_sic_codes():
-    df = pd.read_excel(SIC_CODES_URL)
-    df['SIC_Code'] = df['SIC_Code'].astype(str).str.strip()
-    return df
-
-config, approval_matrix_df = load_config()
-sic_df = load_sic_codes()
+st.sidebar.caption(f"Credit config v{credit_rules.version} loaded {credit_rules.loaded_at:%Y-%m-%d %H:%M:%S}")
+for watched in (credit_rules, sic_rules):
+    if watched.last_error:
+        st.sidebar.warning(f"{watched.path.name} could not be reloaded ({watched.last_error}); using the last good version.")
 
 
 # ======================================================================================
@@ -95,15 +73,17 @@ broker_uplift_standing = st.number_input("Broker Uplift - Standing Charge (p/day
 broker_uplift_unit_rate = st.number_input("Broker Uplift - Unit Rate (p/kWh)", 0.0)
 
 st.header("2️⃣ SIC Code Information")
-sic_code = st.text_input("SIC Code (5-digit)").strip()
+sic_code = st.text_input("SIC Code (5-digit, or 4-digit class)").strip()
 sic_risk = "Medium"
 sic_description = "Unknown"
 
 if sic_code:
-    matched = sic_df[sic_df['SIC_Code'] == sic_code]
-    if not matched.empty:
-        sic_description = matched.iloc[0]['SIC_Description']
-        sic_risk = matched.iloc[0]['Typical_Risk_Rating']
+    matched = resolve_sic(sic_index, sic_code)
+    if matched['Match_Level']:
+        sic_description = matched['SIC_Description'] or "Unknown"
+        sic_risk = matched['SIC_Risk']
+        if matched['Match_Level'] != "code":
+            st.info(f"SIC Code not listed - using the {matched['Match_Level']} risk rating.")
         st.markdown(f"**SIC Description:** {sic_description}")
         st.markdown(f"**Typical Risk Rating:** {sic_risk}")
     else:
@@ -121,109 +101,32 @@ payment_terms = st.selectbox("Requested Payment Terms", ["Direct Debit", "BACS"]
 # 🔴 SECTION: DECISION ENGINE LOGIC
 # ======================================================================================
 def run_decision():
-    reasons = []
-    decision = "Approved"  # Start with approved
-
-    # Check for decline conditions first
-    if credit_score < config['refer_threshold']['min']:
-        decision = "Declined"
-        reasons.append("Declined: Credit Score below referral threshold")
-    if ccjs == "Yes":
-        decision = "Declined"
-        reasons.append("Declined: CCJs or Defaults present")
-
-    # If not declined, check all criteria for referral reasons
-    if decision != "Declined":
-        if config['refer_threshold']['min'] <= credit_score < config['approve_threshold']['min']:
-            reasons.append("Referral: Credit Score between thresholds")
-
-        if (business_type in ["Sole Trader", "Partnership"] and years_trading < 1) or (business_type == "Limited Company" and years_trading < 2):
-            reasons.append("Referral: Insufficient trading history")
-
-        if sic_risk in ["High", "Very High"]:
-            reasons.append("Referral: SIC Risk is High/Very High")
-
-        if payment_terms != "Direct Debit":
-            reasons.append("Referral: Payment terms - BACS selected")
-
-        if unit_margin_ppkwh < config['minimum_unit_margin_ppkwh']['min']:
-            reasons.append("Referral: Unit Margin below minimum")
-
-        if broker_uplift_standing > config['max_broker_uplift_standing']['max']:
-            reasons.append("Referral: Standing charge uplift exceeds maximum")
-
-        if broker_uplift_unit_rate > config['max_broker_uplift_unit_rate']['max']:
-            reasons.append("Referral: Unit rate uplift exceeds maximum")
-
-        # If ANY referral reasons exist, change decision to Referral
-        if any("Referral:" in reason for reason in reasons):
-            decision = "Referral"
-
-    if decision == "Declined":
-        required_approver = None
-    elif contract_value >= 1000000:
-        # Any deal £1M+ always goes to Managing Director
-        required_approver = "Managing Director"
-    elif decision == "Approved":
-        # Deal under £1M that passes all criteria = no approver needed
-        required_approver = "Auto-Approved"
-    else:
-        # Deal under £1M with referral reasons = refer to appropriate level
-        if contract_value <= 250000:
-            required_approver = "Sales Admin"
-        elif contract_value <= 500000:
-            required_approver = "TPI/ Direct Sales Manager"
-        else:  # contract_value <= 1000000
-            required_approver = "Commercial Manager"
+    application = pd.DataFrame([{
+        'Business Type': business_type,
+        'Number of Sites': number_of_sites,
+        'Annual Volume': annual_volume_kwh,
+        'Contract Value': contract_value,
+        'Contract Term': contract_term,
+        'Unit Margin': unit_margin_ppkwh,
+        'Broker Uplift Standing': broker_uplift_standing,
+        'Broker Uplift Unit Rate': broker_uplift_unit_rate,
+        'SIC Code': sic_code,
+        'SIC Risk': sic_risk,
+        'Credit Score': credit_score,
+        'Years Trading': years_trading,
+        'CCJs': ccjs,
+        'Payment Terms': payment_terms
+    }])
+    result = decide_applications(application, config, approval_matrix).iloc[0]
 
     timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    return decision, required_approver, reasons, timestamp
+    required_approver = result['Required Approver'] if pd.notna(result['Required Approver']) else None
+    return result['Decision'], required_approver, reason_list(result['Reasons']), timestamp
 
 
 # ======================================================================================
 # 🔴 SECTION: PDF EXPORT + RESULTS DISPLAY
 # ======================================================================================
-class PDF(FPDF):
-    def header(self):
-        self.image(LOGO_PATH, x=10, y=8, w=50)
-        self.ln(35)
-
-    def footer(self):
-        self.set_y(-15)
-        self.set_font('Arial', 'I', 8)
-        self.set_text_color(15, 42, 52)
-        self.cell(0, 10, f'Report generated on {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}', 0, 0, 'C')
-
-def export_to_pdf(inputs, decision, approver, reasons, timestamp):
-    pdf = PDF()
-    pdf.add_page()
-    pdf.set_font('Arial', 'B', 14)
-    pdf.set_text_color(15, 42, 52)
-    pdf.cell(0, 10, 'Dyce Credit Decision Report', ln=True, align='C')
-    pdf.ln(10)
-
-    pdf.set_font('Arial', 'B', 12)
-    pdf.cell(0, 10, 'Inputs Summary:', ln=True)
-    pdf.set_font('Arial', '', 12)
-    for k, v in inputs.items():
-        pdf.multi_cell(0, 10, f"{k}: {v}")
-
-    pdf.ln(5)
-    pdf.set_font('Arial', 'B', 12)
-    pdf.cell(0, 10, 'Decision:', ln=True)
-    pdf.set_font('Arial', '', 12)
-    pdf.multi_cell(0, 10, f"Decision: {decision}\nApprover Required: {approver if approver else 'N/A'}\nTimestamp: {timestamp}")
-
-    pdf.ln(5)
-    pdf.set_font('Arial', 'B', 12)
-    pdf.cell(0, 10, 'Reasons / Stipulations:', ln=True)
-    pdf.set_font('Arial', '', 12)
-    for reason in reasons:
-        pdf.multi_cell(0, 10, f"- {reason}")
-
-    pdf_bytes = pdf.output(dest='S').encode('latin1')
-    return BytesIO(pdf_bytes)
-
 if st.button("Run Decision Engine"):
     inputs = {
         'Business Type': business_type,
@@ -285,3 +188,63 @@ if st.button("Run Decision Engine"):
 
     pdf_data = export_to_pdf(inputs, final_decision, required_approver, reasons, timestamp)
     st.download_button("Download PDF Report", pdf_data, "Credit_Decision_Report.pdf", "application/pdf")
+
+
+# ======================================================================================
+# 🔴 SECTION: BULK DECISIONING
+# ======================================================================================
+st.header("4️⃣ Bulk Decisioning")
+st.caption("Upload a CSV or Excel file with one application per row, using the column names in the template. "
+           "SIC Risk is looked up from SIC Code when not supplied, falling back to the class, group, division or section rating; "
+           "unresolved codes default to Medium.")
+
+template_csv = pd.DataFrame(columns=APPLICATION_COLUMNS).to_csv(index=False).encode('utf-8')
+st.download_button("Download Bulk Template", template_csv, "Credit_Bulk_Template.csv", "text/csv")
+
+bulk_file = st.file_uploader("Upload Applications (CSV or Excel)", type=["csv", "xlsx"])
+
+if bulk_file:
+    try:
+        applications = read_applications(bulk_file.getvalue(), bulk_file.name)
+        if 'SIC Code' in applications.columns:
+            looked_up = resolve_sic_codes(sic_index, applications['SIC Code'])['SIC_Risk'].to_numpy()
+            applications['SIC Risk'] = applications['SIC Risk'].fillna(pd.Series(looked_up, index=applications.index)) if 'SIC Risk' in applications.columns else looked_up
+        bulk_results = decide_applications(applications, config, approval_matrix)
+    except ValueError as e:
+        st.error(str(e))
+        st.stop()
+
+    bulk_results['Timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    counts = bulk_results['Decision'].value_counts()
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Approved", int(counts.get("Approved", 0)))
+    col2.metric("Referral", int(counts.get("Referral", 0)))
+    col3.metric("Declined", int(counts.get("Declined", 0)))
+
+    st.dataframe(bulk_results, use_container_width=True)
+
+    output = BytesIO()
+    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+        bulk_results.to_excel(writer, index=False, sheet_name='Decisions')
+    st.download_button("Download Decisions (Excel)", output.getvalue(), "Credit_Bulk_Decisions.xlsx",
+                       "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    st.download_button("Download Decisions (CSV)", bulk_results.to_csv(index=False).encode('utf-8'),
+                       "Credit_Bulk_Decisions.csv", "text/csv")
+
+    if st.button("Build PDF Reports"):
+        input_columns = [col for col in applications.columns if col not in ('Decision', 'Required Approver', 'Reasons')]
+        name_column = next((col for col in ('Company Name', 'Customer Name', 'Customer', 'Reference') if col in input_columns), None)
+        jobs = [
+            {
+                'inputs': {col: row[col] for col in input_columns},
+                'decision': row['Decision'],
+                'approver': row['Required Approver'] if pd.notna(row['Required Approver']) else None,
+                'reasons': reason_list(row['Reasons']),
+                'timestamp': row['Timestamp'],
+                'file_name': report_file_name(position, row[name_column] if name_column else None),
+            }
+            for position, row in enumerate(bulk_results.to_dict('records'), start=1)
+        ]
+        with st.spinner(f"Rendering {len(jobs)} reports..."):
+            reports_zip = render_reports_zip(jobs)
+        st.download_button("Download PDF Reports (zip)", reports_zip, "Credit_Decision_Reports.zip", "application/zip")
@@ -0,0 +1,119 @@
+# -----------------------------------------
+# File: approval_matrix.py
+# Purpose: Resolve the required approver from the ApprovalMatrix config sheet
+# Notes:
+#   - Roles are ranked by their row order in the sheet (first = most junior)
+#   - Sites, annual spend and annual volume each map to a role through a
+#     sorted interval table; the application needs the most senior of the three
+#   - Values between one role's max and the next role's min go to the next
+#     role up; values below the first min take the first role and values
+#     above the last max take the last role
+#   - Single lookups use bisect, batches use np.searchsorted on the same tables
+# -----------------------------------------
+
+from bisect import bisect_right
+
+import numpy as np
+import pandas as pd
+
+# Dimension -> (min column, max column) in the ApprovalMatrix sheet
+MATRIX_COLUMNS = {
+    "sites": ("Min sites", "Max Sites"),
+    "spend": ("Min Annual Spend", "Max Annual Spend"),
+    "volume": ("Min Annual Volume (kWh)", "Max Annual Volume (kWh)"),
+}
+
+
+# -----------------------------------------
+# Function: compile_approval_matrix
+# Purpose: Build sorted interval tables from the parsed ApprovalMatrix sheet.
+# Inputs:
+#   - approval_df (pd.DataFrame): Role plus the MATRIX_COLUMNS min/max columns
+# Returns:
+#   - dict: "roles" in seniority order and, per dimension, "mins", "maxs" and
+#     "ranks" sorted by min
+# Notes:
+#   - Raises ValueError if the sheet is empty or a column is missing
+# -----------------------------------------
+def compile_approval_matrix(approval_df: pd.DataFrame) -> dict:
+    """Return the approval matrix as interval tables ready for bisect."""
+
+    missing = [col for pair in MATRIX_COLUMNS.values() for col in pair if col not in approval_df.columns]
+    if "Role" not in approval_df.columns:
+        missing.insert(0, "Role")
+    if missing:
+        raise ValueError(f"ApprovalMatrix is missing columns: {', '.join(missing)}")
+    if approval_df.empty:
+        raise ValueError("ApprovalMatrix has no roles.")
+
+    matrix = {"roles": approval_df["Role"].astype(str).str.strip().tolist()}
+    for dimension, (min_col, max_col) in MATRIX_COLUMNS.items():
+        mins = approval_df[min_col].to_numpy(dtype=float)
+        order = np.argsort(mins, kind="stable")
+        matrix[dimension] = {
+            "mins": mins[order].tolist(),
+            "maxs": approval_df[max_col].to_numpy(dtype=float)[order].tolist(),
+            "ranks": order.tolist(),
+        }
+    return matrix
+
+
+def _rank(table: dict, value: float) -> int:
+    pos = bisect_right(table["mins"], value) - 1
+    if pos < 0:
+        return table["ranks"][0]
+    if value > table["maxs"][pos] and pos + 1 < len(table["mins"]):
+        return table["ranks"][pos + 1]
+    return table["ranks"][pos]
+
+
+def _ranks(table: dict, values: np.ndarray) -> np.ndarray:
+    mins = np.asarray(table["mins"])
+    pos = np.searchsorted(mins, values, side="right") - 1
+    clipped = np.clip(pos, 0, len(mins) - 1)
+    in_gap = (pos >= 0) & (values > np.asarray(table["maxs"])[clipped]) & (pos + 1 < len(mins))
+    pos = np.where(pos < 0, 0, np.where(in_gap, pos + 1, pos))
+    return np.asarray(table["ranks"])[pos]
+
+
+def required_approver(matrix: dict, decision: str, sites: float, spend: float, volume: float):
+    """Approver for one application; same rules as required_approvers."""
+    if decision == "Declined":
+        return None
+    values = [float("inf") if pd.isna(v) else float(v) for v in (sites, spend, volume)]
+    rank = max(_rank(matrix[dimension], value) for dimension, value in zip(MATRIX_COLUMNS, values))
+    if rank == len(matrix["roles"]) - 1 or decision != "Approved":
+        return matrix["roles"][rank]
+    return "Auto-Approved"
+
+
+# -----------------------------------------
+# Function: required_approvers
+# Purpose: Approver per application from decision and matrix role.
+# Inputs:
+#   - matrix (dict): From compile_approval_matrix
+#   - decision (array): "Approved", "Referral" or "Declined" per row
+#   - sites, spend, volume (array): Application values per row
+# Returns:
+#   - np.ndarray: None for declines; the most senior role whenever the matrix
+#     says so; "Auto-Approved" for other approvals; otherwise the matrix role
+# Notes:
+#   - Missing values are treated as above every range (most senior role)
+# -----------------------------------------
+def required_approvers(matrix: dict, decision, sites, spend, volume) -> np.ndarray:
+    """Vectorised approver assignment for a batch of decisions."""
+
+    decision = np.asarray(decision)
+    ranks = np.maximum.reduce([
+        _ranks(matrix["sites"], np.nan_to_num(np.asarray(sites, dtype=float), nan=np.inf)),
+        _ranks(matrix["spend"], np.nan_to_num(np.asarray(spend, dtype=float), nan=np.inf)),
+        _ranks(matrix["volume"], np.nan_to_num(np.asarray(volume, dtype=float), nan=np.inf)),
+    ])
+    roles = np.asarray(matrix["roles"], dtype=object)[ranks]
+    top = len(matrix["roles"]) - 1
+
+    return np.select(
+        [decision == "Declined", ranks == top, decision == "Approved"],
+        [None, roles, "Auto-Approved"],
+        default=roles,
+    )
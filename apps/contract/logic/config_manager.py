@@ -0,0 +1,93 @@
+# -----------------------------------------
+# File: config_manager.py
+# Purpose: Hot-reload config workbooks without re-parsing on every rerun
+# Notes:
+#   - get() is a plain attribute read between checks; at most every
+#     check_interval seconds the file's mtime and size are compared
+#   - A changed stat triggers a content hash; only a changed hash re-parses
+#   - The parsed value is swapped in one assignment, so readers see either
+#     the old or the new rule set, never a mix
+#   - Managers live at module level, so every Streamlit session shares them
+#   - A failed re-parse keeps the last good value and records last_error;
+#     a failed stat or read is only reported until the file is readable again
+# -----------------------------------------
+
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+
+class HotConfig:
+    """A parsed config file that reloads itself when the file content changes."""
+
+    def __init__(self, path, parser, check_interval: float = 2.0):
+        self.path = Path(path)
+        self.parser = parser
+        self.check_interval = check_interval
+        self.version = 0
+        self.loaded_at = None
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._snapshot = None  # (stat key, content hash, parsed value, parse error)
+        self._checked_at = 0.0
+
+    def get(self):
+        """Current parsed value, reloading first if the file has changed."""
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return snapshot[2]
+        with self._lock:
+            self._refresh()
+            return self._snapshot[2]
+
+    def _refresh(self):
+        self._checked_at = time.monotonic()
+        snapshot = self._snapshot
+
+        try:
+            stat = os.stat(self.path)
+            stat_key = (stat.st_mtime_ns, stat.st_size)
+            if snapshot is not None and snapshot[0] == stat_key:
+                self.last_error = snapshot[3]  # Readable again; only a parse failure of this version stands
+                return
+            digest = hashlib.sha1(self.path.read_bytes()).hexdigest()
+        except OSError as e:
+            if snapshot is None:
+                raise
+            self.last_error = f"{type(e).__name__}: {e}"  # e.g. mid-save; keep serving the last good value
+            return
+        self.last_error = None
+
+        if snapshot is not None and snapshot[1] == digest:
+            self._snapshot = (stat_key, digest, snapshot[2], snapshot[3])  # Touched but unchanged
+            self.last_error = snapshot[3]
+            return
+
+        try:
+            value = self.parser(self.path)
+        except Exception as e:
+            if snapshot is None:
+                raise
+            self.last_error = f"{type(e).__name__}: {e}"
+            self._snapshot = (stat_key, digest, snapshot[2], self.last_error)  # Don't retry until the file changes again
+            return
+
+        self._snapshot = (stat_key, digest, value, None)
+        self.version += 1
+        self.loaded_at = datetime.now()
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def watched_config(path, parser, check_interval: float = 2.0) -> HotConfig:
+    """Process-wide HotConfig for a file and parser (pass a module-level function)."""
+    key = (str(Path(path).resolve()), parser.__module__, parser.__qualname__)
+    with _managers_lock:
+        if key not in _managers:
+            _managers[key] = HotConfig(path, parser, check_interval)
+        return _managers[key]
@@ -0,0 +1,218 @@
+# -----------------------------------------
+# File: credit_engine.py
+# Purpose: Vectorised credit decision rules for single and bulk applications
+# Notes:
+#   - Same rules and reasons as the original run_decision, evaluated as
+#     boolean masks over a frame of applications
+#   - Approvers come from the ApprovalMatrix sheet (see approval_matrix.py),
+#     using Contract Value as the spend dimension
+#   - Column names match the inputs summary in credit.py
+#   - Declines short-circuit: a declined row carries only decline reasons
+# -----------------------------------------
+
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from logic.approval_matrix import compile_approval_matrix, required_approvers
+
+APPLICATION_COLUMNS = [
+    "Business Type",
+    "Number of Sites",
+    "Annual Volume",
+    "Contract Value",
+    "Contract Term",
+    "Unit Margin",
+    "Broker Uplift Standing",
+    "Broker Uplift Unit Rate",
+    "SIC Code",
+    "SIC Risk",
+    "Credit Score",
+    "Years Trading",
+    "CCJs",
+    "Payment Terms",
+]
+
+# Columns every bulk file must carry; the rest default as in the single form
+REQUIRED_COLUMNS = [
+    "Business Type",
+    "Contract Value",
+    "Unit Margin",
+    "Broker Uplift Standing",
+    "Broker Uplift Unit Rate",
+    "Credit Score",
+    "Years Trading",
+    "CCJs",
+    "Payment Terms",
+]
+
+NUMERIC_COLUMNS = [
+    "Number of Sites",
+    "Annual Volume",
+    "Contract Value",
+    "Contract Term",
+    "Unit Margin",
+    "Broker Uplift Standing",
+    "Broker Uplift Unit Rate",
+    "Credit Score",
+    "Years Trading",
+]
+
+DEFAULTS = {
+    "Number of Sites": 1,
+    "Annual Volume": 0.0,
+    "Contract Term": 1,
+    "SIC Code": "",
+    "SIC Risk": "Medium",
+}
+
+REASON_SEPARATOR = "; "
+
+
+# -----------------------------------------
+# Function: load_credit_rules
+# Purpose: Parse the credit decision config workbook into a rule set.
+# Inputs:
+#   - path (str | Path): Workbook with CreditCriteria and ApprovalMatrix sheets
+# Returns:
+#   - dict: "config" (parameter -> {min, max}), "approval_df" (parsed sheet)
+#     and "matrix" (compiled approval matrix)
+# -----------------------------------------
+def load_credit_rules(path) -> dict:
+    """Read both config sheets in one pass and compile the approval matrix."""
+
+    sheets = pd.read_excel(path, sheet_name=['CreditCriteria', 'ApprovalMatrix'])
+    config_df = sheets['CreditCriteria']
+    approval_df = sheets['ApprovalMatrix']
+
+    config = {
+        row['Parameter']: {
+            'min': float(row['Min Value']),
+            'max': float(row['Max Value'])
+        }
+        for _, row in config_df.iterrows()
+    }
+
+    numeric_columns = [
+        'Min sites', 'Max Sites',
+        'Min Annual Spend', 'Max Annual Spend',
+        'Min Annual Volume (kWh)', 'Max Annual Volume (kWh)'
+    ]
+
+    for col in numeric_columns:
+        approval_df[col] = (
+            approval_df[col]
+            .astype(str)
+            .str.replace('[^\\d.]', '', regex=True)
+            .astype(float)
+        )
+
+    return {"config": config, "approval_df": approval_df, "matrix": compile_approval_matrix(approval_df)}
+
+
+def read_applications(file_bytes: bytes, file_name: str) -> pd.DataFrame:
+    """Load a CSV or XLSX file of applications."""
+    suffix = Path(file_name).suffix.lower()
+    if suffix == ".csv":
+        return pd.read_csv(BytesIO(file_bytes))
+    if suffix in (".xlsx", ".xls"):
+        return pd.read_excel(BytesIO(file_bytes))
+    raise ValueError(f"Unsupported applications file type: {suffix or file_name}")
+
+
+def prepare_applications(applications: pd.DataFrame) -> pd.DataFrame:
+    """Check required columns, fill optional ones and type the numeric fields."""
+
+    df = applications.copy()
+    df.columns = [str(col).strip() for col in df.columns]
+
+    missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns in applications file: {', '.join(missing)}")
+
+    for col, default in DEFAULTS.items():
+        if col not in df.columns:
+            df[col] = default
+        else:
+            df[col] = df[col].fillna(default)
+
+    for col in NUMERIC_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    for col in ["Business Type", "SIC Risk", "CCJs", "Payment Terms"]:
+        df[col] = df[col].fillna("").astype(str).str.strip()
+
+    return df
+
+
+# -----------------------------------------
+# Function: decide_applications
+# Purpose: Run every decline and referral rule over a frame of applications.
+# Inputs:
+#   - applications (pd.DataFrame): One row per application (APPLICATION_COLUMNS)
+#   - config (dict): CreditCriteria parameters as loaded by load_config
+#   - matrix (dict): Compiled ApprovalMatrix from compile_approval_matrix
+# Returns:
+#   - pd.DataFrame: The applications plus Decision, Required Approver and
+#     Reasons ("; "-separated)
+# Notes:
+#   - Rows with a blank or non-numeric value in a rule input are referred
+#     rather than silently approved
+#   - Raises ValueError if a required column is missing
+# -----------------------------------------
+def decide_applications(applications: pd.DataFrame, config: dict, matrix: dict) -> pd.DataFrame:
+    """Return per-row decisions, approvers and reasons for a batch of applications."""
+
+    df = prepare_applications(applications)
+    score = df["Credit Score"]
+    years = df["Years Trading"]
+    business_type = df["Business Type"]
+
+    declines = [
+        ("Declined: Credit Score below referral threshold", score < config['refer_threshold']['min']),
+        ("Declined: CCJs or Defaults present", df["CCJs"].str.lower() == "yes"),
+    ]
+    declined = np.logical_or.reduce([mask.to_numpy() for _, mask in declines])
+
+    rule_inputs = [col for col in REQUIRED_COLUMNS if col in NUMERIC_COLUMNS]
+    referrals = [
+        ("Referral: Missing or invalid application data", df[rule_inputs].isna().any(axis=1)),
+        ("Referral: Credit Score between thresholds",
+         (score >= config['refer_threshold']['min']) & (score < config['approve_threshold']['min'])),
+        ("Referral: Insufficient trading history",
+         (business_type.isin(["Sole Trader", "Partnership"]) & (years < 1)) |
+         ((business_type == "Limited Company") & (years < 2))),
+        ("Referral: SIC Risk is High/Very High", df["SIC Risk"].isin(["High", "Very High"])),
+        ("Referral: Payment terms - BACS selected", df["Payment Terms"] != "Direct Debit"),
+        ("Referral: Unit Margin below minimum", df["Unit Margin"] < config['minimum_unit_margin_ppkwh']['min']),
+        ("Referral: Standing charge uplift exceeds maximum",
+         df["Broker Uplift Standing"] > config['max_broker_uplift_standing']['max']),
+        ("Referral: Unit rate uplift exceeds maximum",
+         df["Broker Uplift Unit Rate"] > config['max_broker_uplift_unit_rate']['max']),
+    ]
+    referred = np.zeros(len(df), dtype=bool)
+
+    # Build the reason text one rule at a time across all rows
+    reasons = pd.Series("", index=df.index, dtype=object)
+    for label, mask in declines:
+        reasons = reasons + np.where(mask.to_numpy(), label + REASON_SEPARATOR, "")
+    for label, mask in referrals:
+        hit = mask.to_numpy() & ~declined
+        referred |= hit
+        reasons = reasons + np.where(hit, label + REASON_SEPARATOR, "")
+
+    decision = np.select([declined, referred], ["Declined", "Referral"], default="Approved")
+
+    result = applications.copy()
+    result["Decision"] = decision
+    result["Required Approver"] = required_approvers(
+        matrix, decision, df["Number of Sites"], df["Contract Value"], df["Annual Volume"]
+    )
+    result["Reasons"] = reasons.str.removesuffix(REASON_SEPARATOR).to_numpy()
+    return result
+
+
+def reason_list(reasons: str) -> list:
+    """Split a Reasons cell back into the list shown on screen and in the PDF."""
+    return [reason for reason in str(reasons).split(REASON_SEPARATOR) if reason]
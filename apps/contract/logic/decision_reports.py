@@ -0,0 +1,155 @@
+# -----------------------------------------
+# File: decision_reports.py
+# Purpose: Credit decision PDF reports, single or in parallel batches
+# Notes:
+#   - The logo PNG is decoded once per process and pre-loaded into each
+#     document's image table, so FPDF never re-reads it per page or report
+#   - Each process keeps a prepared template (logo plus title on page 1);
+#     reports start from a copy of it and only write their own content
+#   - Batches render across a process pool and come back as one zip
+#   - Relies on PyFPDF 1.7's images dict and output(dest='S') returning
+#     str, hence fpdf==1.7.2 in requirements.txt (fpdf2 changes both)
+# -----------------------------------------
+
+import copy
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from io import BytesIO
+from pathlib import Path
+
+from fpdf import FPDF
+
+LOGO_PATH = str(Path(__file__).resolve().parents[3] / "shared" / "DYCE-DARK BG.png")
+
+# Below this many reports a pool costs more to start than it saves
+PARALLEL_THRESHOLD = 20
+
+_logo_info = {}   # Decoded logo per path, per process
+_templates = {}   # Prepared first page per logo path, per process
+
+
+def _decoded_logo(logo_path: str) -> dict:
+    if logo_path not in _logo_info:
+        # Let FPDF parse the PNG through image() on a scratch document and keep its image entry
+        scratch = FPDF()
+        scratch.add_page()
+        scratch.image(logo_path, x=0, y=0, w=1)
+        _logo_info[logo_path] = dict(scratch.images[logo_path])
+    return _logo_info[logo_path]
+
+
+class PDF(FPDF):
+    def __init__(self, logo_path: str = LOGO_PATH):
+        super().__init__()
+        self.logo_path = logo_path
+        # FPDF deletes image data once written, so every document gets its own copy of the entry
+        self.images[logo_path] = dict(_decoded_logo(logo_path), i=1)
+        if "smask" in self.images[logo_path]:
+            self.pdf_version = "1.4"  # Alpha channel, as FPDF sets when it parses the PNG itself
+
+    def header(self):
+        self.image(self.logo_path, x=10, y=8, w=50)
+        self.ln(35)
+
+    def footer(self):
+        self.set_y(-15)
+        self.set_font('Arial', 'I', 8)
+        self.set_text_color(15, 42, 52)
+        self.cell(0, 10, f'Report generated on {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}', 0, 0, 'C')
+
+
+def _template(logo_path: str) -> PDF:
+    if logo_path not in _templates:
+        pdf = PDF(logo_path)
+        pdf.add_page()
+        pdf.set_font('Arial', 'B', 14)
+        pdf.set_text_color(15, 42, 52)
+        pdf.cell(0, 10, 'Dyce Credit Decision Report', ln=True, align='C')
+        pdf.ln(10)
+        _templates[logo_path] = pdf
+    return _templates[logo_path]
+
+
+# -----------------------------------------
+# Function: render_report
+# Purpose: Render one decision report to PDF bytes.
+# Inputs:
+#   - inputs (dict): Label -> value for the inputs summary
+#   - decision (str), approver (str | None), reasons (list[str]), timestamp (str)
+#   - logo_path (str, optional): Header logo (PNG)
+# Returns:
+#   - bytes: The PDF document
+# -----------------------------------------
+def render_report(inputs: dict, decision: str, approver, reasons: list, timestamp: str,
+                  logo_path: str = LOGO_PATH) -> bytes:
+    """Render a decision report starting from the prepared template."""
+
+    pdf = copy.deepcopy(_template(logo_path))
+
+    pdf.set_font('Arial', 'B', 12)
+    pdf.cell(0, 10, 'Inputs Summary:', ln=True)
+    pdf.set_font('Arial', '', 12)
+    for k, v in inputs.items():
+        pdf.multi_cell(0, 10, f"{k}: {v}")
+
+    pdf.ln(5)
+    pdf.set_font('Arial', 'B', 12)
+    pdf.cell(0, 10, 'Decision:', ln=True)
+    pdf.set_font('Arial', '', 12)
+    pdf.multi_cell(0, 10, f"Decision: {decision}\nApprover Required: {approver if approver else 'N/A'}\nTimestamp: {timestamp}")
+
+    pdf.ln(5)
+    pdf.set_font('Arial', 'B', 12)
+    pdf.cell(0, 10, 'Reasons / Stipulations:', ln=True)
+    pdf.set_font('Arial', '', 12)
+    for reason in reasons:
+        pdf.multi_cell(0, 10, f"- {reason}")
+
+    return pdf.output(dest='S').encode('latin1')
+
+
+def export_to_pdf(inputs, decision, approver, reasons, timestamp):
+    return BytesIO(render_report(inputs, decision, approver, reasons, timestamp))
+
+
+def _render_job(job: dict) -> bytes:
+    return render_report(job["inputs"], job["decision"], job["approver"], job["reasons"], job["timestamp"],
+                         job.get("logo_path", LOGO_PATH))
+
+
+def report_file_name(position: int, label=None) -> str:
+    """e.g. 0007_Acme_Ltd.pdf; the position keeps names unique and sorted."""
+    name = f"{position:04d}"
+    if label:
+        name += "_" + re.sub(r"[^\w.\-]+", "_", str(label)).strip("_")[:60]
+    return name + ".pdf"
+
+
+# -----------------------------------------
+# Function: render_reports_zip
+# Purpose: Render many decision reports and bundle them into one zip.
+# Inputs:
+#   - jobs (list[dict]): inputs, decision, approver, reasons, timestamp and
+#     optionally file_name per report
+#   - max_workers (int, optional): Process pool size
+# Returns:
+#   - bytes: Zip archive of the PDFs
+# Notes:
+#   - Small batches render in-process
+# -----------------------------------------
+def render_reports_zip(jobs: list, max_workers: int = None) -> bytes:
+    """Render decision reports in parallel and return them zipped."""
+
+    if len(jobs) < PARALLEL_THRESHOLD:
+        pdfs = [_render_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            pdfs = list(pool.map(_render_job, jobs, chunksize=max(1, len(jobs) // 64)))
+
+    output = BytesIO()
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as bundle:
+        for position, (job, pdf_bytes) in enumerate(zip(jobs, pdfs), start=1):
+            bundle.writestr(job.get("file_name") or report_file_name(position), pdf_bytes)
+    return output.getvalue()
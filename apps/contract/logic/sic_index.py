@@ -0,0 +1,187 @@
+# -----------------------------------------
+# File: sic_index.py
+# Purpose: Compiled SIC code index with hierarchical risk fallback
+# Notes:
+#   - Codes are normalised to 5-digit strings; numbers get their leading
+#     zeros back (1110 -> "01110") and dots are dropped ("86.90" -> "8690")
+#   - A typed 4-digit code is looked up as typed and zero-padded ("1110"
+#     finds 01110, listed as the number 1110); only when neither is listed
+#     is it treated as a SIC class ("4719") and resolved at class level
+#   - A code not in the list falls back to its 4-digit class, 3-digit
+#     group, 2-digit division and finally its SIC 2007 section
+#   - Fallback risk is the most common rating under that prefix; ties go
+#     to the higher risk
+#   - The index is cached as gzipped JSON next to the source workbook and
+#     rebuilt when the workbook changes
+# -----------------------------------------
+
+import gzip
+import hashlib
+import json
+from pathlib import Path
+
+import pandas as pd
+
+RISK_ORDER = ["Low", "Medium", "High", "Very High"]
+FALLBACK_LEVELS = [("class", 4), ("group", 3), ("division", 2)]
+
+# SIC 2007 sections by division range (inclusive)
+SECTION_RANGES = [
+    ("A", 1, 3), ("B", 5, 9), ("C", 10, 33), ("D", 35, 35), ("E", 36, 39),
+    ("F", 41, 43), ("G", 45, 47), ("H", 49, 53), ("I", 55, 56), ("J", 58, 63),
+    ("K", 64, 66), ("L", 68, 68), ("M", 69, 75), ("N", 77, 82), ("O", 84, 84),
+    ("P", 85, 85), ("Q", 86, 88), ("R", 90, 93), ("S", 94, 96), ("T", 97, 98),
+    ("U", 99, 99),
+]
+DIVISION_SECTIONS = {f"{d:02d}": section for section, lo, hi in SECTION_RANGES for d in range(lo, hi + 1)}
+
+INDEX_VERSION = 2
+
+
+def normalise_sic_codes(codes: pd.Series) -> pd.Series:
+    """Vectorised normalisation to 5-digit codes (4 for classes); blanks and non-numeric codes become ''."""
+    is_text = codes.map(lambda value: isinstance(value, str))
+    text = codes.astype(str).str.strip()
+
+    # Typed codes: "86.90" -> "8690"; numbers: drop the ".0" Excel adds to floats
+    text = text.where(~is_text, text.str.replace(r"[.\s]", "", regex=True))
+    text = text.where(is_text, text.str.replace(r"\.0$", "", regex=True))
+    valid = text.str.fullmatch(r"\d{1,5}") & codes.notna()
+
+    # Numbers lose leading zeros, so always pad them; typed 4-digit codes are classes
+    padded = text.str.zfill(5).where(~is_text | (text.str.len() != 4), text)
+    return padded.where(valid, "")
+
+
+def normalise_sic(code) -> str:
+    """Normalised string for one SIC code, or '' if it is not a code."""
+    return normalise_sic_codes(pd.Series([code], dtype=object)).iloc[0]
+
+
+def _aggregate_risk(keys: pd.Series, risks: pd.Series) -> dict:
+    """Most common rating per key, ties resolved to the higher risk."""
+    counts = pd.DataFrame({"key": keys, "risk": risks}).value_counts().reset_index(name="count")
+    counts["severity"] = counts["risk"].map({r: i for i, r in enumerate(RISK_ORDER)}).fillna(-1)
+    counts = counts.sort_values(["key", "count", "severity"], ascending=[True, False, False])
+    return counts.drop_duplicates("key").set_index("key")["risk"].to_dict()
+
+
+# -----------------------------------------
+# Function: build_sic_index
+# Purpose: Compile the SIC list into lookup dictionaries.
+# Inputs:
+#   - sic_df (pd.DataFrame): SIC_Code, Sector, SIC_Description, Typical_Risk_Rating
+# Returns:
+#   - dict: "codes" (code -> [description, risk]), one dict of
+#     prefix -> risk per fallback level, and "section" (letter -> [sector, risk])
+# -----------------------------------------
+def build_sic_index(sic_df: pd.DataFrame) -> dict:
+    """Return the compiled SIC index for O(1) lookups."""
+
+    df = sic_df.copy()
+    df["code"] = normalise_sic_codes(df["SIC_Code"])
+    df = df[df["code"] != ""].drop_duplicates("code")
+    risks = df["Typical_Risk_Rating"].astype(str).str.strip()
+
+    index = {
+        "version": INDEX_VERSION,
+        "codes": dict(zip(df["code"], zip(df["SIC_Description"].astype(str), risks))),
+    }
+    for level, width in FALLBACK_LEVELS:
+        index[level] = _aggregate_risk(df["code"].str[:width], risks)
+
+    sections = df["code"].str[:2].map(DIVISION_SECTIONS)
+    section_risk = _aggregate_risk(sections, risks)
+    sector = df.assign(section=sections).dropna(subset=["section"]).groupby("section")["Sector"].agg(
+        lambda s: s.mode().iloc[0] if not s.mode().empty else "")
+    index["section"] = {key: [str(sector.get(key, "")), risk] for key, risk in section_risk.items()}
+    return index
+
+
+def save_sic_index(index: dict, path) -> None:
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump(index, f, separators=(",", ":"))
+
+
+def load_sic_index(path) -> dict:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_or_build_sic_index(source_path, cache_path=None) -> dict:
+    """Load the cached index, rebuilding it when the source workbook has changed."""
+
+    source_path = Path(source_path)
+    cache_path = Path(cache_path) if cache_path else source_path.with_name("sic_index.json.gz")
+    source_hash = hashlib.sha1(source_path.read_bytes()).hexdigest()
+
+    if cache_path.exists():
+        try:
+            index = load_sic_index(cache_path)
+            if index.get("source_hash") == source_hash and index.get("version") == INDEX_VERSION:
+                return index
+        except (OSError, ValueError):
+            pass
+
+    index = build_sic_index(pd.read_excel(source_path))
+    index["source_hash"] = source_hash
+    try:
+        save_sic_index(index, cache_path)
+    except OSError:
+        pass  # Read-only deploys still get the in-memory index
+    return index
+
+
+def resolve_sic(index: dict, code) -> dict:
+    """Description, risk and match level for one code ('code', 'class', ..., 'section' or None)."""
+    return resolve_sic_codes(index, pd.Series([code], dtype=object)).iloc[0].to_dict()
+
+
+# -----------------------------------------
+# Function: resolve_sic_codes
+# Purpose: Bulk SIC resolution with hierarchical fallback.
+# Inputs:
+#   - index (dict): From build_sic_index / load_or_build_sic_index
+#   - codes (pd.Series): Raw SIC codes (ints, strings or blanks)
+# Returns:
+#   - pd.DataFrame: SIC_Code (normalised), SIC_Description, SIC_Risk and
+#     Match_Level, aligned to codes
+# Notes:
+#   - Exact matches (as typed, then zero-padded) win over every fallback
+#   - Unresolved codes have None risk and level, so callers can ask for a
+#     manual rating or apply their default
+# -----------------------------------------
+def resolve_sic_codes(index: dict, codes: pd.Series) -> pd.DataFrame:
+    """Resolve many SIC codes with one dictionary lookup per level."""
+
+    code = normalise_sic_codes(codes)
+    exact = code.map(index["codes"])
+
+    # A typed 4-digit code may be a listed 0xxxx code with its leading zero dropped
+    padded = code.where(code.str.len() != 4, code.str.zfill(5))
+    padded_hit = exact.isna() & padded.map(index["codes"]).notna()
+    code = code.mask(padded_hit, padded)
+    exact = exact.mask(padded_hit, code.map(index["codes"]))
+
+    description = exact.str[0]
+    risk = exact.str[1]
+    level = pd.Series(None, index=code.index, dtype=object).mask(exact.notna(), "code")
+
+    for name, width in FALLBACK_LEVELS:
+        fallback = code.str[:width].map(index[name])
+        hit = risk.isna() & fallback.notna()
+        risk = risk.mask(hit, fallback)
+        level = level.mask(hit, name)
+
+    section = code.str[:2].map(DIVISION_SECTIONS).map(index["section"])
+    hit = risk.isna() & section.notna()
+    risk = risk.mask(hit, section.str[1])
+    level = level.mask(hit, "section")
+    description = description.mask(description.isna() & section.notna(), section.str[0])
+
+    return pd.DataFrame({
+        "SIC_Code": code,
+        "SIC_Description": description.astype(object).where(description.notna(), None),
+        "SIC_Risk": risk.astype(object).where(risk.notna(), None),
+        "Match_Level": level.astype(object).where(level.notna(), None),
+    })
@@ -1,14 +1,22 @@
 import streamlit as st
 import pandas as pd
 import json
-import sqlite3
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.application import MIMEApplication
 from datetime import date, datetime
 import io
 import os
+import sys
+from logic.email_outbox import init_outbox, queue_contract_email, start_outbox_sender, email_configured, outbox_counts, MAX_ATTEMPTS
+from logic.contract_refs import init_reference_sequence, next_contract_reference
+from logic.contract_stats import init_contract_stats, get_contract_stats, recent_contracts
+from logic.contract_search import init_contract_search, search_contracts, SEARCH_FIELDS
+
+SHARED_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "shared"))
+if SHARED_DIR not in sys.path:
+    sys.path.append(SHARED_DIR)
+
+from sqlite_utils import get_connection, get_read_connection
+
+DB_PATH = 'contracts.db'
 
 # Page configuration
 st.set_page_config(
@@ -20,7 +28,7 @@ st.set_page_config(
 
 # Database setup
 def init_database():
-    conn = sqlite3.connect('contracts.db', check_same_thread=False)
+    conn = get_connection(DB_PATH)
     cursor = conn.cursor()
     
     cursor.execute('''
@@ -44,78 +52,18 @@ def init_database():
     ''')
     
     conn.commit()
-    return conn
-
-# Email function
-def send_contract_email(contract_data, contract_ref):
-    try:
-        smtp_server = os.getenv('EMAIL_HOST', 'smtp.gmail.com')
-        smtp_port = int(os.getenv('EMAIL_PORT', '587'))
-        email_user = os.getenv('EMAIL_USER')
-        email_pass = os.getenv('EMAIL_PASS')
-        office_email = os.getenv('OFFICE_EMAIL')
-        
-        if not all([email_user, email_pass, office_email]):
-            st.warning("Email configuration not complete. Contract saved locally.")
-            return False
-        
-        msg = MIMEMultipart()
-        msg['From'] = email_user
-        msg['To'] = office_email
-        msg['Subject'] = f"New Energy Contract - {contract_ref}"
-        
-        body = f"""
-New Energy Contract Submission
-============================
-
-Contract Reference: {contract_ref}
-Submission Time: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
-
-TPI Details:
-- Business: {contract_data.get('tpi_business_name', 'N/A')}
-- Contact: {contract_data.get('tpi_first_name', '')} {contract_data.get('tpi_last_name', '')}
-- Email: {contract_data.get('tpi_contact_email', 'N/A')}
-
-Client Details:
-- Business: {contract_data.get('site_business_name', 'N/A')}
-- Contact: {contract_data.get('site_first_name', '')} {contract_data.get('site_last_name', '')}
-- Email: {contract_data.get('site_contact_email', 'N/A')}
-
-Contract Summary:
-- Gas Contract: {contract_data.get('gas_contract_length', 0)} months
-- Electricity Contract: {contract_data.get('elec_contract_length', 0)} months
-- Estimated Commission: £{contract_data.get('estimated_commission', 0):.2f}
-
-Full details attached.
-
-Best regards,
-Dyce Energy Contract System
-        """
-        
-        msg.attach(MIMEText(body, 'plain'))
-        
-        # Attach JSON
-        json_data = json.dumps(contract_data, indent=2, default=str)
-        json_attachment = MIMEApplication(json_data.encode('utf-8'), _subtype='json')
-        json_attachment.add_header('Content-Disposition', f'attachment; filename={contract_ref}.json')
-        msg.attach(json_attachment)
-        
-        server = smtplib.SMTP(smtp_server, smtp_port)
-        server.starttls()
-        server.login(email_user, email_pass)
-        server.send_message(msg)
-        server.quit()
-        
-        return True
-        
-    except Exception as e:
-        st.error(f"Email failed: {str(e)}")
-        return False
+    init_outbox(conn)
+    init_reference_sequence(conn)
+    init_contract_stats(conn)
+    init_contract_search(conn)
 
-# Save to database
-def save_contract_to_db(conn, contract_data, contract_ref):
+# Save to database; returns the allocated contract reference, or None on failure
+def save_contract_to_db(conn, contract_data):
     cursor = conn.cursor()
     try:
+        # Reference comes from the per-day sequence inside this transaction, so it is unique and gap-free
+        contract_ref = next_contract_reference(cursor)
+        contract_data['contract_reference'] = contract_ref
         cursor.execute('''
             INSERT INTO contracts (
                 contract_reference, submission_timestamp, tpi_business_name, 
@@ -131,11 +79,14 @@ def save_contract_to_db(conn, contract_data, contract_ref):
             contract_data.get('gas_contract_length'), contract_data.get('elec_contract_length'),
             contract_data.get('estimated_commission'), json.dumps(contract_data, default=str)
         ))
+        # Office email is queued in the same transaction and sent in the background
+        queue_contract_email(cursor, contract_data, contract_ref)
         conn.commit()
-        return True
+        return contract_ref
     except Exception as e:
+        conn.rollback()
         st.error(f"Database error: {str(e)}")
-        return False
+        return None
 
 # Custom CSS
 st.markdown("""
@@ -211,9 +162,10 @@ st.markdown("""
 
 # Initialize database
 if 'db_initialized' not in st.session_state:
-    conn = init_database()
+    init_database()
     st.session_state.db_initialized = True
-    st.session_state.db_connection = conn
+
+email_sender = start_outbox_sender(DB_PATH)
 
 def main():
     # Header with Logo
@@ -607,16 +559,16 @@ def main():
                     
                     # Metadata
                     'submission_timestamp': datetime.now().isoformat(),
-                    'contract_reference': f"CA-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+                    'contract_reference': None  # Allocated when saved
                 }
                 
-                contract_ref = form_data['contract_reference']
-                
                 # Save to database
-                conn = st.session_state.db_connection
-                if save_contract_to_db(conn, form_data, contract_ref):
-                    # Try to send email
-                    email_sent = send_contract_email(form_data, contract_ref)
+                conn = get_connection(DB_PATH)
+                contract_ref = save_contract_to_db(conn, form_data)
+                if contract_ref:
+                    # Email goes out from the outbox; don't wait for the mail server
+                    email_queued = email_configured()
+                    email_sender.wake()
                     
                     # Display success message
                     st.success("✅ Contract submitted successfully!")
@@ -627,7 +579,7 @@ def main():
                         <p><strong>Contract Reference:</strong> {contract_ref}</p>
                         <p><strong>Submission Time:</strong> {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}</p>
                         <p><strong>Estimated TPI Commission:</strong> £{estimated_commission:.2f}</p>
-                        <p><strong>Email Status:</strong> {"✅ Sent to office" if email_sent else "⚠️ Saved locally (email config needed)"}</p>
+                        <p><strong>Email Status:</strong> {"📨 Queued for the office" if email_queued else "⚠️ Saved locally (email config needed)"}</p>
                     </div>
                     """, unsafe_allow_html=True)
                     
@@ -691,32 +643,56 @@ def main():
     if st.sidebar.button("📊 Admin Dashboard"):
         st.sidebar.markdown("---")
         
-        conn = st.session_state.db_connection
-        cursor = conn.cursor()
-        
-        # Get stats
-        cursor.execute("SELECT COUNT(*) FROM contracts")
-        total_contracts = cursor.fetchone()[0]
+        conn = get_read_connection(DB_PATH)
         
-        cursor.execute("SELECT SUM(estimated_commission) FROM contracts WHERE estimated_commission IS NOT NULL")
-        total_commission = cursor.fetchone()[0] or 0
+        # Get stats (maintained by triggers, so no full-table aggregate)
+        total_contracts, total_commission = get_contract_stats(conn)
         
         st.sidebar.metric("Total Contracts", total_contracts)
         st.sidebar.metric("Total Commission", f"£{total_commission:,.2f}")
+
+        # Office emails still waiting in the outbox
+        emails = outbox_counts(conn)
+        st.sidebar.metric("Emails Queued", emails.get('pending', 0) + emails.get('sending', 0))
+        if emails.get('failed'):
+            st.sidebar.warning(f"{emails['failed']} contract email(s) failed after {MAX_ATTEMPTS} attempts.")
         
         # Recent submissions
         st.sidebar.markdown("**Recent Submissions:**")
-        cursor.execute("""
-            SELECT contract_reference, tpi_business_name, estimated_commission, 
-                   DATE(created_at) as submission_date
-            FROM contracts 
-            ORDER BY created_at DESC 
-            LIMIT 5
-        """)
-        
-        recent = cursor.fetchall()
+        recent = recent_contracts(conn)
         for row in recent:
-            st.sidebar.text(f"{row[0][:8]}... - £{row[2] or 0:.0f}")
+            st.sidebar.text(f"{row[0]} - £{row[2] or 0:.0f}")
+
+    # Contract search (indexed; pages newest-first)
+    with st.sidebar.expander("🔎 Find a Contract"):
+        search_field = st.selectbox(
+            "Search by", list(SEARCH_FIELDS), format_func=lambda f: SEARCH_FIELDS[f][0], key="search_field"
+        )
+        search_value = st.text_input("Value", key="search_value")
+
+        # Keyset cursor per query: list of before_ids, one per page visited
+        query = (search_field, search_value)
+        if st.session_state.get('search_query') != query:
+            st.session_state.search_query = query
+            st.session_state.search_pages = [None]
+
+        if search_value:
+            rows, next_before_id = search_contracts(
+                get_read_connection(DB_PATH), search_field, search_value,
+                before_id=st.session_state.search_pages[-1]
+            )
+            if rows:
+                st.dataframe(pd.DataFrame(rows).drop(columns=['id']), hide_index=True)
+            else:
+                st.info("No matching contracts.")
+
+            col_prev, col_next = st.columns(2)
+            if col_prev.button("◀ Newer", disabled=len(st.session_state.search_pages) == 1):
+                st.session_state.search_pages.pop()
+                st.rerun()
+            if col_next.button("Older ▶", disabled=next_before_id is None):
+                st.session_state.search_pages.append(next_before_id)
+                st.rerun()
 
 if __name__ == "__main__":
     main()
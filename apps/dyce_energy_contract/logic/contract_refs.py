@@ -0,0 +1,42 @@
+# -----------------------------------------
+# File: contract_refs.py
+# Purpose: Unique, sortable contract references from a per-day sequence
+# Notes:
+#   - Format: CA-YYYYMMDD-000123 (sequence restarts each day)
+#   - The counter is bumped with one INSERT ... ON CONFLICT DO UPDATE ...
+#     RETURNING statement, which SQLite runs under the database write lock,
+#     so concurrent sessions and processes can never get the same number
+#   - Call it inside the transaction that inserts the contract: a rollback
+#     also returns the number, so references stay gap-free
+# -----------------------------------------
+
+from datetime import datetime
+
+REFERENCE_PREFIX = "CA"
+
+SEQUENCE_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS contract_sequences (
+        day TEXT PRIMARY KEY,
+        last_value INTEGER NOT NULL
+    )
+'''
+
+
+def init_reference_sequence(conn):
+    conn.execute(SEQUENCE_SCHEMA)
+    conn.commit()
+
+
+def next_contract_reference(cursor, when: datetime = None) -> str:
+    """Allocate the next reference for the day of `when` (default: now)."""
+    day = (when or datetime.now()).strftime('%Y%m%d')
+    value = cursor.execute(
+        """
+        INSERT INTO contract_sequences (day, last_value) VALUES (?, 1)
+        ON CONFLICT(day) DO UPDATE SET last_value = last_value + 1
+        RETURNING last_value
+        """,
+        (day,)
+    ).fetchone()[0]
+    return f"{REFERENCE_PREFIX}-{day}-{value:06d}"
+
@@ -0,0 +1,102 @@
+# -----------------------------------------
+# File: contract_search.py
+# Purpose: Indexed lookups over the JSON contract payload
+# Notes:
+#   - MPAN, gas meter reference and site postcode live only in form_data;
+#     each gets a JSON1 expression index on its normalised value, so a
+#     lookup is an index seek instead of parsing every row
+#   - Queries must use the exact SEARCH_FIELDS expression for SQLite to
+#     pick the index; values are normalised the same way in Python, i.e.
+#     only ' ' is removed and case folding is ASCII-only, like SQLite's
+#     REPLACE/UPPER/LOWER (tabs and accented letters are left alone)
+#   - TPI search is a case-insensitive prefix match on tpi_business_name
+#   - Results page newest-first by id (keyset), so page N costs the same
+#     as page 1
+# -----------------------------------------
+
+import string
+
+PAGE_SIZE = 20
+
+# SQLite's UPPER/LOWER only fold ASCII letters
+_ASCII_UPPER = str.maketrans(string.ascii_lowercase, string.ascii_uppercase)
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+# field -> (label, SQL expression, Python normaliser)
+SEARCH_FIELDS = {
+    'mpan': (
+        "MPAN",
+        "REPLACE(json_extract(form_data, '$.elec_mpan'), ' ', '')",
+        lambda v: v.replace(' ', ''),
+    ),
+    'gas_meter_ref': (
+        "Gas Meter Ref",
+        "UPPER(REPLACE(json_extract(form_data, '$.gas_meter_ref'), ' ', ''))",
+        lambda v: v.replace(' ', '').translate(_ASCII_UPPER),
+    ),
+    'postcode': (
+        "Postcode",
+        "UPPER(REPLACE(json_extract(form_data, '$.post_code'), ' ', ''))",
+        lambda v: v.replace(' ', '').translate(_ASCII_UPPER),
+    ),
+    'tpi': (
+        "TPI Business",
+        "LOWER(tpi_business_name)",
+        lambda v: v.strip(' ').translate(_ASCII_LOWER),
+    ),
+}
+
+# Fields matched on a prefix rather than the whole value
+PREFIX_FIELDS = {'tpi'}
+
+RESULT_COLUMNS = [
+    'id', 'contract_reference', 'submission_date', 'tpi_business_name',
+    'site_business_name', 'post_code', 'elec_mpan', 'gas_meter_ref', 'estimated_commission'
+]
+
+
+def init_contract_search(conn):
+    """Create the search indexes (idempotent)."""
+    for field, (_, expression, _) in SEARCH_FIELDS.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_contracts_search_{field} ON contracts ({expression}, id)")
+    conn.commit()
+
+
+def search_contracts(conn, field: str, value: str, limit: int = PAGE_SIZE, before_id: int = None) -> tuple:
+    """
+    One page of contracts matching `value` on `field`, newest first.
+    Returns (rows as dicts, before_id for the next page or None).
+    """
+    if field not in SEARCH_FIELDS:
+        raise ValueError(f"Unknown search field: {field}")
+    _, expression, normalise = SEARCH_FIELDS[field]
+    value = normalise(value or '')
+    if not value:
+        return [], None
+
+    if field in PREFIX_FIELDS:
+        # Range on the indexed expression: 'abc' <= x < 'abc' + U+FFFF
+        clauses, params = [f"{expression} >= ?", f"{expression} < ?"], [value, value + '\uffff']
+    else:
+        clauses, params = [f"{expression} = ?"], [value]
+    if before_id is not None:
+        clauses.append("id < ?")
+        params.append(before_id)
+
+    rows = conn.execute(f"""
+        SELECT id, contract_reference, DATE(created_at) as submission_date,
+               tpi_business_name, site_business_name,
+               json_extract(form_data, '$.post_code'),
+               json_extract(form_data, '$.elec_mpan'),
+               json_extract(form_data, '$.gas_meter_ref'),
+               estimated_commission
+        FROM contracts
+        WHERE {' AND '.join(clauses)}
+        ORDER BY id DESC
+        LIMIT ?
+    """, (*params, limit + 1)).fetchall()
+
+    # One extra row tells us whether there is a next page
+    page = [dict(zip(RESULT_COLUMNS, row)) for row in rows[:limit]]
+    next_before_id = page[-1]['id'] if len(rows) > limit else None
+    return page, next_before_id
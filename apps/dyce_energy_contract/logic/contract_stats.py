@@ -0,0 +1,86 @@
+# -----------------------------------------
+# File: contract_stats.py
+# Purpose: O(1) contract totals for the admin sidebar
+# Notes:
+#   - contract_stats holds one row of running totals, kept current by
+#     triggers on contracts (insert, delete and commission updates)
+#   - The row is backfilled from the existing contracts in the same
+#     transaction that creates the triggers, so totals never drift
+#   - created_at is indexed for the recent-submissions list
+# -----------------------------------------
+
+STATS_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS contract_stats (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        total_contracts INTEGER NOT NULL,
+        total_commission REAL NOT NULL
+    )
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_contract_stats_insert AFTER INSERT ON contracts
+    BEGIN
+        UPDATE contract_stats
+        SET total_contracts = total_contracts + 1,
+            total_commission = total_commission + COALESCE(NEW.estimated_commission, 0)
+        WHERE id = 1;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_contract_stats_delete AFTER DELETE ON contracts
+    BEGIN
+        UPDATE contract_stats
+        SET total_contracts = total_contracts - 1,
+            total_commission = total_commission - COALESCE(OLD.estimated_commission, 0)
+        WHERE id = 1;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_contract_stats_update AFTER UPDATE OF estimated_commission ON contracts
+    BEGIN
+        UPDATE contract_stats
+        SET total_commission = total_commission
+            + COALESCE(NEW.estimated_commission, 0) - COALESCE(OLD.estimated_commission, 0)
+        WHERE id = 1;
+    END
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_contracts_created_at ON contracts (created_at)",
+]
+
+# One-off backfill when the summary row is first created
+STATS_BACKFILL = '''
+    INSERT INTO contract_stats (id, total_contracts, total_commission)
+    SELECT 1, COUNT(*), COALESCE(SUM(estimated_commission), 0) FROM contracts
+'''
+
+
+def init_contract_stats(conn):
+    """Create the summary table, triggers and index (idempotent)."""
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        for sql in STATS_SCHEMA:
+            cursor.execute(sql)
+        if cursor.execute("SELECT 1 FROM contract_stats WHERE id = 1").fetchone() is None:
+            cursor.execute(STATS_BACKFILL)
+        cursor.execute("COMMIT")
+    except Exception:
+        cursor.execute("ROLLBACK")
+        raise
+
+
+def get_contract_stats(conn) -> tuple:
+    """(total contracts, total commission) from the summary row."""
+    row = conn.execute("SELECT total_contracts, total_commission FROM contract_stats WHERE id = 1").fetchone()
+    return (row[0], row[1]) if row else (0, 0.0)
+
+
+def recent_contracts(conn, limit: int = 5) -> list:
+    """Latest submissions, read through the created_at index."""
+    return conn.execute("""
+        SELECT contract_reference, tpi_business_name, estimated_commission,
+               DATE(created_at) as submission_date
+        FROM contracts
+        ORDER BY created_at DESC
+        LIMIT ?
+    """, (limit,)).fetchall()
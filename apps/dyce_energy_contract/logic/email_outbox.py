@@ -0,0 +1,321 @@
+# -----------------------------------------
+# File: email_outbox.py
+# Purpose: Durable email outbox for contract submissions
+# Notes:
+#   - Submissions only insert a row into email_outbox (same transaction as
+#     the contract), so the submit handler never waits on the mail server
+#   - One background sender per process and database drains the outbox
+#     over a single authenticated SMTP connection, in batches
+#   - Failures are retried with exponential backoff; after MAX_ATTEMPTS the
+#     row is marked failed and kept for inspection
+#   - contracts.email_sent is set when the office copy is delivered
+#   - Unexpected errors are logged and the sender carries on; claimed rows
+#     that were not updated return to the queue after STALE_CLAIM_SECONDS
+#   - The sender uses its own sqlite_utils connection (WAL, busy timeout),
+#     so it never blocks or is blocked by the form's pooled connections
+#   - SMTP settings come from the environment; EMAIL_USER, EMAIL_PASS and
+#     OFFICE_EMAIL are required, e.g. for a local stand-in:
+#       EMAIL_HOST=localhost EMAIL_PORT=1025 EMAIL_USE_TLS=0 EMAIL_USER=forms EMAIL_PASS=secret OFFICE_EMAIL=office@example.com
+# -----------------------------------------
+
+import json
+import logging
+import os
+import smtplib
+import sys
+import threading
+import time
+from datetime import datetime
+from email import message_from_bytes
+from email.mime.application import MIMEApplication
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from pathlib import Path
+
+SHARED_DIR = str(Path(__file__).resolve().parents[3] / "shared")
+if SHARED_DIR not in sys.path:
+    sys.path.append(SHARED_DIR)
+
+from sqlite_utils import open_connection
+
+BATCH_SIZE = 20
+MAX_ATTEMPTS = 8
+BASE_BACKOFF_SECONDS = 30
+MAX_BACKOFF_SECONDS = 3600
+POLL_SECONDS = 5
+IDLE_DISCONNECT_SECONDS = 60
+STALE_CLAIM_SECONDS = 600
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS email_outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        contract_reference TEXT NOT NULL,
+        message BLOB NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at REAL NOT NULL,
+        claimed_at REAL,
+        last_error TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        sent_at TEXT
+    )
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_email_outbox_due ON email_outbox (status, next_attempt_at)",
+]
+
+
+def init_outbox(conn):
+    for sql in OUTBOX_SCHEMA:
+        conn.execute(sql)
+    conn.commit()
+
+
+def smtp_settings() -> dict:
+    """SMTP settings from the environment (read at send time, so edits apply without a restart)."""
+    user = os.getenv('EMAIL_USER')
+    return {
+        'host': os.getenv('EMAIL_HOST', 'smtp.gmail.com'),
+        'port': int(os.getenv('EMAIL_PORT', '587')),
+        'use_tls': os.getenv('EMAIL_USE_TLS', '1').lower() not in ('0', 'false', 'no'),
+        'user': user,
+        'password': os.getenv('EMAIL_PASS'),
+        'sender': os.getenv('EMAIL_FROM') or user,
+        'office': os.getenv('OFFICE_EMAIL'),
+    }
+
+
+def email_configured(settings: dict = None) -> bool:
+    settings = settings or smtp_settings()
+    return bool(settings['user'] and settings['password'] and settings['office'])
+
+
+def build_contract_email(contract_data, contract_ref) -> MIMEMultipart:
+    """Office notification for one contract; From/To are set when it is sent."""
+
+    msg = MIMEMultipart()
+    msg['Subject'] = f"New Energy Contract - {contract_ref}"
+
+    body = f"""
+New Energy Contract Submission
+============================
+
+Contract Reference: {contract_ref}
+Submission Time: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
+
+TPI Details:
+- Business: {contract_data.get('tpi_business_name', 'N/A')}
+- Contact: {contract_data.get('tpi_first_name', '')} {contract_data.get('tpi_last_name', '')}
+- Email: {contract_data.get('tpi_contact_email', 'N/A')}
+
+Client Details:
+- Business: {contract_data.get('site_business_name', 'N/A')}
+- Contact: {contract_data.get('site_first_name', '')} {contract_data.get('site_last_name', '')}
+- Email: {contract_data.get('site_contact_email', 'N/A')}
+
+Contract Summary:
+- Gas Contract: {contract_data.get('gas_contract_length', 0)} months
+- Electricity Contract: {contract_data.get('elec_contract_length', 0)} months
+- Estimated Commission: £{contract_data.get('estimated_commission', 0):.2f}
+
+Full details attached.
+
+Best regards,
+Dyce Energy Contract System
+    """
+
+    msg.attach(MIMEText(body, 'plain'))
+
+    # Attach JSON
+    json_data = json.dumps(contract_data, indent=2, default=str)
+    json_attachment = MIMEApplication(json_data.encode('utf-8'), _subtype='json')
+    json_attachment.add_header('Content-Disposition', f'attachment; filename={contract_ref}.json')
+    msg.attach(json_attachment)
+
+    return msg
+
+
+def queue_contract_email(cursor, contract_data, contract_ref):
+    """Add the office email to the outbox; the caller commits with the contract insert."""
+    cursor.execute(
+        "INSERT INTO email_outbox (contract_reference, message, next_attempt_at) VALUES (?, ?, ?)",
+        (contract_ref, build_contract_email(contract_data, contract_ref).as_bytes(), time.time())
+    )
+
+
+def backoff_seconds(attempts: int) -> float:
+    return min(BASE_BACKOFF_SECONDS * 2 ** max(attempts - 1, 0), MAX_BACKOFF_SECONDS)
+
+
+class OutboxSender(threading.Thread):
+    """Background thread that drains email_outbox over one reusable SMTP connection."""
+
+    def __init__(self, db_path, settings_loader=smtp_settings, batch_size: int = BATCH_SIZE,
+                 poll_seconds: float = POLL_SECONDS):
+        super().__init__(name="email-outbox", daemon=True)
+        self.db_path = db_path
+        self.settings_loader = settings_loader
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._smtp = None
+        self._smtp_key = None
+        self._last_used = 0.0
+
+    # --- Lifecycle ---
+    def wake(self):
+        """Deliver now instead of waiting for the next poll."""
+        self._wake.set()
+
+    def stop(self, timeout: float = None):
+        self._stopping.set()
+        self._wake.set()
+        self.join(timeout)
+
+    def run(self):
+        conn = open_connection(self.db_path)
+        try:
+            init_outbox(conn)
+            while not self._stopping.is_set():
+                try:
+                    delivered = self.deliver_due(conn)
+                except Exception:
+                    # Keep the sender alive; the next poll retries
+                    logger.exception("Email outbox delivery failed")
+                    self._disconnect()
+                    delivered = 0
+                if delivered:
+                    continue
+                if self._smtp is not None and time.monotonic() - self._last_used > IDLE_DISCONNECT_SECONDS:
+                    self._disconnect()
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+        finally:
+            self._disconnect()
+            conn.close()
+
+    # --- SMTP connection ---
+    def _connection(self, settings):
+        key = (settings['host'], settings['port'], settings['use_tls'], settings['user'])
+        if self._smtp is not None and self._smtp_key == key:
+            if time.monotonic() - self._last_used < 5:
+                return self._smtp  # Just used; skip the NOOP round trip within a batch
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except (smtplib.SMTPException, OSError):
+                pass
+        self._disconnect()
+
+        server = smtplib.SMTP(settings['host'], settings['port'], timeout=30)
+        if settings['use_tls']:
+            server.starttls()
+        if settings['user'] and settings['password']:
+            server.login(settings['user'], settings['password'])
+        self._smtp, self._smtp_key = server, key
+        return server
+
+    def _disconnect(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+        self._smtp, self._smtp_key = None, None
+
+    # --- Delivery ---
+    def _claim(self, conn) -> list:
+        now = time.time()
+        with conn:
+            # Rows left in 'sending' by a crashed process go back in the queue
+            conn.execute(
+                "UPDATE email_outbox SET status = 'pending' WHERE status = 'sending' AND claimed_at < ?",
+                (now - STALE_CLAIM_SECONDS,)
+            )
+            return conn.execute(
+                """
+                UPDATE email_outbox SET status = 'sending', claimed_at = ?
+                WHERE id IN (
+                    SELECT id FROM email_outbox
+                    WHERE status = 'pending' AND next_attempt_at <= ?
+                    ORDER BY next_attempt_at, id
+                    LIMIT ?
+                )
+                RETURNING id, contract_reference, message, attempts
+                """,
+                (now, now, self.batch_size)
+            ).fetchall()
+
+    def deliver_due(self, conn) -> int:
+        """Send one batch of due emails; returns how many were delivered."""
+
+        settings = self.settings_loader()
+        if not email_configured(settings):
+            return 0
+        batch = self._claim(conn)
+        if not batch:
+            return 0
+
+        delivered, sent_refs, failures = [], [], []
+        connection_error = None
+        for row_id, contract_ref, message, attempts in batch:
+            error = connection_error
+            if error is None:
+                try:
+                    msg = message_from_bytes(message)
+                    del msg['From'], msg['To']
+                    msg['From'] = settings['sender']
+                    msg['To'] = settings['office']
+                    self._connection(settings).send_message(msg)
+                    self._last_used = time.monotonic()
+                    delivered.append((datetime.now().isoformat(), row_id))
+                    sent_refs.append((contract_ref,))
+                    continue
+                except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as e:
+                    error = e  # This message was rejected; the connection is still usable
+                except (smtplib.SMTPException, OSError) as e:
+                    # Server unreachable or connection lost: back off the rest of the batch too
+                    self._disconnect()
+                    error = connection_error = e
+                except Exception as e:
+                    # Anything else fails this message only; start the next one on a fresh connection
+                    logger.exception("Email outbox could not send %s", contract_ref)
+                    self._disconnect()
+                    error = e
+
+            attempts += 1
+            status = 'failed' if attempts >= MAX_ATTEMPTS else 'pending'
+            failures.append((status, attempts, time.time() + backoff_seconds(attempts),
+                             f"{type(error).__name__}: {error}"[:500], row_id))
+
+        with conn:
+            conn.executemany("UPDATE email_outbox SET status = 'sent', sent_at = ? WHERE id = ?", delivered)
+            conn.executemany("UPDATE contracts SET email_sent = 1 WHERE contract_reference = ?", sent_refs)
+            conn.executemany(
+                "UPDATE email_outbox SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                failures
+            )
+        return len(delivered)
+
+
+_senders = {}  # Absolute db path -> OutboxSender
+_sender_lock = threading.Lock()
+
+
+def start_outbox_sender(db_path) -> OutboxSender:
+    """Start (once per process and database) and return the background sender for db_path."""
+    key = os.path.abspath(db_path)
+    with _sender_lock:
+        sender = _senders.get(key)
+        if sender is None or not sender.is_alive():
+            sender = _senders[key] = OutboxSender(db_path)
+            sender.start()
+        return sender
+
+
+def outbox_counts(conn) -> dict:
+    """Rows per status, e.g. {'pending': 2, 'sent': 40}."""
+    return dict(conn.execute("SELECT status, COUNT(*) FROM email_outbox GROUP BY status").fetchall())
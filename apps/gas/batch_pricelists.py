@@ -0,0 +1,180 @@
+# -----------------------------------------
+# File: batch_pricelists.py
+# Purpose: Generate every broker's gas price list from one flat file refresh
+# Usage:
+#   python batch_pricelists.py --flat-file "Gas Flat File.xlsx" \
+#       --configs broker_configs/ --out broker_pricelists.zip
+# Notes:
+#   - Each *.json in the configs folder is one broker:
+#       {"broker": "Acme", "bands": [{"Min": 1000, "Max": 24999, "Contract": 1,
+#         "Standard_Unit": 0.5, "Standard_Standing": 5, "Carbon_Unit": 0.6,
+#         "Carbon_Standing": 5}, ...]}
+#     (broker defaults to the file name). An optional "filters" dict limits
+#     the broker to matching rows, e.g. {"LDZ": ["NW", "NO"]}
+#   - The flat file is parsed once and stored as an uncompressed Arrow file;
+#     worker processes memory-map it and keep it as a pyarrow Table. Each
+#     broker filters and slices the Table and converts one slice at a time
+#     to pandas, so no worker ever holds a full pandas copy
+#   - Output is one zip holding <broker>.xlsx per broker plus summary.csv;
+#     brokers whose names clean to the same file name get a numeric suffix
+# -----------------------------------------
+
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+
+# Add 'shared' directory to Python's module path
+SHARED_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "shared"))
+if SHARED_DIR not in sys.path:
+    sys.path.append(SHARED_DIR)
+
+from xlsx_export import write_xlsx_chunks
+from logic.price_list import build_price_list, carbon_flags, PRICE_LIST_COLUMNS
+
+SLICE_ROWS = 50_000
+PRICING_COLUMNS = ["Unit_Rate", "Standing_Charge", "Minimum_Annual_Consumption", "Carbon_Offset"]
+
+_flat_table = None  # Per-worker, memory-mapped view of the shared flat file
+
+
+def _init_worker(arrow_path):
+    global _flat_table
+    _flat_table = feather.read_table(arrow_path, memory_map=True)
+
+
+def load_broker_configs(config_dir) -> list:
+    """Read every broker uplift config (*.json) in a folder."""
+    configs = []
+    for path in sorted(Path(config_dir).glob("*.json")):
+        with open(path) as f:
+            config = json.load(f)
+        if not config.get("bands"):
+            raise ValueError(f"{path.name} has no 'bands' list.")
+        config.setdefault("broker", path.stem)
+        configs.append(config)
+    return configs
+
+
+def unique_file_names(brokers) -> list:
+    """<broker>.xlsx per broker, suffixed _2, _3... where cleaned names collide."""
+    used, names = set(), []
+    for broker in brokers:
+        stem = re.sub(r"[^\w.\-]+", "_", str(broker))
+        name, n = f"{stem}.xlsx", 1
+        while name.lower() in used:  # Case-insensitive filesystems
+            n += 1
+            name = f"{stem}_{n}.xlsx"
+        used.add(name.lower())
+        names.append(name)
+    return names
+
+
+def _broker_table(table: pa.Table, filters: dict) -> pa.Table:
+    """Project to the price list's columns and apply the broker's row filters (zero-copy slices)."""
+    keep = [col for col in table.column_names if col in PRICE_LIST_COLUMNS or col in PRICING_COLUMNS]
+    table = table.select(keep)
+    for col, values in (filters or {}).items():
+        if col not in table.column_names:
+            raise ValueError(f"Filter column {col!r} is not in the flat file.")
+        values = values if isinstance(values, list) else [values]
+        table = table.filter(pc.is_in(table[col], value_set=pa.array(values, type=table.schema.field(col).type)))
+    return table
+
+
+def _price_broker(config, file_name, out_dir):
+    table = _broker_table(_flat_table, config.get("filters"))
+    stats = {"rows": 0, "carbon": 0, "tac_sum": 0.0, "tac_min": np.inf, "tac_max": -np.inf}
+
+    def priced_slices():
+        for offset in range(0, table.num_rows, SLICE_ROWS):
+            price_list = build_price_list(table.slice(offset, SLICE_ROWS).to_pandas(), config["bands"])
+            tac = price_list["Total Annual Cost (£)"]
+            stats["rows"] += len(price_list)
+            stats["carbon"] += int(carbon_flags(price_list).sum())
+            stats["tac_sum"] += float(tac.sum())
+            stats["tac_min"] = min(stats["tac_min"], float(tac.min()))
+            stats["tac_max"] = max(stats["tac_max"], float(tac.max()))
+            yield price_list
+
+    # Output columns are known up front: inputs keep their names, the rest are added by pricing
+    columns = [col for col in PRICE_LIST_COLUMNS
+               if col in table.column_names or col in ("Unit Rate", "Standing Charge", "Total Annual Cost (£)")]
+    write_xlsx_chunks(priced_slices(), str(Path(out_dir) / file_name), columns, sheet_name="PriceList")
+
+    rows = stats["rows"]
+    return {
+        "Broker": config["broker"],
+        "File": file_name,
+        "Rows": rows,
+        "Carbon Neutral Rows": stats["carbon"],
+        "Min TAC (£)": round(stats["tac_min"], 2) if rows else None,
+        "Mean TAC (£)": round(stats["tac_sum"] / rows, 2) if rows else None,
+        "Max TAC (£)": round(stats["tac_max"], 2) if rows else None,
+    }
+
+
+# -----------------------------------------
+# Function: generate_broker_bundle
+# Purpose: Price every broker config in parallel and zip the results.
+# Inputs:
+#   - flat_df (pd.DataFrame): Parsed gas flat file
+#   - configs (list[dict]): Broker uplift configs
+#   - bundle_path (str | Path): Zip file to write
+#   - max_workers (int, optional): Process pool size
+# Returns:
+#   - pd.DataFrame: One summary row per broker (also written as summary.csv)
+# -----------------------------------------
+def generate_broker_bundle(flat_df: pd.DataFrame, configs: list, bundle_path, max_workers: int = None) -> pd.DataFrame:
+    """Generate one price list per broker from a single shared flat file."""
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        arrow_path = os.path.join(work_dir, "flat_file.arrow")
+        feather.write_feather(flat_df.reset_index(drop=True), arrow_path, compression="uncompressed")
+
+        out_dir = os.path.join(work_dir, "pricelists")
+        os.makedirs(out_dir)
+
+        file_names = unique_file_names(config["broker"] for config in configs)
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(arrow_path,)) as pool:
+            summaries = list(pool.map(_price_broker, configs, file_names, [out_dir] * len(configs)))
+
+        summary = pd.DataFrame(summaries)
+        with zipfile.ZipFile(bundle_path, "w", zipfile.ZIP_DEFLATED) as bundle:
+            for row in summaries:
+                bundle.write(os.path.join(out_dir, row["File"]), row["File"])
+            bundle.writestr("summary.csv", summary.to_csv(index=False))
+
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate broker gas price lists in parallel.")
+    parser.add_argument("--flat-file", required=True, help="Supplier gas flat file (.xlsx)")
+    parser.add_argument("--configs", required=True, help="Folder of per-broker uplift configs (*.json)")
+    parser.add_argument("--out", default="broker_pricelists.zip", help="Zip bundle to write")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    flat_df = pd.read_excel(args.flat_file)
+    flat_df = flat_df.drop(columns=[col for col in ["Minimum_Credit_Score", "Maximum_Credit_Score"] if col in flat_df.columns])
+    configs = load_broker_configs(args.configs)
+
+    summary = generate_broker_bundle(flat_df, configs, args.out, max_workers=args.workers)
+    print(summary.to_string(index=False))
+    print(f"✅ Wrote {len(summary)} broker price lists to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
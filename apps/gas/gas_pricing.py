@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 import io
+from logic.price_list import build_price_list
 
 st.set_page_config(page_title="Gas Pricing Uplift Tool", layout="wide")
 st.title("🔹 Gas Pricing Uplift Tool")
@@ -91,40 +92,8 @@ if uploaded_file:
         value=20000
     )
 
-    # Function to determine uplift per row
-    def get_uplifts(row):
-        consumption = row["Minimum_Annual_Consumption"]
-        matched_band = next((b for b in band_inputs if b["Min"] <= consumption <= b["Max"]), band_inputs[-1])
-
-        # Determine if carbon neutral
-        carbon_raw = str(row.get("Carbon_Offset", "")).strip().lower()
-        carbon = carbon_raw in ["yes", "y", "true", "1"]
-
-        # Contract duration (force match to band selection)
-        contract = matched_band["Contract"]
-
-        if carbon:
-            uplift_unit = matched_band["Carbon_Unit"]
-            uplift_standing = matched_band["Carbon_Standing"]
-        else:
-            uplift_unit = matched_band["Standard_Unit"]
-            uplift_standing = matched_band["Standard_Standing"]
-
-        return pd.Series({
-            "Uplift_Unit": uplift_unit,
-            "Uplift_Standing": uplift_standing
-        })
-
-    # Apply
-    uplift_df = df.apply(get_uplifts, axis=1)
-    df_final = pd.concat([df.reset_index(drop=True), uplift_df], axis=1)
-
-    # Compute uplifted columns
-    df_final["Unit Rate"] = (df_final["Unit_Rate"] + df_final["Uplift_Unit"]).round(4)
-    df_final["Standing Charge"] = (df_final["Standing_Charge"] + df_final["Uplift_Standing"]).round(4)
-    df_final["Total Annual Cost (£)"] = (
-        (df_final["Standing Charge"] * 365) + (df_final["Unit Rate"] * df_final["Minimum_Annual_Consumption"])
-    ) / 100
+    # Apply band uplifts and compute sell prices as column operations
+    df_final = build_price_list(df, band_inputs)
 
     # Select only columns to display/export
     display_cols = [
@@ -1,6 +1,26 @@
 import streamlit as st
 import pandas as pd
 import io
+import os
+import sys
+import hashlib
+import tempfile
+
+# Add 'shared' directory to Python's module path
+SHARED_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "shared"))
+if SHARED_DIR not in sys.path:
+    sys.path.append(SHARED_DIR)
+
+from price_book_publisher import publish_price_book, zip_directory
+from logic.price_list import build_price_list_cached, band_config_key, PRICE_LIST_COLUMNS
+
+
+@st.cache_data(show_spinner=False)
+def load_flat_file(file_bytes):
+    """Read the flat file once per upload and drop the credit score columns."""
+    df = pd.read_excel(io.BytesIO(file_bytes))
+    return df.drop(columns=[col for col in ["Minimum_Credit_Score", "Maximum_Credit_Score"] if col in df.columns])
+
 
 st.set_page_config(page_title="Gas Pricing Uplift Tool", layout="wide")
 st.title("🔹 Gas Pricing Uplift Tool")
@@ -8,10 +28,10 @@ st.title("🔹 Gas Pricing Uplift Tool")
 uploaded_file = st.file_uploader("Upload your pricing XLSX file:", type="xlsx")
 
 if uploaded_file:
-    # Read Excel
-    df = pd.read_excel(uploaded_file)
-    # Remove the Credit Score columns if they exist
-    df = df.drop(columns=[col for col in ["Minimum_Credit_Score", "Maximum_Credit_Score"] if col in df.columns])
+    # Read Excel (cached per upload) and remove the Credit Score columns
+    file_bytes = uploaded_file.getvalue()
+    flat_key = hashlib.sha1(file_bytes).hexdigest()
+    df = load_flat_file(file_bytes)
     # Show preview
     st.subheader("📄 Flat File Preview")
     st.dataframe(df.head())
@@ -91,74 +111,47 @@ if uploaded_file:
         value=20000
     )
 
-    # Function to determine uplift per row
-    def get_uplifts(row):
-        consumption = row["Minimum_Annual_Consumption"]
-        matched_band = next((b for b in band_inputs if b["Min"] <= consumption <= b["Max"]), band_inputs[-1])
-
-        # Determine if carbon neutral
-        carbon_raw = str(row.get("Carbon_Offset", "")).strip().lower()
-        carbon = carbon_raw in ["yes", "y", "true", "1"]
-
-        # Contract duration (force match to band selection)
-        contract = matched_band["Contract"]
-
-        if carbon:
-            uplift_unit = matched_band["Carbon_Unit"]
-            uplift_standing = matched_band["Carbon_Standing"]
-        else:
-            uplift_unit = matched_band["Standard_Unit"]
-            uplift_standing = matched_band["Standard_Standing"]
-
-        return pd.Series({
-            "Uplift_Unit": uplift_unit,
-            "Uplift_Standing": uplift_standing
-        })
-
-    # Apply
-    uplift_df = df.apply(get_uplifts, axis=1)
-    df_final = pd.concat([df.reset_index(drop=True), uplift_df], axis=1)
-
-    # Compute uplifted columns
-    df_final["Unit Rate"] = (df_final["Unit_Rate"] + df_final["Uplift_Unit"]).round(4)
-    df_final["Standing Charge"] = (df_final["Standing_Charge"] + df_final["Uplift_Standing"]).round(4)
-    df_final["Total Annual Cost (£)"] = (
-        (df_final["Standing Charge"] * 365) + (df_final["Unit Rate"] * df_final["Minimum_Annual_Consumption"])
-    ) / 100
+    # Apply band uplifts, re-pricing only the bands whose uplifts changed
+    band_cache = st.session_state.setdefault("price_list_cache", {})
+    df_final, repriced_bands = build_price_list_cached(df, band_inputs, band_cache, flat_key)
+    if repriced_bands and len(repriced_bands) < len(band_inputs):
+        st.caption(f"Re-priced band(s): {', '.join(str(i + 1) for i in repriced_bands)}")
 
     # Select only columns to display/export
-    display_cols = [
-        "Broker_ID",
-        "Production_Date",
-        "Utility",
-        "LDZ",
-        "Exit_Zone",
-        "Sale_Type",
-        "Contract_Duration",
-        "Minimum_Annual_Consumption",
-        "Maximum_Annual_Consumption",
-        "Minimum_Contract_Start_Date",
-        "Maximum_Contract_Start_Date",
-        "Minimum_Valid_Quote_Date",
-        "Maximum_Valid_Quote_Date",
-        "Product_Name",
-        "Carbon_Offset",
-        "Unit Rate",
-        "Standing Charge",
-        "Total Annual Cost (£)"
-    ]
+    display_cols = PRICE_LIST_COLUMNS
 
     st.subheader("✅ Price List Preview")
     st.dataframe(df_final[display_cols].head())
 
-    # Excel output
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-        df_final[display_cols].to_excel(writer, index=False, sheet_name="PriceList")
+    # Excel output, rebuilt only when an uplift has changed
+    workbook_key = tuple(band_config_key(b) for b in band_inputs)
+    if band_cache.get("workbook_key") != workbook_key:
+        output = io.BytesIO()
+        with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
+            df_final[display_cols].to_excel(writer, index=False, sheet_name="PriceList")
+        band_cache["workbook_key"] = workbook_key
+        band_cache["workbook"] = output.getvalue()
 
     st.download_button(
         "⬇️ Download Broker Price List",
-        data=output.getvalue(),
+        data=band_cache["workbook"],
         file_name="broker_pricelist.xlsx",
         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
     )
+
+    # Partitioned, machine-readable publish for broker portals
+    if st.button("📦 Publish Partitioned Price List"):
+        with tempfile.TemporaryDirectory() as out_dir:
+            manifest = publish_price_book(
+                df_final[display_cols], out_dir,
+                partition_cols=["LDZ", "Contract_Duration", "Carbon_Offset"],
+                stem="broker_pricelist"
+            )
+            bundle = zip_directory(out_dir)
+        st.success(f"Published {manifest['total_rows']:,} rows across {len(manifest['partitions'])} partitions.")
+        st.download_button(
+            "⬇️ Download Partitioned Price List (.zip)",
+            data=bundle,
+            file_name="broker_pricelist_partitioned.zip",
+            mime="application/zip"
+        )
@@ -0,0 +1,192 @@
+# -----------------------------------------
+# File: price_list.py
+# Purpose: Vectorised broker price list engine for the gas uplift tools
+# Notes:
+#   - Bands are assigned with searchsorted over the band edges instead of a
+#     per-row next(...) scan; rows outside every band fall into the last band
+#   - Carbon_Offset is normalised once over its unique values
+#   - Uplifted Unit Rate, Standing Charge and TAC are column operations
+#   - build_price_list_cached keeps one priced frame per band and only
+#     re-prices bands whose uplift config changed
+# -----------------------------------------
+
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+CARBON_TRUE_VALUES = ["yes", "y", "true", "1"]
+
+# Columns shown and exported on a broker price list
+PRICE_LIST_COLUMNS = [
+    "Broker_ID",
+    "Production_Date",
+    "Utility",
+    "LDZ",
+    "Exit_Zone",
+    "Sale_Type",
+    "Contract_Duration",
+    "Minimum_Annual_Consumption",
+    "Maximum_Annual_Consumption",
+    "Minimum_Contract_Start_Date",
+    "Maximum_Contract_Start_Date",
+    "Minimum_Valid_Quote_Date",
+    "Maximum_Valid_Quote_Date",
+    "Product_Name",
+    "Carbon_Offset",
+    "Unit Rate",
+    "Standing Charge",
+    "Total Annual Cost (£)"
+]
+
+
+# -----------------------------------------
+# Function: assign_bands
+# Purpose: Index of the uplift band each consumption value falls into.
+# Inputs:
+#   - consumption (array): Minimum_Annual_Consumption per row
+#   - band_inputs (list[dict]): Bands with "Min" and "Max" (kWh)
+# Returns:
+#   - np.ndarray: Band index per row
+# Notes:
+#   - Bands are expected not to overlap beyond shared edges; values in
+#     gaps, below the first band or above the last band take the last band,
+#     as before
+# -----------------------------------------
+def assign_bands(consumption, band_inputs: list) -> np.ndarray:
+    """Map each consumption value to its band with a binary search over band edges."""
+
+    consumption = np.asarray(consumption, dtype=float)
+    mins = np.array([b["Min"] for b in band_inputs], dtype=float)
+    maxs = np.array([b["Max"] for b in band_inputs], dtype=float)
+
+    order = np.argsort(mins, kind="stable")
+    pos = np.searchsorted(mins[order], consumption, side="right") - 1
+    candidate = order[np.clip(pos, 0, None)]
+    inside = (pos >= 0) & (consumption <= maxs[candidate])
+
+    # A value on a shared edge (one band's Max is the next band's Min) is in
+    # both; the band listed first wins, as it did with next(...)
+    previous = order[np.clip(pos - 1, 0, None)]
+    in_previous = (pos >= 1) & (consumption <= maxs[previous])
+    band = np.where(in_previous & (~inside | (previous < candidate)), previous, candidate)
+
+    return np.where(inside | in_previous, band, len(band_inputs) - 1)
+
+
+# -----------------------------------------
+# Function: carbon_flags
+# Purpose: Boolean carbon-neutral flag per row from Carbon_Offset.
+# Notes:
+#   - Same rules as before: str(value).strip().lower() in yes/y/true/1
+#   - Missing column → every row is Standard
+# -----------------------------------------
+def carbon_flags(df: pd.DataFrame) -> np.ndarray:
+    """Normalise the Carbon_Offset column once over its unique values."""
+
+    if "Carbon_Offset" not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+
+    codes, uniques = pd.factorize(df["Carbon_Offset"].astype(str), use_na_sentinel=False)
+    is_carbon = pd.Index(uniques).str.strip().str.lower().isin(CARBON_TRUE_VALUES)
+    return np.asarray(is_carbon)[codes]
+
+
+# -----------------------------------------
+# Function: build_price_list
+# Purpose: Apply band uplifts to the flat file and compute sell prices.
+# Inputs:
+#   - df (pd.DataFrame): Gas flat file with Unit_Rate, Standing_Charge and
+#     Minimum_Annual_Consumption
+#   - band_inputs (list[dict]): Min/Max plus Standard_Unit, Standard_Standing,
+#     Carbon_Unit and Carbon_Standing uplifts per band
+# Returns:
+#   - pd.DataFrame: Flat file plus Uplift_Unit, Uplift_Standing, Unit Rate,
+#     Standing Charge and Total Annual Cost (£)
+# -----------------------------------------
+def build_price_list(df: pd.DataFrame, band_inputs: list) -> pd.DataFrame:
+    """Return the uplifted broker price list for one uplift configuration."""
+
+    df_final = df.reset_index(drop=True).copy()
+    band_idx = assign_bands(df_final["Minimum_Annual_Consumption"], band_inputs)
+    carbon = carbon_flags(df_final)
+
+    uplift_unit = np.where(
+        carbon,
+        np.array([b["Carbon_Unit"] for b in band_inputs], dtype=float)[band_idx],
+        np.array([b["Standard_Unit"] for b in band_inputs], dtype=float)[band_idx],
+    )
+    uplift_standing = np.where(
+        carbon,
+        np.array([b["Carbon_Standing"] for b in band_inputs], dtype=float)[band_idx],
+        np.array([b["Standard_Standing"] for b in band_inputs], dtype=float)[band_idx],
+    )
+
+    return _apply_uplifts(df_final, uplift_unit, uplift_standing)
+
+
+def _apply_uplifts(df_final: pd.DataFrame, uplift_unit, uplift_standing) -> pd.DataFrame:
+    df_final["Uplift_Unit"] = uplift_unit
+    df_final["Uplift_Standing"] = uplift_standing
+    df_final["Unit Rate"] = (df_final["Unit_Rate"] + df_final["Uplift_Unit"]).round(4)
+    df_final["Standing Charge"] = (df_final["Standing_Charge"] + df_final["Uplift_Standing"]).round(4)
+    df_final["Total Annual Cost (£)"] = (
+        (df_final["Standing Charge"] * 365) + (df_final["Unit Rate"] * df_final["Minimum_Annual_Consumption"])
+    ) / 100
+    return df_final
+
+
+def band_config_key(band: dict) -> str:
+    """Stable hash of one band's uplift configuration."""
+    canonical = json.dumps(band, sort_keys=True, default=str)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+# -----------------------------------------
+# Function: build_price_list_cached
+# Purpose: Same output as build_price_list, re-pricing only changed bands.
+# Inputs:
+#   - df (pd.DataFrame): Gas flat file
+#   - band_inputs (list[dict]): Uplift bands as for build_price_list
+#   - cache (dict): Caller-owned store, e.g. a dict in st.session_state
+#   - flat_key (str): Identifies the flat file (e.g. a hash of the upload)
+# Returns:
+#   - tuple: (price list [pd.DataFrame], indexes of bands re-priced this call [list])
+# Notes:
+#   - Rows are split by band once per flat file and set of band edges;
+#     changing any Min/Max re-splits and re-prices every band
+#   - Row order matches the flat file
+# -----------------------------------------
+def build_price_list_cached(df: pd.DataFrame, band_inputs: list, cache: dict, flat_key: str) -> tuple[pd.DataFrame, list]:
+    """Return the price list, recomputing only the bands whose uplift config changed."""
+
+    split_key = (flat_key, tuple((b["Min"], b["Max"]) for b in band_inputs))
+    if cache.get("split_key") != split_key:
+        base = df.reset_index(drop=True)
+        band_idx = assign_bands(base["Minimum_Annual_Consumption"], band_inputs)
+        cache.clear()
+        cache["split_key"] = split_key
+        cache["base"] = base
+        cache["carbon"] = carbon_flags(base)
+        cache["rows"] = [np.flatnonzero(band_idx == i) for i in range(len(band_inputs))]
+        cache["bands"] = {}
+
+    recomputed = []
+    parts = []
+    for i, band in enumerate(band_inputs):
+        key = band_config_key(band)
+        cached = cache["bands"].get(i)
+        if cached is None or cached[0] != key:
+            rows = cache["rows"][i]
+            carbon = cache["carbon"][rows]
+            part = _apply_uplifts(
+                cache["base"].iloc[rows].copy(),
+                np.where(carbon, float(band["Carbon_Unit"]), float(band["Standard_Unit"])),
+                np.where(carbon, float(band["Carbon_Standing"]), float(band["Standard_Standing"])),
+            )
+            cache["bands"][i] = (key, part)
+            recomputed.append(i)
+        parts.append(cache["bands"][i][1])
+
+    return pd.concat(parts).sort_index(), recomputed
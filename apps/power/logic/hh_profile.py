@@ -0,0 +1,264 @@
+# -----------------------------------------
+# File: hh_profile.py
+# Purpose: Half-hourly consumption profile engine for weighted unit-rate TAC
+# Notes:
+#   - Consumption is held as a (sites x periods) float32 memory-mapped array,
+#     17,520 periods per site for a 365-day year (48 per day, clock-change
+#     days are treated as 48-period days)
+#   - Periods are classified with vectorised calendar masks into
+#     Day / Night / Evening & Weekend or DUoS Red / Amber / Green
+#   - Weighted costs are one matrix product per chunk of sites
+# -----------------------------------------
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+PERIODS_PER_DAY = 48
+
+# Hour windows are [start, end) on the 24h clock; weekday windows apply Mon–Fri
+DAY_NIGHT_EVW_WINDOWS = {
+    "night": {"all_days": [(0, 7)]},
+    "day": {"weekdays": [(7, 19)]},
+    "evw": {"weekdays": [(19, 24)], "weekends": [(7, 24)]},
+}
+
+DUOS_RAG_WINDOWS = {
+    "red": {"weekdays": [(16, 19)]},
+    "amber": {"weekdays": [(7, 16), (19, 23)]},
+    "green": {"weekdays": [(0, 7), (23, 24)], "weekends": [(0, 24)]},
+}
+
+STORE_FILE = "consumption.npy"
+META_FILE = "meta.json"
+
+
+# -----------------------------------------
+# Function: period_calendar
+# Purpose: Day number and half-hour slot for every settlement period of a year.
+# Returns:
+#   - tuple: (start of year [np.datetime64], day index [np.ndarray], slot [np.ndarray], weekend flag [np.ndarray])
+# -----------------------------------------
+def period_calendar(year: int, holidays=None) -> tuple:
+    """Return vectorised calendar columns for every half-hour of the year."""
+
+    start = np.datetime64(f"{year}-01-01", "D")
+    days = int((np.datetime64(f"{year + 1}-01-01", "D") - start).astype(int))
+    period = np.arange(days * PERIODS_PER_DAY)
+    day_index = period // PERIODS_PER_DAY
+    slot = period % PERIODS_PER_DAY
+
+    # 1970-01-01 was a Thursday, so (epoch days + 3) % 7 gives Monday = 0
+    weekday = (start.astype(int) + day_index + 3) % 7
+    weekend = weekday >= 5
+    if holidays:
+        holiday_days = (pd.to_datetime(list(holidays)).values.astype("datetime64[D]") - start).astype(int)
+        weekend |= np.isin(day_index, holiday_days)
+
+    return start, day_index, slot, weekend
+
+
+# -----------------------------------------
+# Function: build_masks
+# Purpose: Turn a window definition into one boolean mask per rate band.
+# Inputs:
+#   - year (int): Calendar year of the consumption series
+#   - windows (dict): DAY_NIGHT_EVW_WINDOWS, DUOS_RAG_WINDOWS or a custom layout
+#   - holidays (list, optional): Dates treated as weekend days
+# Returns:
+#   - dict[str, np.ndarray]: Band name → bool mask over the year's periods
+# -----------------------------------------
+def build_masks(year: int, windows: dict = DAY_NIGHT_EVW_WINDOWS, holidays=None) -> dict:
+    """Classify every half-hour of the year into the bands of a window layout."""
+
+    _, _, slot, weekend = period_calendar(year, holidays)
+    hour = slot / 2
+
+    masks = {}
+    for band, rules in windows.items():
+        mask = np.zeros(slot.shape, dtype=bool)
+        for day_type, spans in rules.items():
+            applies = {"all_days": np.ones_like(weekend), "weekdays": ~weekend, "weekends": weekend}[day_type]
+            for start_hour, end_hour in spans:
+                mask |= applies & (hour >= start_hour) & (hour < end_hour)
+        masks[band] = mask
+
+    return masks
+
+
+# -----------------------------------------
+# Function: create_hh_store / open_hh_store
+# Purpose: Allocate and reopen the memory-mapped consumption store.
+# Notes:
+#   - Sites are rows in the order given; meta.json records the site ids and year
+# -----------------------------------------
+def create_hh_store(store_dir, site_ids, year: int) -> np.memmap:
+    """Allocate a zero-filled (sites x periods) float32 store on disk."""
+
+    store_dir = Path(store_dir)
+    store_dir.mkdir(parents=True, exist_ok=True)
+    n_periods = period_calendar(year)[1].size
+
+    with open(store_dir / META_FILE, "w") as f:
+        json.dump({"year": year, "sites": [str(s) for s in site_ids]}, f)
+
+    return np.lib.format.open_memmap(
+        store_dir / STORE_FILE, mode="w+", dtype=np.float32, shape=(len(site_ids), n_periods)
+    )
+
+
+def open_hh_store(store_dir, mode: str = "r") -> tuple[list, int, np.memmap]:
+    """Reopen a store as (site ids, year, memory-mapped consumption)."""
+
+    store_dir = Path(store_dir)
+    with open(store_dir / META_FILE) as f:
+        meta = json.load(f)
+    consumption = np.load(store_dir / STORE_FILE, mmap_mode=mode)
+    return meta["sites"], meta["year"], consumption
+
+
+# -----------------------------------------
+# Function: ingest_hh_csv
+# Purpose: Stream a long-format HH file (site, timestamp, kWh) into a store.
+# Inputs:
+#   - source: CSV path or file object
+#   - store_dir: Directory for the memory-mapped store
+#   - year (int): Calendar year to load; rows outside it are ignored
+#   - site_col, time_col, kwh_col (str): Column names in the file
+#   - chunksize (int): Rows parsed per chunk
+# Returns:
+#   - tuple: (site ids, year, memory-mapped consumption)
+# Notes:
+#   - Two passes: site ids first, then a vectorised scatter per chunk
+#   - Repeated readings for the same site/period are summed
+# -----------------------------------------
+def ingest_hh_csv(source, store_dir, year: int, site_col: str = "MPXN", time_col: str = "Timestamp",
+                  kwh_col: str = "kWh", chunksize: int = 500_000) -> tuple[list, int, np.memmap]:
+    """Load HH readings into a memory-mapped store without holding the file in memory."""
+
+    site_ids = pd.Index([])
+    for chunk in pd.read_csv(source, usecols=[site_col], dtype={site_col: str}, chunksize=chunksize):
+        site_ids = site_ids.union(chunk[site_col].dropna().unique())
+
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+    store = create_hh_store(store_dir, site_ids, year)
+    year_start = np.datetime64(f"{year}-01-01T00:00", "m")
+
+    for chunk in pd.read_csv(source, usecols=[site_col, time_col, kwh_col], dtype={site_col: str}, chunksize=chunksize):
+        stamps = pd.to_datetime(chunk[time_col], dayfirst=True, errors="coerce").values.astype("datetime64[m]")
+        period = (stamps - year_start).astype(np.int64) // 30
+        row = site_ids.get_indexer(chunk[site_col])
+        kwh = pd.to_numeric(chunk[kwh_col], errors="coerce").to_numpy(dtype=np.float32)
+
+        valid = (row >= 0) & (period >= 0) & (period < store.shape[1]) & ~np.isnan(kwh) & ~np.isnat(stamps)
+        np.add.at(store, (row[valid], period[valid]), kwh[valid])
+
+    store.flush()
+    return list(site_ids), year, store
+
+
+# -----------------------------------------
+# Function: band_consumption
+# Purpose: kWh per site per band as one matrix product per chunk of sites.
+# Returns:
+#   - pd.DataFrame: Sites x bands kWh totals
+# -----------------------------------------
+def band_consumption(consumption, masks: dict, site_ids=None, chunk_sites: int = 2048) -> pd.DataFrame:
+    """Sum each site's consumption inside every band mask."""
+
+    bands = list(masks)
+    selector = np.column_stack([masks[b] for b in bands]).astype(np.float32)
+    totals = np.empty((consumption.shape[0], len(bands)), dtype=np.float64)
+
+    for start in range(0, consumption.shape[0], chunk_sites):
+        block = np.asarray(consumption[start:start + chunk_sites], dtype=np.float32)
+        totals[start:start + chunk_sites] = block @ selector
+
+    return pd.DataFrame(totals, columns=bands, index=site_ids)
+
+
+# -----------------------------------------
+# Function: profile_split
+# Purpose: Percentage of consumption falling in each band.
+# Notes:
+#   - Keys match the profile_split dict used by calculate_tac in nhhc.py
+#   - Pass a DataFrame from band_consumption for a portfolio-wide split
+#   - Raises ValueError when there is no consumption to split
+# -----------------------------------------
+def profile_split(band_kwh: pd.DataFrame) -> dict:
+    """Return the portfolio consumption share per band as percentages."""
+
+    totals = band_kwh.sum(axis=0)
+    grand_total = totals.sum()
+    if not grand_total > 0:
+        raise ValueError("The half-hourly file has no consumption in the selected year.")
+    return {band: round(float(totals[band] / grand_total * 100), 2) for band in band_kwh.columns}
+
+
+# -----------------------------------------
+# Function: weighted_costs
+# Purpose: Exact annual cost per site from HH volumes and band rates.
+# Inputs:
+#   - band_kwh (pd.DataFrame): Output of band_consumption
+#   - rates (dict): Band → p/kWh, scalar or per-site array aligned to band_kwh
+#   - standing_charge: p/day, scalar or per-site array
+#   - days (int): Days of standing charge to bill
+# Returns:
+#   - pd.DataFrame: kWh and £ cost per band, standing cost and TAC per site
+# -----------------------------------------
+def weighted_costs(band_kwh: pd.DataFrame, rates: dict, standing_charge=0.0, days: int = 365) -> pd.DataFrame:
+    """Price every site's banded volumes and return costs in £."""
+
+    result = band_kwh.add_suffix(" kWh")
+    energy = np.zeros(len(band_kwh))
+    for band in band_kwh.columns:
+        cost = band_kwh[band].to_numpy() * np.asarray(rates.get(band, 0.0), dtype=float) / 100
+        result[f"{band} Cost (£)"] = np.round(cost, 2)
+        energy += cost
+
+    standing = np.broadcast_to(np.asarray(standing_charge, dtype=float) * days / 100, energy.shape)
+    result["Total kWh"] = band_kwh.sum(axis=1).round(2)
+    result["Standing Cost (£)"] = np.round(standing, 2)
+    result["Total Annual Cost (£)"] = np.round(energy + standing, 2)
+    return result
+
+
+# -----------------------------------------
+# Function: price_sites
+# Purpose: Exact HH cost per site at the rates of its consumption band.
+# Inputs:
+#   - band_kwh (pd.DataFrame): Output of band_consumption (day/night/evw columns)
+#   - bands (list[tuple]): (min_kwh, max_kwh) per price book row
+#   - price_book (pd.DataFrame): generate_price_book output, one row per band
+# Returns:
+#   - pd.DataFrame: weighted_costs per site plus its Band; sites outside every
+#     band, or in a band with no rates, are left unpriced (NaN)
+# -----------------------------------------
+RATE_COLUMNS = {
+    "day": "Day Rate (p/kWh)",
+    "night": "Night Rate (p/kWh)",
+    "evw": "Evening & Weekend Rate (p/kWh)",
+}
+
+
+def price_sites(band_kwh: pd.DataFrame, bands: list, price_book: pd.DataFrame) -> pd.DataFrame:
+    """Assign each site to a band by annual kWh and price its banded volumes."""
+
+    annual = band_kwh.sum(axis=1).to_numpy()
+    band_min = np.array([b[0] for b in bands], dtype=float)
+    band_max = np.array([b[1] for b in bands], dtype=float)
+    inside = (annual[:, None] >= band_min[None, :]) & (annual[:, None] <= band_max[None, :])
+    band_index = np.where(inside.any(axis=1), inside.argmax(axis=1), -1)
+
+    def per_site(column):
+        values = pd.to_numeric(price_book[column], errors="coerce").to_numpy(dtype=float)
+        return np.where(band_index >= 0, values[band_index], np.nan)
+
+    rates = {band: per_site(column) for band, column in RATE_COLUMNS.items()}
+    result = weighted_costs(band_kwh, rates, per_site("Standing Charge (p/day)"))
+    result.insert(0, "Band", np.where(band_index >= 0, price_book["Band"].to_numpy()[band_index], "Out of range"))
+    return result
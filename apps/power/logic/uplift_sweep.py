@@ -0,0 +1,172 @@
+# -----------------------------------------
+# File: uplift_sweep.py
+# Purpose: Scenario sweep for the NHH Margin Sculptor
+# Notes:
+#   - Broadcasts grids of margin and standing-charge split across every
+#     band in one NumPy pass (axes: margin, split, band)
+#   - Recovery cost is a fixed input (Step 3), not a lever: sweeping it
+#     would always "win" at the lowest recovery
+#   - Pricing mirrors Step 4 of stage1_band_setup.py: uplifts added to the
+#     band's first flat-file row, rates rounded to 4dp, 365-day standing charge
+#   - TAC here is the customer's full bill at mid-band consumption (base plus
+#     uplift, rounded to 2dp); Step 4's "Total Annual Cost" column is the
+#     uplift alone (recovery + margin), so the two are not comparable
+#   - At mid-band consumption the split moves cost between standing charge
+#     and unit rate without changing TAC (beyond rounding), so the cheapest
+#     configuration breaks ties deterministically (see cheapest_configuration)
+# -----------------------------------------
+
+import numpy as np
+import pandas as pd
+
+
+# -----------------------------------------
+# Function: get_band_base_rates
+# Purpose: Pick the first flat-file row overlapping each custom band.
+# Inputs:
+#   - df (pd.DataFrame): Electricity flat file
+#   - bands (list[tuple]): (min_kwh, max_kwh) per band
+#   - contract_duration (int): Contract length in months
+#   - green_option (str): "Standard" or "Green"
+# Returns:
+#   - tuple: (base standing charge [np.ndarray], base standard rate [np.ndarray])
+# Notes:
+#   - Bands with no matching row come back as NaN
+# -----------------------------------------
+def get_band_base_rates(df: pd.DataFrame, bands: list, contract_duration: int, green_option: str) -> tuple[np.ndarray, np.ndarray]:
+    """Return base SC and Standard Rate per band, NaN where the flat file has no match."""
+
+    green_flags = df["Green_Energy"].astype(str).str.upper()
+    wanted = ["TRUE", "YES"] if green_option == "Green" else ["FALSE", "NO"]
+    eligible = df[(df["Contract_Duration"] == contract_duration) & green_flags.isin(wanted)]
+
+    row_min = eligible["Minimum_Annual_Consumption"].to_numpy(dtype=float)
+    row_max = eligible["Maximum_Annual_Consumption"].to_numpy(dtype=float)
+    band_min = np.array([b[0] for b in bands], dtype=float)
+    band_max = np.array([b[1] for b in bands], dtype=float)
+
+    # bands x rows overlap matrix; argmax picks the first overlapping row
+    overlap = (row_min[None, :] <= band_max[:, None]) & (row_max[None, :] >= band_min[:, None])
+    has_match = overlap.any(axis=1) if overlap.size else np.zeros(len(bands), dtype=bool)
+    first = overlap.argmax(axis=1) if overlap.size else np.zeros(len(bands), dtype=int)
+
+    base_sc = np.full(len(bands), np.nan)
+    base_rate = np.full(len(bands), np.nan)
+    base_sc[has_match] = eligible["Standing_Charge"].to_numpy(dtype=float)[first[has_match]]
+    base_rate[has_match] = eligible["Standard_Rate"].to_numpy(dtype=float)[first[has_match]]
+    return base_sc, base_rate
+
+
+# -----------------------------------------
+# Function: sweep_uplifts
+# Purpose: Price every (margin, split) combination for all bands.
+# Inputs:
+#   - base_sc, base_rate (array): Base standing charge (p/day) and rate (p/kWh) per band
+#   - mid_kwh (array): Mid-point consumption per band
+#   - recovery_cost (float): Cost to recover per meter (£/year); fixed, not a lever
+#   - margins (array): Margin values (£/meter or p/kWh depending on margin_type)
+#   - standing_splits (array): Share of recovered cost put on the standing charge (0–1)
+#   - margin_type (str): "£ per meter" or "p/kWh"
+# Returns:
+#   - dict of arrays shaped (margin, split, band) plus the input grids
+# -----------------------------------------
+def sweep_uplifts(base_sc, base_rate, mid_kwh, recovery_cost: float, margins, standing_splits, margin_type: str = "£ per meter") -> dict:
+    """Broadcast the uplift grids across all bands and return the TAC and margin surfaces."""
+
+    margin_grid = np.asarray(margins, dtype=float)
+    split_grid = np.asarray(standing_splits, dtype=float)
+
+    margin = margin_grid[:, None, None]
+    split = split_grid[None, :, None]
+    mid = np.asarray(mid_kwh, dtype=float)[None, None, :]
+    sc = np.asarray(base_sc, dtype=float)[None, None, :]
+    rate = np.asarray(base_rate, dtype=float)[None, None, :]
+
+    # Margin in £/year per meter for each band
+    margin_gbp = margin if margin_type == "£ per meter" else margin * mid / 100
+    total_cost_pence = (float(recovery_cost) + margin_gbp) * 100
+
+    standing = np.round(sc + (total_cost_pence * split) / 365, 4)
+    unit = np.round(rate + (total_cost_pence * (1 - split)) / mid, 4)
+    tac = np.round((standing * 365 + unit * mid) / 100, 2)
+
+    return {
+        "recovery_cost": float(recovery_cost),
+        "mid_kwh": np.asarray(mid_kwh, dtype=float),
+        "margin_value": margin_grid,
+        "standing_split": split_grid,
+        "standing_charge": standing,
+        "unit_rate": unit,
+        "tac": tac,
+        "margin": np.where(np.isnan(tac), np.nan, np.broadcast_to(margin_gbp, tac.shape)),
+    }
+
+
+# -----------------------------------------
+# Function: cheapest_configuration
+# Purpose: Find the lowest portfolio TAC that still earns the target margin.
+# Inputs:
+#   - sweep (dict): Output of sweep_uplifts
+#   - target_margin (float): Minimum margin per meter in every priced band (£/year)
+# Returns:
+#   - dict describing the winning configuration, or None if nothing qualifies
+# Notes:
+#   - Bands with no flat-file match are ignored rather than disqualifying a config
+#   - Portfolio TACs within rounding noise of the minimum (4dp rates, 2dp TAC,
+#     summed over priced bands) count as ties; ties go to the lowest margin,
+#     then the split nearest 50% (Step 4's default), then the lower split
+# -----------------------------------------
+def cheapest_configuration(sweep: dict, target_margin: float) -> dict | None:
+    """Return the cheapest (margin, split) that meets the target margin in every band."""
+
+    tac = sweep["tac"]
+    priced = ~np.isnan(tac)
+    band_ok = (sweep["margin"] >= target_margin) | ~priced
+    meets = band_ok.all(axis=-1) & priced.any(axis=-1)
+
+    if not meets.any():
+        return None
+
+    portfolio_tac = np.where(priced, tac, 0.0).sum(axis=-1)
+    candidate_tac = np.where(meets, portfolio_tac, np.inf)
+
+    # Largest error rounding can add per band: half a unit in the 4th dp of each rate, half a penny of TAC
+    mid = np.asarray(sweep["mid_kwh"], dtype=float)
+    noise = np.where(priced, (0.00005 * 365 + 0.00005 * mid) / 100 + 0.005, 0.0).sum(axis=-1)
+    ties = np.argwhere(candidate_tac <= candidate_tac.min() + noise)
+
+    margins = sweep["margin_value"][ties[:, 0]]
+    splits = sweep["standing_split"][ties[:, 1]]
+    m, s = ties[np.lexsort((splits, np.abs(splits - 0.5), margins))[0]]
+
+    return {
+        "recovery_cost": sweep["recovery_cost"],
+        "margin_value": float(sweep["margin_value"][m]),
+        "standing_split": float(sweep["standing_split"][s]),
+        "portfolio_tac": round(float(portfolio_tac[m, s]), 2),
+        "standing_charge": sweep["standing_charge"][m, s],
+        "unit_rate": sweep["unit_rate"][m, s],
+        "tac": tac[m, s],
+        "margin": sweep["margin"][m, s],
+    }
+
+
+# -----------------------------------------
+# Function: sweep_to_frame
+# Purpose: Flatten the sweep surfaces into a long table for display/export.
+# -----------------------------------------
+def sweep_to_frame(sweep: dict, band_labels: list) -> pd.DataFrame:
+    """Return one row per (margin, split, band) combination."""
+
+    shape = sweep["tac"].shape
+    m, s, b = np.indices(shape).reshape(3, -1)
+    return pd.DataFrame({
+        "Recovery Cost (£/year)": sweep["recovery_cost"],
+        "Margin Setting": sweep["margin_value"][m],
+        "Standing Charge Split (%)": np.round(sweep["standing_split"][s] * 100, 2),
+        "Band": np.asarray(band_labels, dtype=object)[b],
+        "Standing Charge (p/day)": sweep["standing_charge"].reshape(-1),
+        "Standard Rate (p/kWh)": sweep["unit_rate"].reshape(-1),
+        "Total Annual Cost (£)": sweep["tac"].reshape(-1),
+        "Margin (£/year)": np.round(sweep["margin"].reshape(-1), 2),
+    })
@@ -1,30 +1,31 @@
 import streamlit as st
 import json
-import requests
 from datetime import datetime
+from utils.template_registry import save_template, load_template, list_templates, import_bundled_templates
 
 st.set_page_config(page_title="NHH Margin Template Builder", layout="wide")
 st.title("🔧 NHH Margin Template Builder")
 
-# --- Test GitHub Connection ---
-st.markdown("### 🔗 Test GitHub Connection")
-github_url = "https://raw.githubusercontent.com/ChrisBeardsmore/Dyce/main/apps/power/templates/margin_template1.json"
-
-if st.button("🧪 Test GitHub Template Loading"):
-    try:
-        response = requests.get(github_url + f"?v={datetime.now().timestamp()}")
-        response.raise_for_status()
-        
-        content = response.text.strip()
-        if content.startswith('{') and content.endswith('}'):
-            template_data = response.json()
-            st.success("✅ GitHub template loaded successfully!")
-            st.json(template_data)
-        else:
-            st.error("❌ File still contains Python code. GitHub cache hasn't updated yet.")
-            st.code(content[:300] + "..." if len(content) > 300 else content)
-    except Exception as e:
-        st.error(f"❌ Error: {e}")
+# --- Local Template Registry ---
+st.markdown("### 📚 Template Registry")
+
+saved_templates = list_templates(kind="margin")
+if saved_templates.empty:
+    st.info("No templates saved locally yet.")
+    if st.button("📥 Import Bundled Templates"):
+        imported = import_bundled_templates()
+        st.success(f"✅ Imported {len(imported)} template(s) from templates/.")
+        st.rerun()
+else:
+    st.dataframe(saved_templates, use_container_width=True, hide_index=True)
+    reg_cols = st.columns(2)
+    selected_name = reg_cols[0].selectbox("Template", saved_templates["name"].unique())
+    versions = saved_templates.loc[saved_templates["name"] == selected_name, "version"].tolist()
+    selected_version = reg_cols[1].selectbox("Version", versions)
+    with st.expander("📋 View Stored Template"):
+        stored = load_template(selected_name, int(selected_version), kind="margin")
+        st.caption(f"Content hash: {stored['content_hash']}")
+        st.dataframe(stored["bands"], use_container_width=True, hide_index=True)
 
 st.markdown("---")
 
@@ -129,16 +130,18 @@ with col1:
         )
 
 with col2:
-    if st.button("📋 Copy JSON to Clipboard"):
-        json_data = json.dumps(template, indent=2)
-        st.code(json_data, language="json")
-        st.info("👆 Copy the JSON above")
+    if st.button("🗄️ Save to Template Registry"):
+        try:
+            version = save_template(template_name, template)
+            st.success(f"✅ Saved {template_name} as version {version}")
+        except ValueError as e:
+            st.error(f"❌ Template not saved: {e}")
 
 with col3:
     st.markdown("**🚀 Next Steps:**")
-    st.markdown("1. Download JSON")
-    st.markdown("2. Commit to GitHub")
-    st.markdown("3. Test URL above")
+    st.markdown("1. Save to the registry")
+    st.markdown("2. Select the template in your pricing tool")
+    st.markdown("3. Download JSON to share it")
 
 # --- Footer ---
 st.markdown("---")
@@ -1,7 +1,28 @@
 import streamlit as st
 import pandas as pd
+import hashlib
 import io
-from logic import generate_price_book
+import os
+import sys
+import tempfile
+
+# Add 'shared' directory to Python's module path
+SHARED_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "shared"))
+if SHARED_DIR not in sys.path:
+    sys.path.append(SHARED_DIR)
+
+from price_book_publisher import publish_price_book, zip_directory
+from logic.nhhc import generate_price_book
+from logic.hh_profile import ingest_hh_csv, build_masks, band_consumption, price_sites, profile_split as hh_profile_split
+
+@st.cache_data(show_spinner="Profiling half-hourly consumption...")
+def load_hh_band_kwh(upload_hash, year, _file_bytes):
+    # Cached by upload hash and year; the raw bytes are excluded from hashing
+    with tempfile.TemporaryDirectory() as store_dir:
+        sites, _, consumption = ingest_hh_csv(io.BytesIO(_file_bytes), store_dir, year)
+        band_kwh = band_consumption(consumption, build_masks(year), sites)
+        del consumption  # Release the memmap before the store is deleted
+    return band_kwh
 
 # Step 0: Page Setup
 st.set_page_config(layout="wide")
@@ -34,8 +55,25 @@ day_pct = col_day.slider("Day (%)", min_value=0, max_value=100, value=70)
 night_pct = col_night.slider("Night (%)", min_value=0, max_value=100, value=20)
 evw_pct = col_evw.slider("Evening & Weekend (%)", min_value=0, max_value=100, value=10)
 
+# Step 4A: Optionally derive the split from half-hourly consumption
+hh_file = st.file_uploader("Optional: Half-Hourly Consumption (.csv with MPXN, Timestamp, kWh)", type=["csv"])
+band_kwh = None
+if hh_file:
+    hh_year = st.number_input("Consumption Year", min_value=2000, max_value=2100, value=pd.Timestamp.today().year - 1)
+    hh_bytes = hh_file.getvalue()
+    band_kwh = load_hh_band_kwh(hashlib.sha1(hh_bytes).hexdigest(), int(hh_year), hh_bytes)
+    try:
+        hh_split = hh_profile_split(band_kwh)
+    except ValueError as e:
+        st.error(f"{e} Check the file and the consumption year.")
+        st.stop()
+    day_pct = hh_split["day"]
+    night_pct = hh_split["night"]
+    evw_pct = round(100 - day_pct - night_pct, 2)
+    st.info(f"Using half-hourly split across {len(band_kwh):,} sites: Day {day_pct}%, Night {night_pct}%, E&W {evw_pct}%")
+
 profile_total = day_pct + night_pct + evw_pct
-if profile_total != 100:
+if round(profile_total, 2) != 100:
     st.error("The total profile split must equal 100%.")
     st.stop()
 
@@ -56,57 +94,79 @@ bands = [
 # Step 5A: Load or Save Uplift Config
 import json
 from utils.config_handler import load_uplift_config  # You must have this file in /utils/
+from utils.template_registry import save_template, load_template, list_templates
 
 st.header("Step 5A: Load or Save Uplift Config")
 
+# Widget key prefix per uplift field
+UPLIFT_KEYS = {"uplift_standing": "sc", "uplift_day": "day", "uplift_night": "night", "uplift_evw": "evw"}
+
+def apply_uplift_config(source_id, config_bands):
+    # Keyed number_inputs ignore value= after their first render, so loaded
+    # values go into session state, once per newly selected config
+    if st.session_state.get("uplift_source") == source_id:
+        return
+    st.session_state.uplift_source = source_id
+    loaded = {(band["min"], band["max"]): band for band in config_bands}
+    for idx, band_range in enumerate(bands):
+        band = loaded.get(band_range, {})
+        for field, prefix in UPLIFT_KEYS.items():
+            st.session_state[f"{prefix}_{idx}"] = float(band.get(field, 0.0))
+
+saved_configs = list_templates(kind="uplift")
+registry_choice = st.selectbox(
+    "Load Uplift Config from Registry",
+    ["(none)"] + saved_configs["name"].unique().tolist()
+)
 uploaded_config = st.file_uploader("Load Existing Uplift Config (.json)", type=["json"])
-uplift_inputs = []
 
-if uploaded_config:
+if registry_choice != "(none)":
+    stored_config = load_template(registry_choice, kind="uplift")
+    apply_uplift_config(("registry", registry_choice, stored_config["version"]), stored_config["template"]["bands"])
+    st.success(f"Loaded config: {registry_choice} (version {stored_config['version']})")
+elif uploaded_config:
     loaded_config = load_uplift_config(uploaded_config)
-    uplift_inputs = loaded_config["bands"]
+    apply_uplift_config(("upload", uploaded_config.name, uploaded_config.size), loaded_config["bands"])
     st.success(f"Loaded config: {loaded_config['name']} ({loaded_config['date']})")
-else:
-    for idx, (min_val, max_val) in enumerate(bands):
-        uplift_inputs.append({
-            "min": min_val,
-            "max": max_val,
-            "uplift_standing": 0.0,
-            "uplift_day": 0.0,
-            "uplift_night": 0.0,
-            "uplift_evw": 0.0
-        })
 
+uplift_inputs = []
+for idx, (min_val, max_val) in enumerate(bands):
+    st.markdown(f"**Band {idx+1}: {min_val:,} – {max_val:,} kWh**")
+    cols = st.columns(4)
+    for prefix in UPLIFT_KEYS.values():
+        st.session_state.setdefault(f"{prefix}_{idx}", 0.0)
+    uplift_inputs.append({
+        "min": min_val,
+        "max": max_val,
+        "uplift_standing": cols[0].number_input(f"SC Uplift (p/day) - Band {idx+1}", step=0.1, key=f"sc_{idx}"),
+        "uplift_day": cols[1].number_input(f"Day Uplift (p/kWh) - Band {idx+1}", step=0.1, key=f"day_{idx}"),
+        "uplift_night": cols[2].number_input(f"Night Uplift (p/kWh) - Band {idx+1}", step=0.1, key=f"night_{idx}"),
+        "uplift_evw": cols[3].number_input(f"E/W Uplift (p/kWh) - Band {idx+1}", step=0.1, key=f"evw_{idx}")
+    })
+
+# Saved after the widgets are drawn, so the config holds what is on screen
 with st.expander("💾 Save Current Uplift Config", expanded=False):
     config_name = st.text_input("Name this uplift version", value="Sep24_Sculpted")
     config_notes = st.text_area("Notes", value="Trial pricing for September")
+    config_dict = {
+        "name": config_name,
+        "date": str(pd.Timestamp.today().date()),
+        "notes": config_notes,
+        "bands": uplift_inputs
+    }
     if st.button("Download Config as JSON"):
-        config_dict = {
-            "name": config_name,
-            "date": str(pd.Timestamp.today().date()),
-            "notes": config_notes,
-            "bands": uplift_inputs
-        }
         st.download_button(
             label="Download JSON",
             data=json.dumps(config_dict, indent=2),
             file_name=f"{config_name}.json",
             mime="application/json"
         )
-
-uplift_inputs = []
-
-for idx, (min_val, max_val) in enumerate(bands):
-    st.markdown(f"**Band {idx+1}: {min_val:,} – {max_val:,} kWh**")
-    cols = st.columns(4)
-    uplift_inputs.append({
-        "min": min_val,
-        "max": max_val,
-        "uplift_standing": cols[0].number_input(f"SC Uplift (p/day) - Band {idx+1}", value=0.0, step=0.1, key=f"sc_{idx}"),
-        "uplift_day": cols[1].number_input(f"Day Uplift (p/kWh) - Band {idx+1}", value=0.0, step=0.1, key=f"day_{idx}"),
-        "uplift_night": cols[2].number_input(f"Night Uplift (p/kWh) - Band {idx+1}", value=0.0, step=0.1, key=f"night_{idx}"),
-        "uplift_evw": cols[3].number_input(f"E/W Uplift (p/kWh) - Band {idx+1}", value=0.0, step=0.1, key=f"evw_{idx}")
-    })
+    if st.button("Save Config to Registry"):
+        try:
+            version = save_template(config_name, config_dict)
+            st.success(f"Saved {config_name} as version {version}")
+        except ValueError as e:
+            st.error(f"Config not saved: {e}")
 
 # Step 6: Generate and Download Excel Price Book
 st.header("Step 6: Generate Excel Price Book")
@@ -136,3 +196,54 @@ if st.button("Generate Excel Price Book"):
         data=output.getvalue(),
         file_name=f"{report_title}.xlsx",
         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
+
+    # Exact per-site costs from the half-hourly volumes, at each site's band rates
+    if band_kwh is not None:
+        site_costs = price_sites(band_kwh, bands, result_df)
+        st.subheader("Half-Hourly Site Costs")
+        st.caption(f"Portfolio TAC from HH volumes: £{site_costs['Total Annual Cost (£)'].sum():,.2f} "
+                   f"({site_costs['Total Annual Cost (£)'].notna().sum():,} of {len(site_costs):,} sites priced)")
+        st.dataframe(site_costs)
+        st.download_button(
+            label="Download HH Site Costs (.csv)",
+            data=site_costs.to_csv().encode("utf-8"),
+            file_name=f"{report_title}_hh_sites.csv",
+            mime="text/csv"
+        )
+
+# Step 7: Publish partitioned price book for broker portals
+st.header("Step 7: Publish Partitioned Price Book")
+if st.button("Publish All Durations and Tariffs"):
+    books = []
+    for duration in sorted(df["Contract_Duration"].unique()):
+        for tariff in ["Standard", "Green"]:
+            book = generate_price_book(
+                df=df,
+                bands=bands,
+                uplifts=uplift_inputs,
+                total_cost=total_cost_input,
+                standing_pct=cost_split_slider / 100,
+                contract_duration=duration,
+                green_option=tariff,
+                profile_split=profile_split
+            )
+            book.insert(0, "Tariff", tariff)
+            book.insert(0, "Contract_Duration", duration)
+            books.append(book)
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        manifest = publish_price_book(
+            pd.concat(books, ignore_index=True), out_dir,
+            partition_cols=["Contract_Duration", "Tariff"],
+            stem=report_title
+        )
+        bundle = zip_directory(out_dir)
+
+    st.success(f"Published {manifest['total_rows']:,} rows across {len(manifest['partitions'])} partitions.")
+    st.download_button(
+        label="Download Partitioned Price Book (.zip)",
+        data=bundle,
+        file_name=f"{report_title}_partitioned.zip",
+        mime="application/zip"
+    )
@@ -1,6 +1,8 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import io
+from logic.uplift_sweep import get_band_base_rates, sweep_uplifts, cheapest_configuration, sweep_to_frame
 
 st.set_page_config(layout="wide")
 st.title("NHH Pricing Tool – Margin Sculptor")
@@ -126,5 +128,66 @@ if uploaded_file:
             file_name=f"{report_title}.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         )
+
+    # --- STEP 5: Uplift Scenario Sweep ---
+    st.markdown("### 🔳 **Step 5: Uplift Scenario Sweep**")
+
+    with st.expander("Sweep margin and standing charge split", expanded=False):
+        st.caption(f"Recovery cost is fixed at £{recovery_cost:,.2f}/year per meter (Step 3).")
+
+        sweep_cols = st.columns(3)
+        margin_to = 100.0 if margin_type == "£ per meter" else 5.0
+        margin_step = 5.0 if margin_type == "£ per meter" else 0.1
+        mar_min = sweep_cols[0].number_input(f"Margin From ({margin_type})", value=0.0, step=margin_step)
+        mar_max = sweep_cols[1].number_input(f"Margin To ({margin_type})", value=margin_to, step=margin_step)
+        mar_step = sweep_cols[2].number_input(f"Margin Step ({margin_type})", value=margin_step, min_value=0.001, step=margin_step)
+
+        sweep_cols = st.columns(3)
+        split_min = sweep_cols[0].slider("Standing Charge Split From (%)", 0, 100, 0)
+        split_max = sweep_cols[1].slider("Standing Charge Split To (%)", 0, 100, 100)
+        split_step = sweep_cols[2].number_input("Split Step (%)", value=10, min_value=1, max_value=100)
+
+        target_margin = st.number_input("Target Margin per Meter in Every Band (£/year)", value=40.0, step=5.0)
+
+        if st.button("Run Uplift Sweep"):
+            margin_grid = np.arange(mar_min, mar_max + mar_step / 2, mar_step)
+            split_grid = np.arange(split_min, split_max + split_step / 2, split_step) / 100
+
+            base_sc, base_rate = get_band_base_rates(df, custom_bands, contract_duration, green_option)
+            mid_kwh = [(min_kwh + max_kwh) / 2 for min_kwh, max_kwh in custom_bands]
+            band_labels = [f"{min_kwh:,} – {max_kwh:,}" for min_kwh, max_kwh in custom_bands]
+
+            sweep = sweep_uplifts(base_sc, base_rate, mid_kwh, recovery_cost, margin_grid, split_grid, margin_type)
+            st.info(f"Evaluated {len(margin_grid) * len(split_grid):,} configurations "
+                    f"across {len(custom_bands)} bands.")
+
+            best = cheapest_configuration(sweep, target_margin)
+            if best is None:
+                st.warning("No configuration in the sweep meets the target margin in every band.")
+            else:
+                st.success(
+                    f"Cheapest qualifying configuration: margin {best['margin_value']:g} ({margin_type}), "
+                    f"{best['standing_split'] * 100:g}% on standing charge – portfolio TAC £{best['portfolio_tac']:,.2f}"
+                )
+                st.caption("TAC is each band's full bill at mid-band consumption. The split barely changes it, "
+                           "so equal-cost configurations go to the lowest margin, then the split nearest 50%.")
+                st.dataframe(pd.DataFrame({
+                    "Band": band_labels,
+                    "Standing Charge (p/day)": best["standing_charge"],
+                    "Standard Rate (p/kWh)": best["unit_rate"],
+                    "Total Annual Cost (£)": best["tac"],
+                    "Margin (£/year)": np.round(best["margin"], 2),
+                }))
+
+            surface_df = sweep_to_frame(sweep, band_labels)
+            output = io.BytesIO()
+            with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
+                surface_df.to_excel(writer, index=False, sheet_name="Sweep Surface")
+            st.download_button(
+                label="Download Sweep Surface",
+                data=output.getvalue(),
+                file_name=f"{report_title}_sweep.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            )
 else:
     st.info("Please upload the pricing flat file to begin.")
@@ -0,0 +1,205 @@
+# utils/template_registry.py
+# -----------------------------------------
+# Purpose: Local, versioned store for band/uplift templates
+# Notes:
+#   - Templates live in SQLite next to the bundled JSON templates; no network access
+#   - Every save is validated once and stored with a SHA-256 content hash;
+#     saving identical content again returns the existing version
+#   - Versions are numbered per (name, kind), so a margin template and an
+#     uplift config can share a name
+#   - One connection per database path is opened (and the schema created)
+#     on first use and kept for the life of the process
+#   - Compiled band tables are cached in-process by version; the latest
+#     version per name is cached too and dropped whenever PRAGMA data_version
+#     shows another process has committed, so a repeat load never touches disk
+# -----------------------------------------
+import hashlib
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+TEMPLATE_DIR = Path(__file__).resolve().parents[1] / "templates"
+REGISTRY_PATH = TEMPLATE_DIR / "margin_templates.db"
+
+# Band keys per template kind: stage-one margin templates and nhh_cost uplift configs
+TEMPLATE_KINDS = {
+    "margin": ("Min", "Max", ["Standard_Rate", "Day_Rate", "Night_Rate", "Evening_And_Weekend_Rate", "Standing_Charge"]),
+    "uplift": ("min", "max", ["uplift_standing", "uplift_day", "uplift_night", "uplift_evw"]),
+}
+
+_compiled_cache = {}   # (db_path, kind, name, version) -> compiled template
+_latest_cache = {}     # (db_path, kind, name) -> latest version
+_connections = {}      # db_path -> [connection, last seen data_version]
+_lock = threading.Lock()
+
+REGISTRY_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS margin_templates (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        version INTEGER NOT NULL,
+        kind TEXT NOT NULL,
+        content_hash TEXT NOT NULL,
+        template_json TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        UNIQUE (name, kind, version)
+    )
+"""
+
+
+def _connect(db_path):
+    """Return the shared connection for db_path, creating the schema on first use (call with _lock held)."""
+    key = str(db_path)
+    entry = _connections.get(key)
+    if entry is None:
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        with conn:
+            conn.execute(REGISTRY_SCHEMA)
+        entry = _connections[key] = [conn, conn.execute("PRAGMA data_version").fetchone()[0]]
+    return entry[0]
+
+
+def _drop_stale_latest(db_path):
+    """Forget cached latest versions if another connection has committed since the last check (call with _lock held)."""
+    entry = _connections[str(db_path)]
+    data_version = entry[0].execute("PRAGMA data_version").fetchone()[0]
+    if data_version != entry[1]:
+        entry[1] = data_version
+        for key in [k for k in _latest_cache if k[0] == str(db_path)]:
+            del _latest_cache[key]
+
+
+def content_hash(template: dict) -> str:
+    """SHA-256 of the template's bands in canonical JSON form (metadata such as dates is ignored)."""
+    canonical = json.dumps(template.get("bands"), sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def validate_template(template: dict) -> str:
+    """Check a template's bands and return its kind; raises ValueError if invalid."""
+    bands = template.get("bands")
+    if not isinstance(bands, list) or not bands:
+        raise ValueError("Template must contain a non-empty 'bands' list.")
+
+    kind = next((k for k, (lo, hi, _) in TEMPLATE_KINDS.items() if lo in bands[0] and hi in bands[0]), None)
+    if kind is None:
+        raise ValueError("Bands must define Min/Max (margin template) or min/max (uplift config).")
+
+    lo_key, hi_key, value_keys = TEMPLATE_KINDS[kind]
+    previous_max = None
+    for i, band in enumerate(sorted(bands, key=lambda b: float(b.get(lo_key, 0)))):
+        for key in [lo_key, hi_key] + value_keys:
+            if key not in band:
+                raise ValueError(f"Band {i + 1} is missing '{key}'.")
+            try:
+                float(band[key])
+            except (TypeError, ValueError):
+                raise ValueError(f"Band {i + 1} has a non-numeric '{key}': {band[key]!r}")
+        if float(band[lo_key]) > float(band[hi_key]):
+            raise ValueError(f"Band {i + 1} has {lo_key} above {hi_key}.")
+        if previous_max is not None and float(band[lo_key]) < previous_max:
+            raise ValueError(f"Band {i + 1} overlaps the band below it.")
+        previous_max = float(band[hi_key])
+
+    return kind
+
+
+def _compile(name, version, kind, digest, template):
+    lo_key, hi_key, value_keys = TEMPLATE_KINDS[kind]
+    bands = pd.DataFrame(template["bands"])[[lo_key, hi_key] + value_keys].astype(float)
+    return {
+        "name": name,
+        "version": version,
+        "kind": kind,
+        "content_hash": digest,
+        "template": template,
+        "bands": bands.sort_values(lo_key).reset_index(drop=True),
+    }
+
+
+def save_template(name: str, template: dict, db_path=REGISTRY_PATH) -> int:
+    """Validate and store a template, returning its version number."""
+    kind = validate_template(template)
+    digest = content_hash(template)
+
+    with _lock:
+        conn = _connect(db_path)
+        with conn:
+            latest = conn.execute(
+                "SELECT version, content_hash FROM margin_templates WHERE name = ? AND kind = ? "
+                "ORDER BY version DESC LIMIT 1",
+                (name, kind)
+            ).fetchone()
+            if latest and latest[1] == digest:
+                version = latest[0]
+            else:
+                version = (latest[0] if latest else 0) + 1
+                conn.execute(
+                    "INSERT INTO margin_templates (name, version, kind, content_hash, template_json, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (name, version, kind, digest, json.dumps(template, default=str), datetime.now().isoformat())
+                )
+        _drop_stale_latest(db_path)
+        _latest_cache[(str(db_path), kind, name)] = version
+        _compiled_cache[(str(db_path), kind, name, version)] = _compile(name, version, kind, digest, template)
+    return version
+
+
+def load_template(name: str, version: int = None, kind: str = "margin", db_path=REGISTRY_PATH) -> dict:
+    """Return the compiled template (raw JSON plus a sorted band table); latest version by default."""
+    if kind not in TEMPLATE_KINDS:
+        raise ValueError(f"Unknown template kind: {kind!r}")
+
+    with _lock:
+        conn = _connect(db_path)
+        if version is None:
+            _drop_stale_latest(db_path)
+            version = _latest_cache.get((str(db_path), kind, name))
+        if version is None:
+            row = conn.execute(
+                "SELECT version FROM margin_templates WHERE name = ? AND kind = ? ORDER BY version DESC LIMIT 1",
+                (name, kind)
+            ).fetchone()
+            if row is None:
+                raise KeyError(f"No {kind} template named {name!r}")
+            version = _latest_cache[(str(db_path), kind, name)] = row[0]
+
+        key = (str(db_path), kind, name, version)
+        cached = _compiled_cache.get(key)
+        if cached is not None:
+            return cached
+        row = conn.execute(
+            "SELECT content_hash, template_json FROM margin_templates WHERE name = ? AND kind = ? AND version = ?",
+            (name, kind, version)
+        ).fetchone()
+        if row is None:
+            raise KeyError(f"No {kind} template named {name!r} at version {version}")
+
+        compiled = _compile(name, version, kind, row[0], json.loads(row[1]))
+        _compiled_cache[key] = compiled
+    return compiled
+
+
+def list_templates(db_path=REGISTRY_PATH, kind: str = None) -> pd.DataFrame:
+    """List every stored template version, newest first."""
+    sql = "SELECT name, version, kind, content_hash, created_at FROM margin_templates"
+    params = ()
+    if kind:
+        sql += " WHERE kind = ?"
+        params = (kind,)
+    with _lock:
+        return pd.read_sql_query(sql + " ORDER BY name, kind, version DESC", _connect(db_path), params=params)
+
+
+def import_bundled_templates(db_path=REGISTRY_PATH) -> list:
+    """Register the JSON templates shipped in templates/, skipping unchanged ones."""
+    imported = []
+    for path in sorted(TEMPLATE_DIR.glob("*.json")):
+        with open(path) as f:
+            template = json.load(f)
+        name = template.get("template_name") or template.get("name") or path.stem
+        imported.append((name, save_template(name, template, db_path)))
+    return imported
@@ -0,0 +1,147 @@
+# -----------------------------------------
+# File: price_book_publisher.py
+# Purpose: Publish price books partitioned by region, duration and tariff
+#          into Parquet, CSV and XLSX, with a manifest for broker portals
+# Notes:
+#   - Each partition is sliced once and written to every format from the
+#     same frame, so all formats carry identical rows
+#   - Partitions are written in parallel on a thread pool
+#   - manifest.json lists row counts, sizes and SHA-256 checksums per file
+#   - Folder labels are percent-encoded, so distinct values ("A B", "A_B")
+#     never share a folder
+# -----------------------------------------
+
+import hashlib
+import io
+import json
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_FORMATS = ("parquet", "csv", "xlsx")
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _partition_dir(partition_cols, key) -> str:
+    """Hive-style folder name, e.g. LDZ=NW/Contract_Duration=12."""
+    parts = []
+    for col, value in zip(partition_cols, key):
+        if pd.isna(value):
+            label = "__null__"
+        else:
+            label = quote(str(value), safe="-.")
+            if label in (".", "..", "__null__"):
+                # Would be the folder itself, its parent, or the null partition
+                label = "".join(f"%{ord(ch):02X}" for ch in label)
+        parts.append(f"{col}={label}")
+    return "/".join(parts)
+
+
+def _json_value(value):
+    if pd.isna(value):
+        return None
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _write_partition(frame: pd.DataFrame, folder: Path, formats, stem: str) -> list:
+    folder.mkdir(parents=True, exist_ok=True)
+    written = []
+    for fmt in formats:
+        path = folder / f"{stem}.{fmt}"
+        if fmt == "parquet":
+            frame.to_parquet(path, index=False)
+        elif fmt == "csv":
+            frame.to_csv(path, index=False)
+        elif fmt == "xlsx":
+            with pd.ExcelWriter(path, engine="xlsxwriter") as writer:
+                frame.to_excel(writer, index=False, sheet_name="Price Book")
+        else:
+            raise ValueError(f"Unsupported price book format: {fmt}")
+        written.append({"format": fmt, "path": str(path), "bytes": path.stat().st_size, "sha256": _file_sha256(path)})
+    return written
+
+
+# -----------------------------------------
+# Function: publish_price_book
+# Purpose: Write one file per partition and format, plus manifest.json.
+# Inputs:
+#   - df (pd.DataFrame): Priced book, one row per quote line
+#   - out_dir (str | Path): Destination folder (created if missing)
+#   - partition_cols (list[str]): e.g. ["LDZ", "Contract_Duration", "Carbon_Offset"];
+#     every column must exist in df (ValueError otherwise)
+#   - formats (tuple[str]): Any of "parquet", "csv", "xlsx"
+#   - stem (str): File name used inside every partition folder
+#   - max_workers (int, optional): Thread pool size
+# Returns:
+#   - dict: The manifest, also written to out_dir/manifest.json
+# Notes:
+#   - "N/A" placeholders become nulls so numeric columns stay numeric
+# -----------------------------------------
+def publish_price_book(df: pd.DataFrame, out_dir, partition_cols: list, formats=DEFAULT_FORMATS,
+                       stem: str = "price_book", max_workers: int = None) -> dict:
+    """Publish a price book partitioned by the given columns in every requested format."""
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    missing = [col for col in partition_cols if col not in df.columns]
+    if missing:
+        raise ValueError(f"Partition columns not in the price book: {', '.join(map(str, missing))}")
+    partition_cols = list(partition_cols)
+    book = df.replace("N/A", np.nan).infer_objects().reset_index(drop=True)
+
+    if partition_cols:
+        groups = [(key if isinstance(key, tuple) else (key,), frame)
+                  for key, frame in book.groupby(partition_cols, sort=True, dropna=False)]
+    else:
+        groups = [((), book)]
+
+    def publish(group):
+        key, frame = group
+        folder = out_dir / _partition_dir(partition_cols, key)
+        files = _write_partition(frame.reset_index(drop=True), folder, formats, stem)
+        for entry in files:
+            entry["path"] = Path(entry["path"]).relative_to(out_dir).as_posix()
+        return {
+            "partition": {col: _json_value(value) for col, value in zip(partition_cols, key)},
+            "rows": len(frame),
+            "files": files,
+        }
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        partitions = list(pool.map(publish, groups))
+
+    manifest = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "partition_columns": partition_cols,
+        "formats": list(formats),
+        "total_rows": int(sum(p["rows"] for p in partitions)),
+        "columns": [str(col) for col in book.columns],
+        "partitions": partitions,
+    }
+    with open(out_dir / "manifest.json", "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def zip_directory(folder) -> bytes:
+    """Bundle a published price book folder into an in-memory zip."""
+
+    folder = Path(folder)
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as bundle:
+        for path in sorted(folder.rglob("*")):
+            if path.is_file():
+                bundle.write(path, path.relative_to(folder).as_posix())
+    return output.getvalue()
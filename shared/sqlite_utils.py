@@ -1,23 +1,239 @@
+# -----------------------------------------
+# File: sqlite_utils.py
+# Purpose: Shared SQLite access for the Dyce apps and tools
+# Notes:
+#   - Connections come from a per-database pool: each thread keeps one
+#     connection for its lifetime, and it goes back to the pool when the
+#     thread ends (Streamlit runs every rerun on a fresh thread)
+#   - Every connection runs in WAL mode with synchronous=NORMAL, a busy
+#     timeout and memory-mapped reads, so readers never block the writer
+#     and concurrent sessions wait briefly instead of failing "locked"
+#   - get_read_connection() opens the file read-only (mode=ro) for
+#     reporting pages, which can't take the write lock by accident
+#   - Don't close pooled connections; use open_connection() for a
+#     private one
+#   - insert_many/upsert_many write any number of rows (dicts or a
+#     DataFrame) with one prepared statement in one transaction
+#   - gpt_memory is indexed on (app, timestamp, id) for keyset paging and
+#     mirrored into an FTS5 table (kept in sync by triggers) for search
+#   - BufferedWriter queues log/audit rows in memory and writes them in
+#     batches on a background thread; log_gpt_note() goes through it, so
+#     callers never wait on SQLite. Pending rows are flushed at exit; a
+#     failed write keeps them queued, and a writer whose thread has died
+#     hands its queue to the replacement get_buffered_writer() starts
+# -----------------------------------------
+
+import atexit
+import os
 import sqlite3
+import threading
+import weakref
+from collections import deque
 from datetime import datetime
+from itertools import chain, islice
+
+import pandas as pd
+
+DEFAULT_DB = "dyce.db"
+BUSY_TIMEOUT_MS = 5000
+MMAP_SIZE = 256 * 1024 * 1024
+MAX_IDLE_CONNECTIONS = 8
+WRITE_CHUNK_ROWS = 10_000
+MEMORY_PAGE_SIZE = 50
+FLUSH_ROWS = 200
+FLUSH_SECONDS = 1.0
+
+
+# --- Connections ---
+def _apply_pragmas(conn, read_only: bool = False):
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+    if not read_only:
+        conn.execute("PRAGMA journal_mode = WAL")  # Persistent: stored in the database file
+        conn.execute("PRAGMA synchronous = NORMAL")
+
+
+def open_connection(db_path=DEFAULT_DB, read_only: bool = False):
+    """New, unpooled connection with the standard pragmas (caller closes it)."""
+    if read_only:
+        uri = f"file:{os.path.abspath(db_path)}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+    else:
+        conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+    _apply_pragmas(conn, read_only)
+    return conn
+
+
+class _Lease:
+    """A thread's hold on a pooled connection; released when the thread's locals are dropped."""
+
+    def __init__(self, pool, conn):
+        self.conn = conn
+        weakref.finalize(self, pool._release, conn)
+
+
+class ConnectionPool:
+    """Per-thread connections to one database file, reused across threads."""
+
+    def __init__(self, db_path, read_only: bool = False, max_idle: int = MAX_IDLE_CONNECTIONS):
+        self.db_path = db_path
+        self.read_only = read_only
+        self.max_idle = max_idle
+        self._local = threading.local()
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def get(self):
+        """This thread's connection, taken from the idle list or opened on first use."""
+        lease = getattr(self._local, "lease", None)
+        if lease is None:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                conn = open_connection(self.db_path, self.read_only)
+            lease = self._local.lease = _Lease(self, conn)
+        return lease.conn
+
+    def _release(self, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()  # Thread ended mid-transaction; don't hand its locks on
+        except sqlite3.ProgrammingError:
+            return  # Closed by its user
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close_idle(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path=DEFAULT_DB, read_only: bool = False) -> ConnectionPool:
+    """Process-wide pool for a database file."""
+    key = (os.path.abspath(db_path), read_only)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(db_path, read_only)
+        return _pools[key]
+
+
+def get_connection(db_path=DEFAULT_DB):
+    """This thread's pooled read/write connection (WAL)."""
+    return get_pool(db_path).get()
+
 
-# --- Existing functions ---
-def get_connection(db_path="dyce.db"):
-    return sqlite3.connect(db_path)
+def get_read_connection(db_path=DEFAULT_DB):
+    """This thread's pooled read-only connection, for reporting queries."""
+    get_connection(db_path)  # The file must exist (and be in WAL mode) before opening it read-only
+    return get_pool(db_path, read_only=True).get()
 
+
+# --- Tables and rows ---
 def create_table(conn, create_sql):
     with conn:
         conn.execute(create_sql)
 
+
 def insert_row(conn, table, data_dict):
-    ...
+    columns = ', '.join(data_dict.keys())
+    placeholders = ', '.join(['?'] * len(data_dict))
+    values = tuple(data_dict.values())
+    sql = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
+    with conn:
+        conn.execute(sql, values)
+
+
+def _row_chunks(rows, columns, chunk_rows):
+    """Parameter tuples in chunks of chunk_rows, from a DataFrame or an iterable of dicts."""
+    if isinstance(rows, pd.DataFrame):
+        for start in range(0, len(rows), chunk_rows):
+            block = rows.iloc[start:start + chunk_rows][columns]
+            for col in block.columns:
+                if pd.api.types.is_datetime64_any_dtype(block[col]):
+                    block[col] = block[col].map(lambda t: t.isoformat() if pd.notna(t) else None)
+            # object dtype hands sqlite3 plain Python values; NaN/NaT become NULL
+            block = block.astype(object)
+            yield list(block.where(block.notna(), None).itertuples(index=False, name=None))
+        return
+    rows = iter(rows)
+    while True:
+        chunk = [tuple(row.get(col) for col in columns) for row in islice(rows, chunk_rows)]
+        if not chunk:
+            return
+        yield chunk
+
+
+def _write_many(conn, sql, rows, columns, chunk_rows) -> int:
+    count = 0
+    with conn:  # One transaction (one fsync) for every chunk
+        for chunk in _row_chunks(rows, columns, chunk_rows):
+            conn.executemany(sql, chunk)
+            count += len(chunk)
+    return count
+
+
+def _columns(rows, columns):
+    """Explicit columns, else the DataFrame's, else the first dict's keys (and a re-chained iterator)."""
+    if columns is not None:
+        return list(columns), rows
+    if isinstance(rows, pd.DataFrame):
+        return list(rows.columns), rows
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return None, rows
+    return list(first.keys()), chain([first], rows)
+
+
+def insert_many(conn, table, rows, columns=None, chunk_rows: int = WRITE_CHUNK_ROWS) -> int:
+    """Insert an iterable of dicts or a DataFrame in one transaction; returns the row count."""
+    columns, rows = _columns(rows, columns)
+    if not columns:
+        return 0
+    placeholders = ', '.join(['?'] * len(columns))
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+    return _write_many(conn, sql, rows, columns, chunk_rows)
+
+
+def upsert_many(conn, table, rows, key_columns, columns=None, chunk_rows: int = WRITE_CHUNK_ROWS) -> int:
+    """
+    Insert or update rows on a conflict with key_columns (which need a
+    UNIQUE index). Non-key columns are overwritten; returns the row count.
+    """
+    columns, rows = _columns(rows, columns)
+    if not columns:
+        return 0
+    placeholders = ', '.join(['?'] * len(columns))
+    updates = [col for col in columns if col not in key_columns]
+    action = (
+        "DO UPDATE SET " + ', '.join(f"{col} = excluded.{col}" for col in updates)
+        if updates else "DO NOTHING"
+    )
+    sql = (
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) "
+        f"ON CONFLICT ({', '.join(key_columns)}) {action}"
+    )
+    return _write_many(conn, sql, rows, columns, chunk_rows)
+
 
 def select_all(conn, table):
-    ...
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT * FROM {table}")
+    return cursor.fetchall()
 
-# --- New: GPT memory functions ---
-def create_memory_table(conn):
-    sql = """
+
+# --- GPT memory functions ---
+MEMORY_SCHEMA = [
+    """
     CREATE TABLE IF NOT EXISTS gpt_memory (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         app TEXT,
@@ -25,9 +241,46 @@ def create_memory_table(conn):
         user TEXT,
         message TEXT
     )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_gpt_memory_app_timestamp ON gpt_memory (app, timestamp, id)",
     """
+    CREATE VIRTUAL TABLE IF NOT EXISTS gpt_memory_fts USING fts5(
+        message, content='gpt_memory', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_gpt_memory_fts_insert AFTER INSERT ON gpt_memory
+    BEGIN
+        INSERT INTO gpt_memory_fts (rowid, message) VALUES (NEW.id, NEW.message);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_gpt_memory_fts_delete AFTER DELETE ON gpt_memory
+    BEGIN
+        INSERT INTO gpt_memory_fts (gpt_memory_fts, rowid, message) VALUES ('delete', OLD.id, OLD.message);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_gpt_memory_fts_update AFTER UPDATE OF message ON gpt_memory
+    BEGIN
+        INSERT INTO gpt_memory_fts (gpt_memory_fts, rowid, message) VALUES ('delete', OLD.id, OLD.message);
+        INSERT INTO gpt_memory_fts (rowid, message) VALUES (NEW.id, NEW.message);
+    END
+    """,
+]
+
+
+def create_memory_table(conn):
     with conn:
-        conn.execute(sql)
+        fts_exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'gpt_memory_fts'"
+        ).fetchone()
+        for sql in MEMORY_SCHEMA:
+            conn.execute(sql)
+        if not fts_exists:
+            # Index notes logged before search existed
+            conn.execute("INSERT INTO gpt_memory_fts (gpt_memory_fts) VALUES ('rebuild')")
+
 
 def log_gpt_memory(conn, app, message, user="Anna"):
     sql = """
@@ -37,49 +290,182 @@ def log_gpt_memory(conn, app, message, user="Anna"):
     with conn:
         conn.execute(sql, (app, datetime.utcnow().isoformat(), user, message))
 
+
 def get_memory(conn, app=None):
     sql = "SELECT * FROM gpt_memory"
     if app:
         sql += " WHERE app = ? ORDER BY timestamp DESC"
         return conn.execute(sql, (app,)).fetchall()
     return conn.execute(sql + " ORDER BY timestamp DESC").fetchall()
-import sqlite3
 
-def get_connection(db_path="dyce.db"):
-    return sqlite3.connect(db_path)
 
-def create_table(conn, create_sql):
-    with conn:
-        conn.execute(create_sql)
+def _fts_query(text):
+    """Each word as a quoted prefix term, so user input can't break FTS syntax."""
+    terms = ['"' + word.replace('"', '""') + '"*' for word in text.split()]
+    return ' '.join(terms)
 
-def insert_row(conn, table, data_dict):
-    columns = ', '.join(data_dict.keys())
-    placeholders = ', '.join(['?'] * len(data_dict))
-    values = tuple(data_dict.values())
-    sql = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
-    with conn:
-        conn.execute(sql, values)
-        
-def select_all(conn, table):
-    cursor = conn.cursor()
-    cursor.execute(f"SELECT * FROM {table}")
-    return cursor.fetchall()   
 
-from sqlite_utils import get_connection, create_memory_table, log_gpt_memory, get_memory
+def get_memory_page(conn, app=None, search=None, limit: int = MEMORY_PAGE_SIZE, before=None):
+    """
+    One page of notes, newest first, optionally filtered by app and a
+    full-text search. `before` is the cursor returned for the previous
+    page; returns (rows, cursor for the next page or None).
+    Notes:
+        - Browsing walks the (app, timestamp, id) index
+        - Search walks the FTS matches by rowid (notes are logged in time
+          order), so a common word stops after one page instead of
+          sorting every match
+    """
+    clauses, params = [], []
+    if search and search.strip():
+        source = "gpt_memory_fts f JOIN gpt_memory m ON m.id = f.rowid"
+        order = "f.rowid DESC"
+        clauses.append("gpt_memory_fts MATCH ?")
+        params.append(_fts_query(search))
+        if before is not None:
+            clauses.append("f.rowid < ?")
+            params.append(before[1])
+    else:
+        source = "gpt_memory m"
+        order = "m.timestamp DESC, m.id DESC"
+        if before is not None:
+            clauses.append("(m.timestamp, m.id) < (?, ?)")
+            params.extend(before)
+    if app:
+        clauses.append("m.app = ?")
+        params.append(app)
 
-conn = get_connection()
-create_memory_table(conn)  # Set up the table if it doesn't exist
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    rows = conn.execute(f"""
+        SELECT m.id, m.app, m.timestamp, m.user, m.message
+        FROM {source}
+        {where}
+        ORDER BY {order}
+        LIMIT ?
+    """, (*params, limit + 1)).fetchall()
 
-# Log a message
-log_gpt_memory(conn, app="gas", message="Updated margin logic in gpricebook.py")
+    # One extra row tells us whether there is a next page
+    page = rows[:limit]
+    cursor = (page[-1][2], page[-1][0]) if len(rows) > limit else None
+    return page, cursor
 
-# View recent logs
-logs = get_memory(conn, app="gas")
-for row in logs:
-    print(row)
 
-def log_gpt_note(app, message):
-    conn = get_connection()
-    create_memory_table(conn)
-    log_gpt_memory(conn, app=app, message=message, user="GPT")
+# --- Buffered background writes ---
+class BufferedWriter(threading.Thread):
+    """Queues rows for one table and writes them in batches on a background thread."""
+
+    def __init__(self, db_path, table, setup=None, flush_rows: int = FLUSH_ROWS,
+                 flush_seconds: float = FLUSH_SECONDS):
+        super().__init__(name=f"sqlite-writer-{table}", daemon=True)
+        self.db_path = db_path
+        self.table = table
+        self.setup = setup
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.last_error = None
+        self._buffer = deque()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._progress = threading.Condition()
+        self._queued = 0
+        self._written = 0
+
+    # --- Callers ---
+    def log(self, row: dict):
+        """Queue one row (a dict of column values); returns immediately."""
+        with self._progress:
+            self._buffer.append(row)
+            self._queued += 1
+            if len(self._buffer) >= self.flush_rows:
+                self._wake.set()
 
+    def take_over(self, dead: "BufferedWriter"):
+        """Adopt a dead writer's queue and counters, so nothing it held is lost (call before start())."""
+        with dead._progress:
+            self._buffer = dead._buffer
+            self._queued = dead._queued
+            self._written = dead._written
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Write everything queued so far; True once it is in the database."""
+        with self._progress:
+            target = self._queued
+            self._wake.set()
+            return self._progress.wait_for(lambda: self._written >= target, timeout)
+
+    def close(self, timeout: float = 10.0):
+        """Flush pending rows and stop the thread (registered with atexit)."""
+        self._stopping.set()
+        self._wake.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    # --- Background thread ---
+    def run(self):
+        conn = None
+        while True:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            try:
+                if conn is None:
+                    conn = open_connection(self.db_path)
+                    if self.setup:
+                        self.setup(conn)
+                self._write(conn)
+                self.last_error = None
+            except Exception as e:
+                # Rows stay queued and are retried next cycle on a fresh connection
+                self.last_error = f"{type(e).__name__}: {e}"
+                if conn is not None:
+                    conn.close()
+                    conn = None
+                if self._stopping.is_set():
+                    break
+            if self._stopping.is_set() and not self._buffer:
+                break
+        if conn is not None:
+            conn.close()
+
+    def _write(self, conn):
+        batch = []
+        while self._buffer:
+            batch.append(self._buffer.popleft())
+        if not batch:
+            return
+        try:
+            insert_many(conn, self.table, batch)
+        except BaseException:
+            self._buffer.extendleft(reversed(batch))
+            raise
+        with self._progress:
+            self._written += len(batch)
+            self._progress.notify_all()
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_buffered_writer(db_path=DEFAULT_DB, table="gpt_memory", setup=create_memory_table) -> BufferedWriter:
+    """Process-wide, already started writer for a table; flushed at interpreter exit."""
+    key = (os.path.abspath(db_path), table)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None or not writer.is_alive():
+            replacement = BufferedWriter(db_path, table, setup)
+            if writer is not None:
+                replacement.take_over(writer)
+            writer = _writers[key] = replacement
+            writer.start()
+            atexit.register(writer.close)
+        return writer
+
+
+def log_gpt_note(app, message):
+    """Queue a GPT memory note; it is written in the background within FLUSH_SECONDS."""
+    get_buffered_writer().log({
+        "app": app,
+        "timestamp": datetime.utcnow().isoformat(),
+        "user": "GPT",
+        "message": message,
+    })
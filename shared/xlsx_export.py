@@ -0,0 +1,44 @@
+# -----------------------------------------
+# File: xlsx_export.py
+# Purpose: Stream large DataFrames to XLSX with bounded memory
+# Notes:
+#   - xlsxwriter's constant_memory mode flushes each row once a later row
+#     is written, so cells must arrive in row order. pandas.to_excel writes
+#     column by column, which loses data in that mode, so rows are written
+#     here directly with write_row
+#   - NaN/NaT cells are left blank; dates use default_date_format
+#   - write_xlsx_chunks takes DataFrames one at a time, so the whole
+#     table never has to be in memory
+# -----------------------------------------
+
+import pandas as pd
+import xlsxwriter
+
+
+def write_xlsx_streaming(df: pd.DataFrame, target, sheet_name: str = "Sheet1",
+                         date_format: str = "dd/mm/yyyy", chunk_rows: int = 20_000):
+    """Write df to an XLSX path or file object one row at a time."""
+
+    chunks = (df.iloc[start:start + chunk_rows] for start in range(0, len(df), chunk_rows))
+    return write_xlsx_chunks(chunks, target, list(df.columns), sheet_name, date_format)
+
+
+def write_xlsx_chunks(chunks, target, columns: list, sheet_name: str = "Sheet1",
+                      date_format: str = "dd/mm/yyyy"):
+    """Write an iterable of DataFrames (same columns, in order) as one sheet."""
+
+    workbook = xlsxwriter.Workbook(target, {"constant_memory": True, "default_date_format": date_format})
+    worksheet = workbook.add_worksheet(sheet_name)
+    header_format = workbook.add_format({"bold": True})
+    worksheet.write_row(0, 0, [str(col) for col in columns], header_format)
+
+    row_number = 1
+    for chunk in chunks:
+        block = chunk[columns].astype(object)
+        block = block.where(block.notna(), None)
+        for values in block.itertuples(index=False, name=None):
+            worksheet.write_row(row_number, 0, values)
+            row_number += 1
+
+    workbook.close()
+    return target
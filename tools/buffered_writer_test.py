@@ -0,0 +1,83 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "shared")))
+
+from sqlite_utils import create_memory_table, get_buffered_writer, open_connection
+
+THREADS = 8
+NOTES_PER_THREAD = 5_000
+
+
+def note(i):
+    return {"app": "tools", "timestamp": f"2025-01-01T00:00:{i:06d}", "user": "GPT", "message": f"note {i}"}
+
+
+def stored(db_path):
+    conn = open_connection(db_path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM gpt_memory").fetchone()[0]
+    finally:
+        conn.close()
+
+
+class FlakySetup:
+    # Fails the first `failures` calls with `error`, then creates the table
+    def __init__(self, failures, error):
+        self.failures = failures
+        self.error = error
+
+    def __call__(self, conn):
+        if self.failures:
+            self.failures -= 1
+            raise self.error
+        create_memory_table(conn)
+
+
+if __name__ == "__main__":
+    # Many sessions logging at once
+    db_path = os.path.join(tempfile.mkdtemp(), "writer_test.db")
+    writer = get_buffered_writer(db_path)
+
+    def log_notes(offset):
+        for i in range(NOTES_PER_THREAD):
+            writer.log(note(offset + i))
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=log_notes, args=(n * NOTES_PER_THREAD,)) for n in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    queued = time.perf_counter() - start
+    assert writer.flush(30)
+    total = THREADS * NOTES_PER_THREAD
+    assert stored(db_path) == total
+    print(f"✅ {total:,} notes from {THREADS} threads queued in {queued:.2f}s and all written")
+
+    # A failing write (any exception) keeps the rows queued until it succeeds
+    db_path = os.path.join(tempfile.mkdtemp(), "writer_test.db")
+    writer = get_buffered_writer(db_path, setup=FlakySetup(2, RuntimeError("disk full")))
+    writer.flush_seconds = 0.05
+    for i in range(100):
+        writer.log(note(i))
+    assert writer.flush(5) and stored(db_path) == 100 and writer.last_error is None
+    print("✅ Rows survive failed writes and land once the database is usable")
+
+    # A writer whose thread died hands its queue to the replacement
+    db_path = os.path.join(tempfile.mkdtemp(), "writer_test.db")
+    dead = get_buffered_writer(db_path, setup=FlakySetup(1, SystemExit("thread killed")))
+    for i in range(50):
+        dead.log(note(i))
+    assert not dead.flush(0.5)
+    dead.join(5)
+    assert not dead.is_alive()
+    replacement = get_buffered_writer(db_path, setup=create_memory_table)
+    assert replacement is not dead
+    for i in range(50, 75):
+        replacement.log(note(i))
+    assert replacement.flush(5) and stored(db_path) == 75
+    print("✅ Replacement writer saved the dead writer's queued rows")
@@ -0,0 +1,48 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from multiprocessing import Pool
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "apps", "dyce_energy_contract"))
+
+from logic.contract_refs import init_reference_sequence, next_contract_reference
+
+WORKERS = 8
+SUBMISSIONS_PER_WORKER = 250
+
+
+def submit_contracts(db_path):
+    # Each worker is a separate session: own connection, allocate + insert per submission
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    refs = []
+    for _ in range(SUBMISSIONS_PER_WORKER):
+        cursor = conn.cursor()
+        ref = next_contract_reference(cursor)
+        cursor.execute("INSERT INTO contracts (contract_reference) VALUES (?)", (ref,))
+        conn.commit()
+        refs.append(ref)
+    conn.close()
+    return refs
+
+
+if __name__ == "__main__":
+    db_path = os.path.join(tempfile.mkdtemp(), "contracts_load_test.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE contracts (id INTEGER PRIMARY KEY, contract_reference TEXT UNIQUE NOT NULL)")
+    init_reference_sequence(conn)
+    conn.close()
+
+    start = time.perf_counter()
+    with Pool(WORKERS) as pool:
+        results = pool.map(submit_contracts, [db_path] * WORKERS)
+    elapsed = time.perf_counter() - start
+
+    refs = [ref for worker_refs in results for ref in worker_refs]
+    collisions = len(refs) - len(set(refs))
+    print(f"Submissions: {len(refs)} from {WORKERS} workers in {elapsed:.2f}s ({len(refs) / elapsed:,.0f}/s)")
+    print(f"Collisions: {collisions}")
+    print(f"First/last reference: {min(refs)} / {max(refs)}")
+    print("✅ No collisions" if collisions == 0 else "❌ Duplicate references allocated")
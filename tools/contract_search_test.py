@@ -0,0 +1,54 @@
+import json
+import os
+import re
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "apps", "dyce_energy_contract"))
+
+from logic.contract_search import SEARCH_FIELDS, init_contract_search, search_contracts
+
+CONTRACTS = [
+    # (tpi_business_name, form_data)
+    ("Acme Brokers", {"elec_mpan": "12 3456 7890 123", "gas_meter_ref": "g 123 ab", "post_code": "ab1 2cd"}),
+    ("École Énergie", {"elec_mpan": "12\t34", "gas_meter_ref": "straße 1", "post_code": "ÉC1 1AA"}),
+    ("acme direct", {"elec_mpan": "1234567890123", "gas_meter_ref": "G123AB", "post_code": "AB12CD"}),
+]
+
+
+if __name__ == "__main__":
+    conn = sqlite3.connect(":memory:")
+    conn.execute("""CREATE TABLE contracts (id INTEGER PRIMARY KEY AUTOINCREMENT, contract_reference TEXT,
+        tpi_business_name TEXT, site_business_name TEXT, estimated_commission REAL, form_data TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)""")
+    conn.executemany(
+        "INSERT INTO contracts (contract_reference, tpi_business_name, form_data) VALUES (?, ?, ?)",
+        [(f"REF{i}", tpi, json.dumps(form)) for i, (tpi, form) in enumerate(CONTRACTS)]
+    )
+    init_contract_search(conn)
+
+    def refs(field, value):
+        return sorted(row["contract_reference"] for row in search_contracts(conn, field, value)[0])
+
+    assert refs("mpan", "1234567890123") == ["REF0", "REF2"]
+    assert refs("gas_meter_ref", "g123AB") == ["REF0", "REF2"]
+    assert refs("postcode", "Ab1 2cD") == ["REF0", "REF2"]
+    assert refs("tpi", "ACME") == ["REF0", "REF2"]
+    print("✅ Spaces and ASCII case are ignored on every field")
+
+    # Tabs and non-ASCII letters are left alone, exactly as SQLite's REPLACE/UPPER/LOWER leave them
+    assert refs("mpan", "12\t34") == ["REF1"] and refs("mpan", "1234") == []
+    assert refs("gas_meter_ref", "STRAßE1") == ["REF1"] and refs("gas_meter_ref", "STRASSE1") == []
+    assert refs("postcode", "éc11aa") == [] and refs("postcode", "Éc11aa") == ["REF1"]
+    assert refs("tpi", "École") == ["REF1"] and refs("tpi", "école") == []
+    for field, (_, expression, normalise) in SEARCH_FIELDS.items():
+        on_literal = re.sub(r"json_extract\(form_data, '[^']+'\)|tpi_business_name", "?", expression)
+        for value in ["12\t34", "ab\u00a01", "straße 1", "ÉC1 1aa", "École Énergie"]:
+            assert normalise(value) == conn.execute(f"SELECT {on_literal}", (value,)).fetchone()[0], (field, value)
+    print("✅ Python normalisation matches SQLite's on tabs, non-breaking spaces and accented letters")
+
+    for field, (_, expression, _) in SEARCH_FIELDS.items():
+        plan = conn.execute(f"EXPLAIN QUERY PLAN SELECT id FROM contracts WHERE {expression} = ? ORDER BY id DESC",
+                            ("x",)).fetchall()
+        assert any(f"idx_contracts_search_{field}" in row[-1] for row in plan), plan
+    print("✅ Every search field is served by its expression index")
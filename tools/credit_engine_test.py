@@ -0,0 +1,140 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "apps", "contract"))
+
+from logic.approval_matrix import compile_approval_matrix, required_approver, required_approvers
+from logic.credit_engine import decide_applications, reason_list
+
+APPLICATIONS = 20_000
+
+CONFIG = {
+    "refer_threshold": {"min": 30.0, "max": 0.0},
+    "approve_threshold": {"min": 60.0, "max": 0.0},
+    "minimum_unit_margin_ppkwh": {"min": 0.5, "max": 0.0},
+    "max_broker_uplift_standing": {"min": 0.0, "max": 10.0},
+    "max_broker_uplift_unit_rate": {"min": 0.0, "max": 2.0},
+}
+
+# The approver thresholds the original form hard-coded, as an ApprovalMatrix sheet
+BIG = 1e12
+APPROVAL_SHEET = pd.DataFrame({
+    "Role": ["Sales Admin", "TPI/ Direct Sales Manager", "Commercial Manager", "Managing Director"],
+    "Min sites": [0, BIG + 1, BIG + 1, BIG + 1], "Max Sites": [BIG, BIG + 1, BIG + 1, BIG + 1],
+    "Min Annual Spend": [0, 250_001, 500_001, 1_000_000], "Max Annual Spend": [250_000, 500_000, 999_999, BIG],
+    "Min Annual Volume (kWh)": [0, BIG + 1, BIG + 1, BIG + 1], "Max Annual Volume (kWh)": [BIG, BIG + 1, BIG + 1, BIG + 1],
+})
+
+
+def old_decision(app):
+    # run_decision from the original single-application form
+    reasons = []
+    decision = "Approved"
+    if app["Credit Score"] < CONFIG['refer_threshold']['min']:
+        decision = "Declined"
+        reasons.append("Declined: Credit Score below referral threshold")
+    if app["CCJs"] == "Yes":
+        decision = "Declined"
+        reasons.append("Declined: CCJs or Defaults present")
+    if decision != "Declined":
+        if CONFIG['refer_threshold']['min'] <= app["Credit Score"] < CONFIG['approve_threshold']['min']:
+            reasons.append("Referral: Credit Score between thresholds")
+        if (app["Business Type"] in ["Sole Trader", "Partnership"] and app["Years Trading"] < 1) or \
+                (app["Business Type"] == "Limited Company" and app["Years Trading"] < 2):
+            reasons.append("Referral: Insufficient trading history")
+        if app["SIC Risk"] in ["High", "Very High"]:
+            reasons.append("Referral: SIC Risk is High/Very High")
+        if app["Payment Terms"] != "Direct Debit":
+            reasons.append("Referral: Payment terms - BACS selected")
+        if app["Unit Margin"] < CONFIG['minimum_unit_margin_ppkwh']['min']:
+            reasons.append("Referral: Unit Margin below minimum")
+        if app["Broker Uplift Standing"] > CONFIG['max_broker_uplift_standing']['max']:
+            reasons.append("Referral: Standing charge uplift exceeds maximum")
+        if app["Broker Uplift Unit Rate"] > CONFIG['max_broker_uplift_unit_rate']['max']:
+            reasons.append("Referral: Unit rate uplift exceeds maximum")
+        if any("Referral:" in reason for reason in reasons):
+            decision = "Referral"
+
+    value = app["Contract Value"]
+    if decision == "Declined":
+        approver = None
+    elif value >= 1000000:
+        approver = "Managing Director"
+    elif decision == "Approved":
+        approver = "Auto-Approved"
+    elif value <= 250000:
+        approver = "Sales Admin"
+    elif value <= 500000:
+        approver = "TPI/ Direct Sales Manager"
+    else:
+        approver = "Commercial Manager"
+    return decision, approver, reasons
+
+
+def make_applications(rows):
+    rng = np.random.default_rng(4)
+    return pd.DataFrame({
+        "Business Type": rng.choice(["Sole Trader", "Partnership", "Limited Company", "Charity"], rows),
+        "Number of Sites": rng.integers(1, 50, rows),
+        "Annual Volume": rng.integers(0, 5_000_000, rows),
+        "Contract Value": rng.choice([0, 250_000, 250_001, 500_000, 500_001, 999_999, 1_000_000]
+                                     + list(rng.integers(0, 2_000_000, 50)), rows),
+        "Contract Term": rng.integers(1, 5, rows),
+        # Mostly clean applications so every approver level is exercised
+        "Unit Margin": np.where(rng.random(rows) < 0.1, 0.2, rng.uniform(0.5, 3, rows)).round(2),
+        "Broker Uplift Standing": np.where(rng.random(rows) < 0.1, 12.0, rng.uniform(0, 10, rows)).round(2),
+        "Broker Uplift Unit Rate": np.where(rng.random(rows) < 0.1, 2.5, rng.uniform(0, 2, rows)).round(2),
+        "SIC Code": "47190",
+        "SIC Risk": rng.choice(["Low", "Medium", "High", "Very High"], rows, p=[0.5, 0.3, 0.1, 0.1]),
+        "Credit Score": np.where(rng.random(rows) < 0.3, rng.integers(0, 100, rows), rng.integers(60, 100, rows)),
+        "Years Trading": rng.integers(0, 10, rows),
+        "CCJs": rng.choice(["No", "Yes"], rows, p=[0.9, 0.1]),
+        "Payment Terms": rng.choice(["Direct Debit", "BACS"], rows, p=[0.8, 0.2]),
+    })
+
+
+if __name__ == "__main__":
+    matrix = compile_approval_matrix(APPROVAL_SHEET)
+    applications = make_applications(APPLICATIONS)
+
+    start = time.perf_counter()
+    result = decide_applications(applications, CONFIG, matrix)
+    seconds = time.perf_counter() - start
+
+    for (_, app), (_, row) in zip(applications.iterrows(), result.iterrows()):
+        decision, approver, reasons = old_decision(app)
+        actual = (row["Decision"], row["Required Approver"] if pd.notna(row["Required Approver"]) else None,
+                  reason_list(row["Reasons"]))
+        assert actual == (decision, approver, reasons), (app.to_dict(), actual, (decision, approver, reasons))
+    counts = result["Required Approver"].fillna("None").value_counts().to_dict()
+    print(f"✅ {APPLICATIONS:,} applications decided in {seconds:.2f}s, identical to the original rules: {counts}")
+
+    # Single and batch approver lookups agree, including gaps and missing values
+    rng = np.random.default_rng(8)
+    sites, spend, volume = rng.integers(0, 60, 2_000), rng.integers(0, 2_000_000, 2_000).astype(float), rng.integers(0, 10**7, 2_000)
+    spend[::97] = np.nan
+    decisions = rng.choice(["Approved", "Referral", "Declined"], 2_000)
+    batch = required_approvers(matrix, decisions, sites, spend, volume)
+    single = [required_approver(matrix, d, a, b, c) for d, a, b, c in zip(decisions, sites, spend, volume)]
+    assert list(batch) == single
+    assert required_approver(matrix, "Referral", 1, np.nan, 0) == "Managing Director"
+    print("✅ Single and batch approver lookups agree; missing spend goes to the most senior role")
+
+    missing = applications.head(3).astype({"Credit Score": float, "Unit Margin": object})
+    missing.loc[0, "Credit Score"] = np.nan
+    missing.loc[1, "Unit Margin"] = "n/a"
+    result = decide_applications(missing, CONFIG, matrix)
+    assert all("Missing or invalid" in reasons for reasons in result["Reasons"].head(2))
+    assert (result["Decision"].head(2) != "Approved").all()
+    print("✅ Blank or invalid rule inputs are referred, never auto-approved")
+
+    try:
+        decide_applications(applications.drop(columns=["Credit Score"]), CONFIG, matrix)
+    except ValueError as e:
+        print(f"✅ {e}")
+    else:
+        raise AssertionError("Applications without a Credit Score column were accepted")
@@ -0,0 +1,106 @@
+import os
+import smtplib
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "apps", "dyce_energy_contract"))
+
+from logic import email_outbox
+from logic.email_outbox import OutboxSender, email_configured, init_outbox, outbox_counts, queue_contract_email, start_outbox_sender
+
+SETTINGS = {
+    'host': 'localhost', 'port': 1025, 'use_tls': False, 'user': 'forms', 'password': 'secret',
+    'sender': 'forms@example.com', 'office': 'office@example.com',
+}
+
+sent = []
+connections = []
+
+
+class FakeSMTP:
+    # Stand-in server: REJECT-* is refused per message, CRASH-* raises something unexpected
+    def __init__(self, host, port, timeout=None):
+        connections.append(self)
+
+    def login(self, user, password):
+        pass
+
+    def noop(self):
+        return (250, b"OK")
+
+    def quit(self):
+        pass
+
+    def send_message(self, msg):
+        ref = msg['Subject'].rsplit(" ", 1)[-1]
+        if ref.startswith("REJECT"):
+            raise smtplib.SMTPRecipientsRefused({msg['To']: (550, b"No such user")})
+        if ref.startswith("CRASH"):
+            raise RuntimeError("unexpected failure")
+        sent.append(ref)
+
+
+def new_db():
+    db_path = os.path.join(tempfile.mkdtemp(), "outbox_test.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE contracts (contract_reference TEXT, email_sent BOOLEAN DEFAULT 0)")
+    init_outbox(conn)
+    return db_path, conn
+
+
+def queue(conn, refs):
+    cursor = conn.cursor()
+    for ref in refs:
+        cursor.execute("INSERT INTO contracts (contract_reference) VALUES (?)", (ref,))
+        queue_contract_email(cursor, {'estimated_commission': 0}, ref)
+    conn.commit()
+
+
+if __name__ == "__main__":
+    email_outbox.smtplib.SMTP = FakeSMTP
+
+    assert email_configured(SETTINGS)
+    assert not email_configured(dict(SETTINGS, user=None))
+    assert not email_configured(dict(SETTINGS, password=None))
+    assert not email_configured(dict(SETTINGS, office=None))
+    print("✅ Email needs a user, password and office address")
+
+    db_path, conn = new_db()
+    refs = [f"DYC-{i:03d}" for i in range(45)] + ["REJECT-1", "CRASH-1"]
+    queue(conn, refs)
+    sender = OutboxSender(db_path, settings_loader=lambda: SETTINGS, batch_size=20)
+    while sender.deliver_due(conn):
+        pass
+    assert sorted(sent) == sorted(refs[:45]) and len(connections) == 1
+    assert outbox_counts(conn) == {'sent': 45, 'pending': 2}
+    assert conn.execute("SELECT COUNT(*) FROM contracts WHERE email_sent = 1").fetchone()[0] == 45
+    errors = dict(conn.execute("SELECT contract_reference, last_error FROM email_outbox WHERE status = 'pending'"))
+    assert errors['REJECT-1'].startswith("SMTPRecipientsRefused") and errors['CRASH-1'].startswith("RuntimeError")
+    print("✅ 45 emails sent over one connection; rejected and crashing messages stay queued for retry")
+
+    # A background sender keeps running when the settings loader blows up
+    calls = []
+
+    def flaky_settings():
+        calls.append(time.time())
+        if len(calls) == 1:
+            raise RuntimeError("settings unavailable")
+        return SETTINGS
+
+    queue(conn, ["DYC-LATE"])
+    sender = OutboxSender(db_path, settings_loader=flaky_settings, poll_seconds=0.05)
+    sender.start()
+    deadline = time.time() + 5
+    while "DYC-LATE" not in sent and time.time() < deadline:
+        time.sleep(0.05)
+    assert sender.is_alive() and "DYC-LATE" in sent
+    sender.stop(5)
+    print("✅ Sender survives an unexpected error and delivers on the next poll")
+
+    other_db, _ = new_db()
+    first, second = start_outbox_sender(db_path), start_outbox_sender(other_db)
+    assert first is not second and first.db_path == db_path and second.db_path == other_db
+    assert start_outbox_sender(db_path) is first
+    print("✅ One background sender per database")
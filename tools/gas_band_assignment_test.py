@@ -0,0 +1,88 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "apps", "gas"))
+
+from logic.price_list import assign_bands, build_price_list, build_price_list_cached
+
+ROWS = 200_000
+
+DEFAULT_BANDS = [(1000, 24999), (25000, 49999), (50000, 73199), (73200, 124999),
+                 (125000, 292999), (293000, 449999), (450000, 731999)]
+# Shared edges, a gap and bands listed out of order
+EDITED_BANDS = [(25000, 50000), (0, 25000), (50000, 73200), (80000, 125000), (125000, 300000)]
+
+
+def make_bands(edges, seed):
+    rng = np.random.default_rng(seed)
+    return [{"Min": lo, "Max": hi, "Contract": 12,
+             "Standard_Unit": round(float(rng.uniform(0.5, 2)), 3), "Standard_Standing": round(float(rng.uniform(5, 20)), 2),
+             "Carbon_Unit": round(float(rng.uniform(0.5, 2)), 3), "Carbon_Standing": round(float(rng.uniform(5, 20)), 2)}
+            for lo, hi in edges]
+
+
+def make_flat_file(rows, edges):
+    rng = np.random.default_rng(1)
+    # Plenty of values exactly on band edges, plus some in gaps and outside every band
+    on_edges = np.array([value for edge in edges for value in edge], dtype=float)
+    consumption = np.where(rng.random(rows) < 0.2, rng.choice(on_edges, rows), rng.integers(0, 800_000, rows))
+    return pd.DataFrame({
+        "Minimum_Annual_Consumption": consumption,
+        "Unit_Rate": rng.uniform(3, 8, rows).round(4),
+        "Standing_Charge": rng.uniform(20, 90, rows).round(4),
+        "Carbon_Offset": rng.choice(["Yes", " y ", "TRUE", "1", "No", "", None, 1, 0], rows),
+    })
+
+
+def old_price_list(df, band_inputs):
+    # The per-row next(...) scan that build_price_list replaced
+    def get_uplifts(row):
+        consumption = row["Minimum_Annual_Consumption"]
+        matched_band = next((b for b in band_inputs if b["Min"] <= consumption <= b["Max"]), band_inputs[-1])
+        carbon = str(row.get("Carbon_Offset", "")).strip().lower() in ["yes", "y", "true", "1"]
+        if carbon:
+            return pd.Series({"Uplift_Unit": matched_band["Carbon_Unit"], "Uplift_Standing": matched_band["Carbon_Standing"]})
+        return pd.Series({"Uplift_Unit": matched_band["Standard_Unit"], "Uplift_Standing": matched_band["Standard_Standing"]})
+
+    df_final = pd.concat([df.reset_index(drop=True), df.apply(get_uplifts, axis=1)], axis=1)
+    df_final["Unit Rate"] = (df_final["Unit_Rate"] + df_final["Uplift_Unit"]).round(4)
+    df_final["Standing Charge"] = (df_final["Standing_Charge"] + df_final["Uplift_Standing"]).round(4)
+    df_final["Total Annual Cost (£)"] = (
+        (df_final["Standing Charge"] * 365) + (df_final["Unit Rate"] * df_final["Minimum_Annual_Consumption"])
+    ) / 100
+    return df_final
+
+
+if __name__ == "__main__":
+    for label, edges in (("default", DEFAULT_BANDS), ("edited", EDITED_BANDS)):
+        bands = make_bands(edges, seed=2)
+        flat = make_flat_file(ROWS, edges)
+
+        expected_index = [next((i for i, b in enumerate(bands) if b["Min"] <= c <= b["Max"]), len(bands) - 1)
+                          for c in flat["Minimum_Annual_Consumption"]]
+        assert assign_bands(flat["Minimum_Annual_Consumption"], bands).tolist() == expected_index
+
+        sample = flat.head(20_000)
+        start = time.perf_counter()
+        expected = old_price_list(sample, bands)
+        old_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        actual = build_price_list(sample, bands)
+        new_seconds = time.perf_counter() - start
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+        print(f"✅ {label} bands: {ROWS:,} rows banded like next(...); price list matches "
+              f"({old_seconds:.2f}s -> {new_seconds:.3f}s on {len(sample):,} rows)")
+
+        # Re-pricing only the changed band gives the same list as a full build
+        cache = {}
+        build_price_list_cached(flat, bands, cache, "flat")
+        changed = [dict(b) for b in bands]
+        changed[2]["Standard_Unit"] += 0.25
+        cached, recomputed = build_price_list_cached(flat, changed, cache, "flat")
+        assert recomputed == [2]
+        pd.testing.assert_frame_equal(cached, build_price_list(flat, changed))
+        print(f"✅ {label} bands: editing band 3 re-prices only that band and matches a full build")
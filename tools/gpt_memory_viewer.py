@@ -7,7 +7,7 @@ current_dir = os.path.dirname(__file__)
 shared_path = os.path.abspath(os.path.join(current_dir, "..", "shared"))
 sys.path.append(shared_path)
 
-from sqlite_utils import get_connection, get_memory, log_gpt_note
+from sqlite_utils import get_connection, create_memory_table, get_memory_page, log_gpt_note, get_buffered_writer
 
 st.set_page_config(page_title="GPT Memory Viewer", layout="centered")
 st.title("🧠 GPT Memory Log")
@@ -15,18 +15,37 @@ st.title("🧠 GPT Memory Log")
 # Sidebar app selector
 apps = ["contract", "gas", "power", "directgas", "directpower", "tools"]
 selected_app = st.sidebar.selectbox("Select App", apps)
+search = st.sidebar.text_input("Search notes")
 
-# Show logs
+# Show logs (one page at a time; indexes and search table are created on first use)
 conn = get_connection()
-logs = get_memory(conn, app=selected_app)
+create_memory_table(conn)
 
-st.subheader(f"Logs for: `{selected_app}`")
+# Keyset cursor per query: list of cursors, one per page visited
+query = (selected_app, search)
+if st.session_state.get("memory_query") != query:
+    st.session_state.memory_query = query
+    st.session_state.memory_pages = [None]
+
+logs, next_cursor = get_memory_page(conn, app=selected_app, search=search,
+                                    before=st.session_state.memory_pages[-1])
+
+st.subheader(f"Logs for: `{selected_app}`" + (f" matching “{search}”" if search else ""))
 if logs:
     for _, _, timestamp, user, message in logs:
         st.markdown(f"**{timestamp}** — *{user}*  \n{message}")
 else:
     st.info("No logs found for this app.")
 
+col_prev, col_page, col_next = st.columns([1, 2, 1])
+if col_prev.button("◀ Newer", disabled=len(st.session_state.memory_pages) == 1):
+    st.session_state.memory_pages.pop()
+    st.rerun()
+col_page.caption(f"Page {len(st.session_state.memory_pages)}")
+if col_next.button("Older ▶", disabled=next_cursor is None):
+    st.session_state.memory_pages.append(next_cursor)
+    st.rerun()
+
 st.markdown("---")
 
 # Add new log entry
@@ -35,4 +54,8 @@ with st.form("log_form"):
     submitted = st.form_submit_button("Log it")
     if submitted and new_message.strip():
         log_gpt_note(app=selected_app, message=new_message.strip())
-        st.success("✅ Note logged. Refresh the page to see it.")
+        # Notes are written in the background; wait for this one so it shows on the next refresh
+        if get_buffered_writer().flush():
+            st.success("✅ Note logged. Refresh the page to see it.")
+        else:
+            st.warning("Note queued; it will be saved once the database is free.")
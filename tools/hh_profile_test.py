@@ -0,0 +1,98 @@
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "apps", "power"))
+
+from logic.hh_profile import (
+    DAY_NIGHT_EVW_WINDOWS,
+    DUOS_RAG_WINDOWS,
+    band_consumption,
+    build_masks,
+    ingest_hh_csv,
+    open_hh_store,
+    price_sites,
+    profile_split,
+    weighted_costs,
+)
+
+YEAR = 2025
+SITES = 40
+
+
+def reference_band(stamps: pd.Series) -> pd.Series:
+    # Independent classification straight from the timestamps
+    hour = stamps.dt.hour + stamps.dt.minute / 60
+    weekend = stamps.dt.weekday >= 5
+    band = np.where(hour < 7, "night", np.where(weekend, "evw", np.where(hour < 19, "day", "evw")))
+    return pd.Series(band, index=stamps.index)
+
+
+if __name__ == "__main__":
+    for windows in (DAY_NIGHT_EVW_WINDOWS, DUOS_RAG_WINDOWS):
+        masks = build_masks(YEAR, windows)
+        assert (np.sum(list(masks.values()), axis=0) == 1).all()
+    print(f"✅ Every half-hour of {YEAR} falls in exactly one band ({len(masks['red']):,} periods)")
+
+    # Long-format file: every site every half-hour, plus a duplicate reading and rows outside the year
+    rng = np.random.default_rng(5)
+    stamps = pd.date_range(f"{YEAR}-01-01", f"{YEAR + 1}-01-01", freq="30min", inclusive="left")
+    readings = pd.DataFrame({
+        "MPXN": np.repeat([f"S{i:03d}" for i in range(SITES)], len(stamps)),
+        "Timestamp": np.tile(stamps, SITES),
+        "kWh": rng.uniform(0, 2, SITES * len(stamps)).round(3),
+    })
+    extra = pd.DataFrame({
+        "MPXN": ["S000", "S001", "S002"],
+        "Timestamp": pd.to_datetime([f"{YEAR}-03-03 08:00", f"{YEAR - 1}-12-31 23:30", f"{YEAR + 1}-01-01 00:00"]),
+        "kWh": [5.0, 100.0, 100.0],
+    })
+    readings = pd.concat([readings, extra], ignore_index=True)
+    store_dir = tempfile.mkdtemp()
+    csv_path = os.path.join(store_dir, "hh.csv")
+    readings.assign(Timestamp=readings["Timestamp"].dt.strftime("%d/%m/%Y %H:%M")).to_csv(csv_path, index=False)
+
+    start = time.perf_counter()
+    site_ids, year, store = ingest_hh_csv(csv_path, store_dir, YEAR, chunksize=200_000)
+    band_kwh = band_consumption(store, build_masks(YEAR), site_ids, chunk_sites=16)
+    seconds = time.perf_counter() - start
+
+    in_year = readings[readings["Timestamp"].dt.year == YEAR]
+    expected = in_year.groupby(["MPXN", reference_band(in_year["Timestamp"])])["kWh"].sum().unstack()
+    expected = expected[band_kwh.columns].reindex(band_kwh.index)
+    assert np.allclose(band_kwh.to_numpy(), expected.to_numpy(), rtol=1e-5)
+    assert open_hh_store(store_dir)[0] == site_ids
+    print(f"✅ {len(readings):,} readings ingested and banded in {seconds:.2f}s; matches a timestamp-by-timestamp split")
+
+    split = profile_split(band_kwh)
+    totals = expected.sum()
+    assert abs(sum(split.values()) - 100) < 0.05
+    assert all(abs(split[band] - totals[band] / totals.sum() * 100) < 0.01 for band in split)
+    try:
+        profile_split(band_kwh * 0)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("An all-zero file produced a split")
+    print(f"✅ Portfolio split {split}; all-zero consumption is rejected")
+
+    costs = weighted_costs(band_kwh, {"day": 20.0, "night": 10.0, "evw": 15.0}, standing_charge=30.0)
+    manual = (band_kwh["day"] * 20 + band_kwh["night"] * 10 + band_kwh["evw"] * 15) / 100 + 30 * 365 / 100
+    assert np.allclose(costs["Total Annual Cost (£)"], manual.round(2), atol=0.011)
+
+    # Two bands split at the median annual volume; sites above the top band stay unpriced
+    annual = band_kwh.sum(axis=1)
+    cut = float(annual.median())
+    price_book = pd.DataFrame({
+        "Band": ["Small", "Large"], "Day Rate (p/kWh)": [20.0, 18.0], "Night Rate (p/kWh)": [10.0, 9.0],
+        "Evening & Weekend Rate (p/kWh)": [15.0, 14.0], "Standing Charge (p/day)": [30.0, 50.0],
+    })
+    priced = price_sites(band_kwh, [(0, cut), (cut + 0.001, float(annual.max()) - 1)], price_book)
+    small = priced["Band"] == "Small"
+    assert np.allclose(priced.loc[small, "Total Annual Cost (£)"], manual[small].round(2), atol=0.011)
+    assert priced["Total Annual Cost (£)"][priced["Band"] == "Out of range"].isna().all()
+    print(f"✅ Site costs priced at their band's rates ({small.sum()} small, {(priced['Band'] == 'Large').sum()} large)")
@@ -0,0 +1,61 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "apps", "contract"))
+
+from logic.config_manager import HotConfig
+
+parses = []
+
+
+def parse_rules(path):
+    text = path.read_text()
+    if text.startswith("broken"):
+        raise ValueError("bad workbook")
+    parses.append(text)
+    return text
+
+
+def write(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+    time.sleep(0.01)  # New mtime
+
+
+if __name__ == "__main__":
+    path = os.path.join(tempfile.mkdtemp(), "rules.txt")
+    write(path, "v1")
+    config = HotConfig(path, parse_rules, check_interval=0)
+
+    assert config.get() == "v1" and config.version == 1
+    assert config.get() == "v1" and len(parses) == 1
+    print("✅ Unchanged file is not re-parsed")
+
+    os.utime(path)
+    assert config.get() == "v1" and len(parses) == 1
+    print("✅ Touched but identical file is not re-parsed")
+
+    write(path, "v2")
+    assert config.get() == "v2" and config.version == 2 and config.last_error is None
+    print("✅ Changed file is reloaded")
+
+    write(path, "broken v3")
+    assert config.get() == "v2" and config.last_error and "bad workbook" in config.last_error
+    assert config.get() == "v2" and config.last_error, "parse error must stand until the file changes"
+    print("✅ Failed parse keeps the last good value and reports the error")
+
+    os.rename(path, path + ".saving")
+    assert config.get() == "v2" and config.last_error.startswith("FileNotFoundError")
+    os.rename(path + ".saving", path)
+    assert config.get() == "v2" and "bad workbook" in config.last_error
+    print("✅ Missing file reported only while it is missing")
+
+    write(path, "v4")
+    assert config.get() == "v4" and config.last_error is None
+    os.rename(path, path + ".saving")
+    config.get()
+    os.rename(path + ".saving", path)
+    assert config.get() == "v4" and config.last_error is None
+    print("✅ Error cleared once the file is readable again")
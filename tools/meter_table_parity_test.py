@@ -0,0 +1,80 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "apps", "Bespoke"))
+
+from logic.tender_pipeline import METER_FIELDS, build_meter_table
+
+METERS = 5_000
+
+
+def old_uplift_editor(df, meter_type):
+    # The per-term drop_duplicates/map editor that build_meter_table replaced
+    weights = {"NHH": {"Day": 0.50, "Night": 0.30, "E/W": 0.20}, "HH": {"Day": 0.70, "Night": 0.30}}[meter_type]
+    fields = METER_FIELDS[meter_type]
+    df = df.copy()
+    df["EAC"] = df["EAC"].fillna(0)
+    df["Contract Length"] = df["Contract Length"].astype(str)
+    base_df = df.drop_duplicates(subset=["MPXN"])[["MPXN", "EAC"]].copy()
+
+    for term in [12, 24, 36]:
+        sub_df = df[df["Contract Length"] == f"{term}"].drop_duplicates(subset=["MPXN"])
+        for col in fields:
+            base_df[f"{col} {term}m"] = base_df["MPXN"].map(sub_df.set_index("MPXN")[col])
+        for short in fields.values():
+            base_df[f"{short} Uplift {term}m"] = 0.000
+
+        tac = base_df[f"Standing Charge (p/day) {term}m"] * 365
+        if meter_type == "HH":
+            tac = tac + base_df[f"DUoS (p/KVA/Day) {term}m"] * 365
+        for col, short in fields.items():
+            if short in weights:
+                tac = tac + base_df["EAC"] * (base_df[f"{col} {term}m"] + base_df[f"{short} Uplift {term}m"]) * weights[short]
+        base_df[f"TAC_{term}m"] = (tac / 100).round(2)
+
+    return base_df.reset_index(drop=True)
+
+
+def make_tender(meter_type, meters):
+    # Duplicate quotes per term with gaps in the first quote, so a
+    # value-by-value "first" would mix prices from different rows
+    rng = np.random.default_rng(11)
+    rows = []
+    for mpxn in range(meters):
+        for months in (12, 18, 24, 36):
+            for quote in range(1 + (mpxn % 3 == 0)):
+                row = {"MPXN": f"{meter_type}{mpxn:07d}", "Contract Length": months,
+                       "EAC": None if mpxn % 53 == 0 else round(float(rng.uniform(1_000, 90_000)), 1)}
+                for col in METER_FIELDS[meter_type]:
+                    missing = quote == 0 and mpxn % 6 == 0 and col != "Standing Charge (p/day)"
+                    row[col] = None if missing else round(float(rng.uniform(5, 60)), 3)
+                rows.append(row)
+    return pd.DataFrame(rows).sample(frac=1.0, random_state=3).reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    for meter_type in ("NHH", "HH"):
+        tender = make_tender(meter_type, METERS)
+
+        start = time.perf_counter()
+        expected = old_uplift_editor(tender, meter_type)
+        old_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = build_meter_table(tender, meter_type)
+        new_seconds = time.perf_counter() - start
+
+        pd.testing.assert_frame_equal(expected, actual[list(expected.columns)], check_dtype=False)
+        print(f"✅ {meter_type}: {len(actual):,} MPXNs match the old editor "
+              f"({old_seconds:.2f}s -> {new_seconds:.2f}s)")
+
+    try:
+        build_meter_table(make_tender("NHH", 10), "NHH", {"Day": 0.5, "Night": 0.3, "E/W": 0.3})
+    except ValueError as e:
+        print(f"✅ Weights not summing to 100% are rejected: {e}")
+    else:
+        raise AssertionError("Weights summing to 110% were accepted")
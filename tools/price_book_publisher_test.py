@@ -0,0 +1,83 @@
+import hashlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "shared")))
+
+from price_book_publisher import publish_price_book, zip_directory
+
+ROWS = 60_000
+PARTITION_COLS = ["Contract_Duration", "Tariff"]
+
+
+def make_book(rows):
+    rng = np.random.default_rng(9)
+    return pd.DataFrame({
+        "Band": rng.choice(["0-5k", "5k-15k", "15k-50k"], rows),
+        "Contract_Duration": rng.choice([12, 24, 36], rows),
+        # Labels that would collide or escape the folder if written raw
+        "Tariff": rng.choice(["Standard", "Green", "A B", "A_B", "A/B", ".", "..", "__null__", None], rows),
+        "Day Rate (p/kWh)": rng.uniform(15, 35, rows).round(3),
+        # Rates the pricing engine couldn't fill come through as "N/A" in a numeric column
+        "Standing Charge (p/day)": pd.Series(rng.uniform(20, 90, rows).round(3), dtype=object).mask(
+            rng.random(rows) < 0.01, "N/A"),
+    })
+
+
+if __name__ == "__main__":
+    book = make_book(ROWS)
+    out_dir = Path(tempfile.mkdtemp()) / "book"
+
+    start = time.perf_counter()
+    manifest = publish_price_book(book, out_dir, PARTITION_COLS)
+    seconds = time.perf_counter() - start
+
+    expected_groups = book.groupby(PARTITION_COLS, dropna=False).ngroups
+    folders = {Path(p["files"][0]["path"]).parent for p in manifest["partitions"]}
+    assert len(manifest["partitions"]) == expected_groups == len(folders)
+    assert all(out_dir.resolve() in (out_dir / folder).resolve().parents for folder in folders)
+    assert manifest["total_rows"] == ROWS
+    print(f"✅ {expected_groups} partitions in {len(folders)} distinct folders, published in {seconds:.2f}s")
+
+    # Every format of a partition holds the same rows as the source slice
+    source = book.replace("N/A", np.nan).infer_objects()
+    assert source["Standing Charge (p/day)"].dtype == float
+    for partition in manifest["partitions"]:
+        mask = np.ones(len(source), dtype=bool)
+        for col, value in partition["partition"].items():
+            mask &= source[col].isna().to_numpy() if value is None else (source[col] == value).to_numpy()
+        expected = source[mask].reset_index(drop=True)
+        assert partition["rows"] == len(expected)
+        for entry in partition["files"]:
+            path = out_dir / entry["path"]
+            assert hashlib.sha256(path.read_bytes()).hexdigest() == entry["sha256"]
+            reader = {"parquet": pd.read_parquet, "csv": pd.read_csv, "xlsx": pd.read_excel}[entry["format"]]
+            if entry["format"] == "parquet":
+                actual = reader(path)
+            else:
+                actual = reader(path, keep_default_na=False, na_values=[""])
+            pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+    print("✅ Parquet, CSV and XLSX match the source rows per partition, checksums verified")
+
+    with open(out_dir / "manifest.json") as f:
+        assert json.load(f)["partitions"] == manifest["partitions"]
+    bundle = zipfile.ZipFile(io.BytesIO(zip_directory(out_dir)))
+    listed = {entry["path"] for partition in manifest["partitions"] for entry in partition["files"]}
+    assert set(bundle.namelist()) == listed | {"manifest.json"}
+    print("✅ Manifest and zip bundle list every published file")
+
+    try:
+        publish_price_book(book, Path(tempfile.mkdtemp()), ["DNO", "Tariff"])
+    except ValueError as e:
+        print(f"✅ Unknown partition column rejected: {e}")
+    else:
+        raise AssertionError("Partitioning on a missing column was accepted")
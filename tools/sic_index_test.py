@@ -0,0 +1,69 @@
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "apps", "contract"))
+
+from logic.sic_index import build_sic_index, load_or_build_sic_index, normalise_sic_codes, resolve_sic, resolve_sic_codes
+
+SIC_LIST = pd.DataFrame({
+    # 0xxxx codes are stored as 4-digit numbers, as in the real workbook
+    "SIC_Code": [1110, 1130, 2410, 47190, 47110, 47710, 86900, 86210, 11010, 24100],
+    "Sector": ["Agriculture", "Agriculture", "Agriculture", "Retail", "Retail", "Retail", "Health", "Health",
+               "Manufacturing", "Manufacturing"],
+    "SIC_Description": ["Cereals", "Vegetables", "Forestry support", "Other retail", "Food retail", "Clothing",
+                        "Other health", "GP", "Spirits", "Iron and steel"],
+    "Typical_Risk_Rating": ["Low", "Low", "High", "High", "Medium", "High", "Medium", "Low", "Medium", "Medium"],
+})
+
+# raw code -> (normalised code, match level, risk)
+CASES = {
+    47190: ("47190", "code", "High"),
+    "47190": ("47190", "code", "High"),
+    1110: ("01110", "code", "Low"),
+    "1110": ("01110", "code", "Low"),
+    2410: ("02410", "code", "High"),
+    "2410": ("02410", "code", "High"),
+    1130.0: ("01130", "code", "Low"),
+    "01110": ("01110", "code", "Low"),
+    "4719": ("4719", "class", "High"),
+    "47.19": ("4719", "class", "High"),
+    "86.90": ("8690", "class", "Medium"),
+    "47199": ("47199", "class", "High"),
+    "47500": ("47500", "division", "High"),
+    "45200": ("45200", "section", "High"),
+    "99999": ("99999", None, None),
+    "abc": ("", None, None),
+    None: ("", None, None),
+}
+
+
+if __name__ == "__main__":
+    index = build_sic_index(SIC_LIST)
+
+    for raw, (code, level, risk) in CASES.items():
+        matched = resolve_sic(index, raw)
+        assert (matched["SIC_Code"], matched["Match_Level"], matched["SIC_Risk"]) == (code, level, risk), (raw, matched)
+    print(f"✅ {len(CASES)} codes resolve at the expected level")
+
+    # Bulk resolution must agree with one-at-a-time lookups
+    codes = pd.Series(list(CASES) * 20_000, dtype=object)
+    start = time.perf_counter()
+    bulk = resolve_sic_codes(index, codes)
+    seconds = time.perf_counter() - start
+    assert bulk["SIC_Code"].tolist() == [CASES[raw][0] for raw in codes]
+    assert set(normalise_sic_codes(codes)) >= {"1110", "2410", "4719", "01110", "02410"}
+    assert bulk["Match_Level"].tolist() == [CASES[raw][1] for raw in codes]
+    print(f"✅ {len(codes):,} codes resolved in bulk in {seconds:.2f}s")
+
+    # The cached index is reused until the workbook changes
+    workbook = os.path.join(tempfile.mkdtemp(), "Sic Codes.xlsx")
+    SIC_LIST.to_excel(workbook, index=False)
+    first = resolve_sic_codes(load_or_build_sic_index(workbook), codes)
+    pd.testing.assert_frame_equal(resolve_sic_codes(load_or_build_sic_index(workbook), codes), first)
+    SIC_LIST.assign(Typical_Risk_Rating="Very High").to_excel(workbook, index=False)
+    assert resolve_sic(load_or_build_sic_index(workbook), "4719")["SIC_Risk"] == "Very High"
+    print("✅ Cached index rebuilt when the workbook changes")
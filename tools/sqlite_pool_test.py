@@ -0,0 +1,86 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "shared")))
+
+from sqlite_utils import get_connection, get_pool, get_read_connection
+
+THREADS = 16
+WRITES_PER_THREAD = 200
+
+
+def in_thread(target, *args):
+    result = {}
+    thread = threading.Thread(target=lambda: result.setdefault("value", target(*args)))
+    thread.start()
+    thread.join()
+    return result.get("value")
+
+
+if __name__ == "__main__":
+    db_path = os.path.join(tempfile.mkdtemp(), "pool_test.db")
+    conn = get_connection(db_path)
+    conn.execute("CREATE TABLE notes (id INTEGER PRIMARY KEY, thread TEXT, n INTEGER)")
+    conn.commit()
+
+    assert get_connection(db_path) is conn
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+    print("✅ One WAL connection per thread, with a busy timeout")
+
+    # A finished thread's connection goes back to the pool for the next thread
+    first = in_thread(lambda: id(get_connection(db_path)))
+    second = in_thread(lambda: id(get_connection(db_path)))
+    assert first == second and first != id(conn)
+    print("✅ Connections of finished threads are reused")
+
+    # A thread that dies mid-transaction must not leave its write lock behind
+    def open_transaction():
+        c = get_connection(db_path)
+        c.execute("INSERT INTO notes (thread, n) VALUES ('abandoned', 0)")
+        return c.in_transaction
+
+    assert in_thread(open_transaction)
+    conn.execute("INSERT INTO notes (thread, n) VALUES ('main', 0)")
+    conn.commit()
+    assert conn.execute("SELECT COUNT(*) FROM notes WHERE thread = 'abandoned'").fetchone()[0] == 0
+    print("✅ Abandoned transactions are rolled back when the thread ends")
+
+    # Concurrent sessions writing and reading at once
+    errors = []
+
+    def session(name):
+        try:
+            c = get_connection(db_path)
+            for n in range(WRITES_PER_THREAD):
+                with c:
+                    c.execute("INSERT INTO notes (thread, n) VALUES (?, ?)", (name, n))
+                get_read_connection(db_path).execute("SELECT COUNT(*) FROM notes").fetchone()
+        except sqlite3.Error as e:
+            errors.append(e)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=session, args=(f"t{i}",)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+    assert not errors, errors
+    total = conn.execute("SELECT COUNT(*) FROM notes WHERE thread LIKE 't%'").fetchone()[0]
+    assert total == THREADS * WRITES_PER_THREAD
+    idle = len(get_pool(db_path)._idle)
+    assert idle <= get_pool(db_path).max_idle
+    print(f"✅ {total:,} commits from {THREADS} threads in {seconds:.2f}s without lock errors ({idle} idle connections kept)")
+
+    reader = get_read_connection(db_path)
+    try:
+        reader.execute("INSERT INTO notes (thread, n) VALUES ('reader', 0)")
+    except sqlite3.OperationalError as e:
+        print(f"✅ Read-only connection refuses writes: {e}")
+    else:
+        raise AssertionError("Read-only connection accepted a write")
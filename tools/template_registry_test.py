@@ -0,0 +1,86 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+POWER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "apps", "power")
+sys.path.insert(0, POWER_DIR)
+
+from utils import template_registry
+from utils.template_registry import import_bundled_templates, list_templates, load_template, save_template
+
+MARGIN = {"template_name": "SME", "bands": [
+    {"Min": 0, "Max": 10000, "Standard_Rate": 1.5, "Day_Rate": 1.6, "Night_Rate": 1.1,
+     "Evening_And_Weekend_Rate": 1.2, "Standing_Charge": 5},
+    {"Min": 10000, "Max": 50000, "Standard_Rate": 1.2, "Day_Rate": 1.3, "Night_Rate": 0.9,
+     "Evening_And_Weekend_Rate": 1.0, "Standing_Charge": 8},
+]}
+UPLIFT = {"bands": [
+    {"min": 0, "max": 25000, "uplift_standing": 2.0, "uplift_day": 1.5, "uplift_night": 0.5, "uplift_evw": 0.7},
+    {"min": 25000, "max": 100000, "uplift_standing": 4.0, "uplift_day": 1.0, "uplift_night": 0.4, "uplift_evw": 0.6},
+]}
+
+# Saves a new version from another process, which this process's cache has never seen
+SAVE_ELSEWHERE = """
+import json, sys
+sys.path.insert(0, sys.argv[1])
+from utils import template_registry
+from utils.template_registry import save_template
+print(save_template("SME", json.loads(sys.argv[3]), sys.argv[2]))
+"""
+
+
+def bands_of(template, lo, hi):
+    return [{k: float(v) for k, v in band.items()} for band in sorted(template["bands"], key=lambda b: b[lo])]
+
+
+if __name__ == "__main__":
+    db_path = os.path.join(tempfile.mkdtemp(), "registry_test.db")
+
+    assert save_template("SME", MARGIN, db_path) == 1
+    loaded = load_template("SME", db_path=db_path)
+    assert loaded["template"] == MARGIN and loaded["version"] == 1 and loaded["kind"] == "margin"
+    assert loaded["bands"].to_dict("records") == bands_of(MARGIN, "Min", "Max")
+    assert save_template("SME", json.loads(json.dumps(MARGIN)), db_path) == 1
+    print("✅ Margin template round-trips; saving it unchanged keeps version 1")
+
+    assert save_template("SME", UPLIFT, db_path) == 1
+    uplift = load_template("SME", kind="uplift", db_path=db_path)
+    assert uplift["template"] == UPLIFT and uplift["bands"].to_dict("records") == bands_of(UPLIFT, "min", "max")
+    assert load_template("SME", db_path=db_path)["template"] == MARGIN
+    print("✅ Uplift config with the same name is versioned separately")
+
+    changed = json.loads(json.dumps(MARGIN))
+    changed["bands"][0]["Day_Rate"] = 9.0
+    version = subprocess.run([sys.executable, "-c", SAVE_ELSEWHERE, POWER_DIR, db_path, json.dumps(changed)],
+                             capture_output=True, text=True, check=True).stdout.strip()
+    assert version == "2"
+    assert load_template("SME", db_path=db_path)["bands"]["Day_Rate"][0] == 9.0
+    assert load_template("SME", version=1, db_path=db_path)["template"] == MARGIN
+    print("✅ A version saved by another process is loaded as the latest")
+
+    # A repeat load is served from the cache; only the cheap data_version check reaches SQLite
+    statements = []
+    template_registry._connections[db_path][0].set_trace_callback(statements.append)
+    for _ in range(100):
+        assert load_template("SME", db_path=db_path)["version"] == 2
+        assert load_template("SME", version=1, db_path=db_path)["version"] == 1
+    assert set(statements) == {"PRAGMA data_version"}, set(statements)
+    template_registry._connections[db_path][0].set_trace_callback(None)
+    assert len(list_templates(db_path)) == 3
+    print("✅ Cached loads reuse one connection and skip the template queries")
+
+    for broken in ({"bands": []}, {"bands": [dict(MARGIN["bands"][0], Min=20000)]},
+                   {"bands": [MARGIN["bands"][0], dict(MARGIN["bands"][1], Min=5000)]}):
+        try:
+            save_template("Broken", broken, db_path)
+        except ValueError:
+            continue
+        raise AssertionError(f"Invalid template accepted: {broken}")
+    print("✅ Empty, inverted and overlapping bands are rejected")
+
+    imported = import_bundled_templates(db_path)
+    assert imported and all(version >= 1 for _, version in imported)
+    assert import_bundled_templates(db_path) == imported
+    print(f"✅ Bundled templates imported once: {imported}")
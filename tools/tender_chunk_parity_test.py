@@ -0,0 +1,77 @@
+import os
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "apps", "Bespoke"))
+
+from logic.tender_pipeline import (
+    build_mpxn_table,
+    build_mpxn_table_chunked,
+    iter_tender_chunks,
+    read_tender_sheets,
+)
+
+METERS = 3_000
+CHUNK_ROWS = 1_000
+
+
+def make_tender(meters):
+    # Every meter quoted on 12/24/36m plus an unpriced 18m term, with some
+    # duplicated quotes and gaps so "first value wins" is exercised
+    rng = np.random.default_rng(7)
+    rows = []
+    for mpxn in range(1_000_000, 1_000_000 + meters):
+        for months in (12, 18, 24, 36):
+            for _ in range(1 + (mpxn % 5 == 0)):
+                end_year, end_month = divmod(3 + months, 12)
+                rows.append({
+                    "MPXN": mpxn,
+                    "EAC": None if mpxn % 97 == 0 else round(float(rng.uniform(1_000, 90_000)), 1),
+                    "CSD": "01/04/2025",
+                    "CED": f"01/{end_month + 1:02d}/{2025 + end_year}",
+                    "Standing Charge (p/day)": round(float(rng.uniform(20, 90)), 3),
+                    "Standard Rate (p/kWh)": None if mpxn % 89 == 0 else round(float(rng.uniform(15, 35)), 3),
+                })
+    return pd.DataFrame(rows)
+
+
+def assert_same(label, expected, actual):
+    expected_rows, expected_table = expected
+    actual_rows, actual_table = actual
+    assert expected_rows == actual_rows, f"{label}: {actual_rows} rows, expected {expected_rows}"
+    pd.testing.assert_frame_equal(
+        expected_table.sort_values("MPXN").reset_index(drop=True),
+        actual_table.sort_values("MPXN").reset_index(drop=True)[list(expected_table.columns)],
+        check_dtype=False,
+    )
+    print(f"✅ {label}: {actual_rows:,} rows, {len(actual_table):,} MPXNs match")
+
+
+if __name__ == "__main__":
+    tender = make_tender(METERS)
+    out_dir = tempfile.mkdtemp()
+
+    xlsx_buffer = BytesIO()
+    tender.to_excel(xlsx_buffer, sheet_name="Standard", index=False)
+    xlsx_bytes = xlsx_buffer.getvalue()
+
+    # Reference: the in-memory path the app uses for workbooks
+    expected = build_mpxn_table(read_tender_sheets(xlsx_bytes)["Standard"])
+
+    csv_path = os.path.join(out_dir, "tender.csv")
+    parquet_path = os.path.join(out_dir, "tender.parquet")
+    xlsx_path = os.path.join(out_dir, "tender.xlsx")
+    tender.to_csv(csv_path, index=False)
+    tender.to_parquet(parquet_path, index=False)
+    with open(xlsx_path, "wb") as f:
+        f.write(xlsx_bytes)
+
+    for path in (csv_path, parquet_path, xlsx_path):
+        start = time.perf_counter()
+        result = build_mpxn_table_chunked(iter_tender_chunks(path, path, "Standard", chunksize=CHUNK_ROWS))
+        assert_same(f"{os.path.basename(path)} ({time.perf_counter() - start:.2f}s)", expected, result)
@@ -0,0 +1,55 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "apps", "power"))
+
+from logic.uplift_sweep import cheapest_configuration, get_band_base_rates, sweep_uplifts, sweep_to_frame
+
+BANDS = [(0, 5000), (5001, 15000), (15001, 50000), (900000, 999999)]
+FLAT = pd.DataFrame({
+    "Contract_Duration": [12, 12, 12, 24],
+    "Minimum_Annual_Consumption": [0, 5001, 15001, 0],
+    "Maximum_Annual_Consumption": [5000, 15000, 50000, 50000],
+    "Standing_Charge": [31.37, 42.11, 55.5, 30.0],
+    "Standard_Rate": [24.123, 22.871, 21.05, 20.0],
+    "Green_Energy": ["No", "NO", "False", "No"],
+})
+
+
+if __name__ == "__main__":
+    base_sc, base_rate = get_band_base_rates(FLAT, BANDS, 12, "Standard")
+    assert np.isnan(base_sc[-1]) and not np.isnan(base_sc[:-1]).any()
+    mid_kwh = [(lo + hi) / 2 for lo, hi in BANDS]
+
+    margins = np.arange(0, 101, 5.0)
+    splits = np.arange(0, 101, 10) / 100
+    sweep = sweep_uplifts(base_sc, base_rate, mid_kwh, 100.0, margins, splits)
+
+    # The scalar Step 4 formula, band by band
+    for (m, margin), (s, split) in [((8, margins[8]), (3, splits[3])), ((20, margins[20]), (10, splits[10]))]:
+        for b in range(3):
+            total = (100.0 + margin) * 100
+            standing = round(base_sc[b] + round(total * split / 365, 4), 4)
+            unit = round(base_rate[b] + round(total * (1 - split) / mid_kwh[b], 4), 4)
+            assert abs(sweep["standing_charge"][m, s, b] - standing) < 2e-4
+            assert abs(sweep["unit_rate"][m, s, b] - unit) < 2e-4
+    print("✅ Sweep surfaces match the per-band Step 4 pricing")
+
+    # TAC barely moves with the split, so the winner must come from the documented tie-break
+    best = cheapest_configuration(sweep, target_margin=40.0)
+    assert best["margin_value"] == 40.0 and best["standing_split"] == 0.5
+    reversed_sweep = sweep_uplifts(base_sc, base_rate, mid_kwh, 100.0, margins[::-1], splits[::-1])
+    again = cheapest_configuration(reversed_sweep, target_margin=40.0)
+    assert (again["margin_value"], again["standing_split"]) == (best["margin_value"], best["standing_split"])
+    no_middle = cheapest_configuration(sweep_uplifts(base_sc, base_rate, mid_kwh, 100.0, margins, [0.2, 0.4, 0.6, 0.8]), 40.0)
+    assert no_middle["standing_split"] == 0.4
+    print(f"✅ Cheapest configuration is stable under grid order: margin {best['margin_value']:g}, "
+          f"{best['standing_split']:.0%} split, portfolio TAC £{best['portfolio_tac']:,.2f}")
+
+    assert cheapest_configuration(sweep, target_margin=500.0) is None
+    frame = sweep_to_frame(sweep, [f"{lo:,} – {hi:,}" for lo, hi in BANDS])
+    assert len(frame) == len(margins) * len(splits) * len(BANDS)
+    print("✅ Unreachable targets return None; surface table has one row per (margin, split, band)")